@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GoalInsight
+from .models import GoalInsight, InsightJob
 
 @admin.register(GoalInsight)
 class GoalInsightAdmin(admin.ModelAdmin):
@@ -18,4 +18,11 @@ class GoalInsightAdmin(admin.ModelAdmin):
     def short_overview(self, obj):
         """Helper to truncate long text in the list view"""
         return obj.overview[:75] + "..." if obj.overview else "-"
-    short_overview.short_description = "Overview Preview"
\ No newline at end of file
+    short_overview.short_description = "Overview Preview"
+
+@admin.register(InsightJob)
+class InsightJobAdmin(admin.ModelAdmin):
+    list_display = ('goal', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('goal__name', 'last_error')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at')
@@ -0,0 +1,145 @@
+# backend/ai_features/context.py
+
+import json
+import math
+from datetime import timedelta
+
+from django.conf import settings
+
+# Dense prompt encoding for the insight contexts: one header row plus one
+# delimited row per record (instead of JSON objects repeating every key),
+# runs of identical consecutive days collapsed into a date range, and the
+# oldest rows dropped to stay within LLM_CONTEXT_TOKEN_BUDGET.
+
+SEPARATOR = '|'
+CHARS_PER_TOKEN = 4  # Rough average for English text on BPE tokenizers
+
+
+def estimate_tokens(text):
+    """Rough count, good enough for budgeting and before/after comparisons."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def cell(value):
+    """One table cell: single line, no separators, no JSON noise for scalars."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Y' if value else 'N'
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(',', ':'))
+    return ' '.join(value.replace(SEPARATOR, '/').split())
+
+def day_label(first, last=None):
+    """`2026-10-05 Mon`, or `2026-10-05 Mon..10-11 Sun` for a collapsed run."""
+    label = first.strftime('%Y-%m-%d %a')
+    if last and last != first:
+        label += last.strftime('..%m-%d %a' if last.year == first.year else '..%Y-%m-%d %a')
+    return label
+
+def collapse_runs(rows):
+    """
+    rows: (date, cells) in date order. Consecutive days with identical
+    cells become one (first, last, cells) run; gaps are never bridged.
+    """
+    runs = []
+    for day, cells in rows:
+        if runs and runs[-1][2] == cells and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day, cells])
+    return runs
+
+def encode_table(columns, rows, budget=None):
+    """
+    Header + one line per row. With a token `budget`, the oldest rows are
+    dropped (rows are chronological) and a marker says how many.
+    """
+    header = SEPARATOR.join(columns)
+    lines = [SEPARATOR.join(cell(value) for value in row) for row in rows]
+    if budget is None:
+        return '\n'.join([header] + lines)
+
+    size = len(header) + sum(len(line) + 1 for line in lines)
+    dropped = 0
+    while dropped < len(lines) and size > budget * CHARS_PER_TOKEN:
+        size -= len(lines[dropped]) + 1
+        dropped += 1
+    if dropped:
+        return '\n'.join([header, f"({dropped} older rows omitted)"] + lines[dropped:])
+    return '\n'.join([header] + lines)
+
+def token_budget():
+    return settings.LLM_CONTEXT_TOKEN_BUDGET
+
+
+# --- Per-insight encoders ---
+
+def encode_habit_logs(logs, budget=None):
+    """logs: dicts with date/status/value/note, oldest first."""
+    runs = collapse_runs(
+        (log["date"], (log["status"], cell(log["value"]), cell(log["note"]))) for log in logs
+    )
+    return encode_table(
+        ('date', 'status', 'value', 'note'),
+        [(day_label(first, last), *cells) for first, last, cells in runs],
+        budget if budget is not None else token_budget()
+    )
+
+def encode_goal_context(data, budget=None):
+    """build_context_data() output as a few header lines and two tables."""
+    habits = encode_table(
+        ('habit', 'frequency', 'consistency', 'logs', 'successes', 'streak', 'best'),
+        [
+            (h["name"], h["frequency"], h["consistency_rate"], h["total_logs"],
+             h["successes"], h["current_streak"], h["longest_streak"])
+            for h in data["habits_summary"]
+        ]
+    )
+    runs = collapse_runs(
+        (log["date"], (log["moved_forward"], cell(log["note"]))) for log in data["momentum_logs"]
+    )
+    momentum = encode_table(
+        ('date', 'moved_forward', 'note'),
+        [(day_label(first, last), *cells) for first, last, cells in runs],
+        budget if budget is not None else token_budget()
+    )
+    return (
+        f"goal: {cell(data['goal'])} ({data['category']}), {data['start_date']} -> {data['end_date']}\n"
+        f"habits:\n{habits}\n"
+        f"momentum_logs:\n{momentum}"
+    )
+
+CORRELATION_ROWS = 8  # Strongest pairs / next-day effects kept per table
+
+def encode_correlations(summary, budget=None):
+    """tracker.correlations.build_correlations() output as a few small tables."""
+    budget = budget if budget is not None else token_budget()
+    pairs = sorted(summary["co_success"], key=lambda pair: -abs(pair["lift"]))[:CORRELATION_ROWS]
+    lags = summary["lagged_misses"][:CORRELATION_ROWS]  # Already sorted by effect
+    sections = [
+        ("habits", ('habit', 'logged_days', 'success_%'), [
+            (h["name"], h["logged_days"], h["success_rate"]) for h in summary["habits"]
+        ]),
+        ("co_success (on days `habit` succeeded, how often `with` did; lift = points above days it failed)",
+         ('habit', 'with', 'days', 'rate_%', 'lift'), [
+            (p["habit"], p["with"], p["days"], p["co_success_rate"], p["lift"]) for p in pairs
+        ]),
+        ("next_day_misses (a miss of `missed`, then `next_day` missed the day after)",
+         ('missed', 'next_day', 'days', 'miss_%', 'base_miss_%'), [
+            (l["missed"], l["next_day"], l["days"], l["miss_rate"], l["base_miss_rate"]) for l in lags
+        ]),
+        ("weekdays (collapse = points below the overall success rate)",
+         ('day', 'success_%', 'collapse'), [
+            (w["day"], w["success_rate"], w["collapse"]) for w in summary["weekdays"]
+            if w["success_rate"] is not None
+        ]),
+        ("wellbeing (Pearson r, daily success vs DailyLog metric)",
+         ('habit', 'metric', 'r', 'days'), [
+            (w["habit"], w["metric"], w["r"], w["days"]) for w in summary["wellbeing"]
+        ]),
+    ]
+    share = budget // len(sections)
+    return '\n'.join(
+        f"{title}:\n{encode_table(columns, rows, share)}" if rows else f"{title}: none"
+        for title, columns, rows in sections
+    )
@@ -0,0 +1,95 @@
+# backend/ai_features/executor.py
+
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+# In-process fast path for insight jobs: a goal completed in this process
+# gets its insight without waiting for `run_insight_worker` to poll. The
+# job row stays the source of truth, so anything dropped or cut short here
+# is still picked up by the worker.
+
+
+class BoundedExecutor:
+    """
+    Fixed-size thread pool with a bounded backlog and single-flight keys:
+    a key already queued or running is not submitted twice.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='insight')
+        self._lock = threading.Lock()
+        self._keys = set()  # Queued or running
+        self._closed = False
+        self._counts = dict.fromkeys(
+            ('queued', 'running', 'completed', 'failed', 'deduplicated', 'dropped'), 0
+        )
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Returns False when the task was deduplicated or dropped (full / shut down)."""
+        with self._lock:
+            if key in self._keys:
+                self._counts['deduplicated'] += 1
+                return False
+            if self._closed or self._counts['queued'] >= self.max_queue:
+                self._counts['dropped'] += 1
+                return False
+            self._keys.add(key)
+            self._counts['queued'] += 1
+        self._pool.submit(self._run, key, fn, args, kwargs)
+        return True
+
+    def _run(self, key, fn, args, kwargs):
+        with self._lock:
+            self._counts['queued'] -= 1
+            self._counts['running'] += 1
+        outcome = 'completed'
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            outcome = 'failed'
+            print(f"Insight task {key} failed: {e}")
+        finally:
+            connection.close()  # Each pool thread holds its own DB connection
+            with self._lock:
+                self._counts['running'] -= 1
+                self._counts[outcome] += 1
+                self._keys.discard(key)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def shutdown(self, wait=True, cancel_pending=True):
+        """
+        Stops accepting work; running tasks finish, queued ones are
+        cancelled (their jobs stay PENDING for the worker) unless told otherwise.
+        """
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_pending)
+        if cancel_pending:
+            with self._lock:
+                self._counts['dropped'] += self._counts['queued']
+                self._counts['queued'] = 0
+                self._keys.clear()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_insight_executor():
+    """The process-wide executor, created on first use (after fork, under gunicorn)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = BoundedExecutor(
+                max_workers=settings.INSIGHT_EXECUTOR_WORKERS,
+                max_queue=settings.INSIGHT_EXECUTOR_MAX_QUEUE
+            )
+            atexit.register(_executor.shutdown)
+        return _executor
@@ -0,0 +1,172 @@
+# backend/ai_features/fake_llm.py
+
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .context import estimate_tokens
+
+# Local stand-in for the Groq chat-completions endpoint (the subset the SDK
+# uses in ai_features): plain and streamed completions with configurable
+# latency and injected failures. Point GROQ_BASE_URL at `server.url` (or
+# run `manage.py run_fake_llm`) to exercise the AI paths offline.
+
+# Valid for every insight kind: goal, habit and global prompts each read their own keys
+DEFAULT_CONTENT = {
+    "overview": "Consistent on weekdays, weaker on weekends.",
+    "patterns": ["Mondays are the strongest day", "Misses cluster after late nights"],
+    "optional_reflection": "Small, regular steps carried the goal.",
+    "recommendation": "Move the habit earlier in the day.",
+    "system_health": "Stable, with one habit dragging the others on weekends.",
+    "correlations": ["Gym DONE usually means Read DONE"],
+    "strategy": "Protect the keystone habit first."
+}
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-answer (timeouts, latency budgets) are expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeLLMServer:
+    """
+    latency + uniform(0, jitter) seconds before answering; `error_rate` of
+    requests fail with `error_status`; streamed answers send `chunk_size`
+    characters every `chunk_delay` seconds.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, chunk_size=8, chunk_delay=0.0, content=None, seed=None):
+        self.latency, self.jitter = latency, jitter
+        self.error_rate, self.error_status = error_rate, error_status
+        self.chunk_size, self.chunk_delay = chunk_size, chunk_delay
+        self.content = DEFAULT_CONTENT if content is None else content
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(('requests', 'errors', 'streams', 'in_flight', 'max_in_flight'), 0)
+        self._httpd = _HTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+    # --- Request handling ---
+
+    def _begin(self):
+        with self._lock:
+            self._counts['requests'] += 1
+            self._counts['in_flight'] += 1
+            self._counts['max_in_flight'] = max(self._counts['max_in_flight'], self._counts['in_flight'])
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self._counts['errors'] += 1
+        return delay, failed
+
+    def _end(self):
+        with self._lock:
+            self._counts['in_flight'] -= 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    return self.send_json(404, {"error": {"message": "Unknown route", "type": "not_found"}})
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    return self.send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+
+                delay, failed = server._begin()
+                try:
+                    time.sleep(delay)
+                    if failed:
+                        return self.send_json(server.error_status, {
+                            "error": {"message": "Injected failure", "type": "server_error"}
+                        })
+                    text = json.dumps(server.content)
+                    if request.get('stream'):
+                        return self.send_stream(request, text)
+                    self.send_json(200, server.completion(request, text))
+                finally:
+                    server._end()
+
+            def send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_stream(self, request, text):
+                with server._lock:
+                    server._counts['streams'] += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')  # End of body = end of stream
+                self.end_headers()
+                for i in range(0, len(text), server.chunk_size):
+                    chunk = {
+                        "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": request.get('model', 'fake'),
+                        "choices": [{"index": 0, "delta": {"content": text[i:i + server.chunk_size]},
+                                     "finish_reason": None}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(server.chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
+
+    def completion(self, request, text):
+        prompt = ''.join(str(message.get('content', '')) for message in request.get('messages', []))
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get('model', 'fake'),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+            "usage": usage
+        }
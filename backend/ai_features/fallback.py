@@ -0,0 +1,168 @@
+# backend/ai_features/fallback.py
+
+from datetime import timedelta
+from itertools import combinations
+from tracker.models import HabitLog
+
+# Rule-based insights computed from the same context the LLM would see,
+# served (flagged source: "local") when the upstream is down or misses the
+# LLM_INSIGHT_BUDGET. Deterministic, no queries, same keys as the LLM JSON.
+
+TREND_THRESHOLD = 2.0  # Percentage points per week below which a trend is "steady"
+
+
+def rate(successes, total):
+    return round(successes / total * 100) if total else 0
+
+def trend_slope(points):
+    """Least-squares slope of (day, 0/1 or share) points, in percentage points per week."""
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+    return round(slope * 7 * 100, 1)
+
+def describe_trend(slope):
+    if slope >= TREND_THRESHOLD:
+        return f"improving ({slope:+.1f} pts/week)"
+    if slope <= -TREND_THRESHOLD:
+        return f"declining ({slope:+.1f} pts/week)"
+    return "steady"
+
+def longest_gap(success_days, start, end):
+    """Longest run of calendar days in [start, end] without a success: (days, first, last)."""
+    best, run_start = (0, None, None), start
+    for day in sorted(success_days) + [end + timedelta(days=1)]:
+        length = (day - run_start).days
+        if length > best[0]:
+            best = (length, run_start, day - timedelta(days=1))
+        run_start = max(run_start, day + timedelta(days=1))
+    return best
+
+def weekday_rates(rows):
+    """rows: (date, successes, total) -> {weekday: rate}, Monday first, logged weekdays only."""
+    totals = {}
+    for day, successes, total in rows:
+        entry = totals.setdefault(day.weekday(), [0, 0])
+        entry[0] += successes
+        entry[1] += total
+    return {weekday: rate(*totals[weekday]) for weekday in sorted(totals) if totals[weekday][1]}
+
+def day_name(weekday):
+    return ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')[weekday]
+
+def gap_sentence(gap, what):
+    days, first, last = gap
+    return f"Longest stretch without {what}: {days} days ({first:%b %d} to {last:%b %d})."
+
+
+def local_habit_insight(context):
+    """build_habit_context() output -> overview / patterns / recommendation."""
+    logs = context["logs"]
+    name = context["habit_name"]
+    if not logs:
+        return {
+            "overview": f"No logs for {name} yet, so there is no trajectory to describe.",
+            "patterns": [],
+            "recommendation": "Log the habit for a couple of weeks to get a first read."
+        }
+
+    first, last = logs[0]["date"], logs[-1]["date"]
+    wins = [log["status"] in HabitLog.SUCCESS_STATUSES for log in logs]
+    overall = rate(sum(wins), len(wins))
+    slope = trend_slope([((log["date"] - first).days, win) for log, win in zip(logs, wins)])
+    by_day = weekday_rates((log["date"], win, 1) for log, win in zip(logs, wins))
+    gap = longest_gap([log["date"] for log, win in zip(logs, wins) if win], first, last)
+
+    patterns = []
+    if len(by_day) > 1:
+        best = max(by_day, key=by_day.get)
+        worst = min(by_day, key=by_day.get)
+        patterns.append(
+            f"Strongest day: {day_name(best)} ({by_day[best]}%), weakest: {day_name(worst)} ({by_day[worst]}%)."
+        )
+    if gap[0]:
+        patterns.append(gap_sentence(gap, "a success"))
+    patterns.append(f"Trend over the period: {describe_trend(slope)}.")
+
+    if len(by_day) > 1 and by_day[worst] <= overall - 20:
+        recommendation = f"Plan {day_name(worst)}s explicitly; they fall well below your {overall}% average."
+    elif slope <= -TREND_THRESHOLD:
+        recommendation = "Recent results are slipping; shrink the habit to a version you can keep daily."
+    elif gap[0] >= 7:
+        recommendation = "Set a restart rule so one miss doesn't turn into a week-long gap."
+    else:
+        recommendation = "The current routine is holding; keep it stable before adding difficulty."
+
+    return {
+        "overview": (
+            f"{name} succeeded on {overall}% of {len(logs)} logs between {first:%b %d} "
+            f"and {last:%b %d}; the trajectory is {describe_trend(slope)}."
+        ),
+        "patterns": patterns,
+        "recommendation": recommendation
+    }
+
+def local_global_insight(names, matrix):
+    """(names, [(date, statuses)]) as built for the global insight -> system_health / correlations / strategy."""
+    if not matrix:
+        return {
+            "system_health": "Nothing was logged in the last 30 days, so there is no system to assess.",
+            "correlations": [],
+            "strategy": "Restart with the single easiest habit and log it daily."
+        }
+
+    wins = [[status in HabitLog.SUCCESS_STATUSES for status in statuses] for _, statuses in matrix]
+    logged = [[status is not None for status in statuses] for _, statuses in matrix]
+    days = [day for day, _ in matrix]
+
+    habit_rates = {
+        name: rate(sum(row[i] for row in wins), sum(row[i] for row in logged))
+        for i, name in enumerate(names)
+    }
+    overall = rate(sum(map(sum, wins)), sum(map(sum, logged)))
+    slope = trend_slope([
+        ((day - days[0]).days, sum(w) / max(sum(l), 1)) for day, w, l in zip(days, wins, logged)
+    ])
+    by_day = weekday_rates((day, sum(w), sum(l)) for day, w, l in zip(days, wins, logged))
+
+    # Strongest co-success: how much more often B succeeds on days A succeeds
+    correlations, best_lift = [], None
+    for a, b in combinations(range(len(names)), 2):
+        for x, y in ((a, b), (b, a)):
+            with_x = [row[y] for row in wins if row[x]]
+            without_x = [row[y] for row in wins if not row[x]]
+            if len(with_x) >= 3 and without_x:
+                lift = rate(sum(with_x), len(with_x)) - rate(sum(without_x), len(without_x))
+                if best_lift is None or lift > best_lift[0]:
+                    best_lift = (lift, x, y, rate(sum(with_x), len(with_x)), rate(sum(without_x), len(without_x)))
+    if best_lift and best_lift[0] >= 20:
+        _, x, y, with_rate, without_rate = best_lift
+        correlations.append(
+            f"When {names[x]} succeeds, {names[y]} succeeds {with_rate}% of the time (vs {without_rate}% otherwise)."
+        )
+    if len(by_day) > 1:
+        worst = min(by_day, key=by_day.get)
+        correlations.append(f"Weakest day for the whole system: {day_name(worst)} ({by_day[worst]}% success).")
+    gap = longest_gap([day for day, w in zip(days, wins) if any(w)], days[0], days[-1])
+    if gap[0]:
+        correlations.append(gap_sentence(gap, "any habit succeeding"))
+
+    weakest = min(habit_rates, key=habit_rates.get)
+    if best_lift and best_lift[0] >= 20:
+        strategy = f"Treat {names[best_lift[1]]} as the keystone: protect it first on hard days."
+    else:
+        strategy = f"Shore up {weakest} ({habit_rates[weakest]}%), the weakest link in the system."
+
+    return {
+        "system_health": (
+            f"{overall}% of logged habit-days succeeded over {len(days)} active days; "
+            f"the system is {describe_trend(slope)}."
+        ),
+        "correlations": correlations,
+        "strategy": strategy
+    }
@@ -0,0 +1,180 @@
+# backend/ai_features/llm.py
+
+import random
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from groq import (
+    APIConnectionError,  # Includes APITimeoutError
+    Groq,
+    InternalServerError,
+    RateLimitError
+)
+
+# One Groq client per process, shared by every ai_features call: keeps
+# HTTP keep-alive/TLS sessions warm, and gives all calls the same
+# timeouts, retry policy and circuit breaker.
+
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+class CircuitOpenError(Exception):
+    """The upstream failed repeatedly; calls are short-circuited until the cool-down ends."""
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN after `threshold` consecutive upstream failures.
+    OPEN -> HALF_OPEN after `reset_timeout` seconds: one trial call is let
+    through, and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold, reset_timeout, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'CLOSED'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'HALF_OPEN'
+        return 'OPEN'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'CLOSED':
+                return True
+            if state == 'HALF_OPEN' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at, self.trial_running = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+
+
+class RateLimiter:
+    """Spaces calls at least 1/`rate` seconds apart, across threads (rate <= 0: no limit)."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.clock, self.sleep = clock, sleep
+        self._lock = threading.Lock()
+        self.next_slot = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+_lock = threading.Lock()
+_client = None
+_transport = None
+_breaker = None
+
+def get_breaker():
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_RESET)
+        return _breaker
+
+def get_client():
+    """The shared client, built on first use (so it's created after a worker fork)."""
+    global _client
+    with _lock:
+        if _client is None:
+            timeout = httpx.Timeout(settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+            http_client = httpx.Client(
+                transport=_transport,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+                )
+            )
+            _client = Groq(
+                api_key=settings.GROQ_API_KEY,
+                base_url=settings.GROQ_BASE_URL,
+                timeout=timeout,
+                max_retries=0,  # Retried in create_completion, with jitter and the breaker
+                http_client=http_client
+            )
+        return _client
+
+def set_transport(transport):
+    """
+    Routes the shared client through an httpx transport (e.g.
+    httpx.MockTransport or a local fake server's); None restores the network.
+    """
+    global _transport
+    _transport = transport
+    reset_client()
+
+def reset_client():
+    global _client, _breaker
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client, _breaker = None, None
+
+def retry_delay(attempt):
+    """Full jitter: spreads retries of concurrent callers instead of syncing them."""
+    return random.uniform(0, settings.LLM_RETRY_BACKOFF * 2 ** attempt)
+
+MIN_ATTEMPT_TIMEOUT = 0.05  # Seconds; an attempt always gets at least this
+
+def create_completion(client=None, deadline=None, **kwargs):
+    """
+    chat.completions.create() with bounded retries on transient errors
+    (connection, timeout, 429, 5xx) behind the circuit breaker. Other
+    errors (bad request, auth) are raised as is and don't trip it.
+    With a `deadline` (time.monotonic() value), each attempt's timeout is
+    the time left and no retry is started that couldn't finish before it.
+    """
+    client = client or get_client()
+    breaker = get_breaker()
+    if not breaker.allow():
+        raise CircuitOpenError("LLM upstream unavailable, retry later.")
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        if deadline is not None:
+            kwargs['timeout'] = max(deadline - time.monotonic(), MIN_ATTEMPT_TIMEOUT)
+        try:
+            completion = client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS:
+            delay = retry_delay(attempt)
+            out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+            if attempt == settings.LLM_MAX_RETRIES or out_of_time:
+                breaker.record_failure()
+                raise
+            time.sleep(delay)
+        except Exception:
+            breaker.record_success()  # Upstream answered; release a half-open trial
+            raise
+        else:
+            breaker.record_success()
+            return completion
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ai_features.llm import RateLimiter, get_breaker
+from ai_features.models import GoalInsight, InsightJob
+from ai_features.services import goal_insight_messages, request_goal_insight
+from tracker.models import Goal
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates GoalInsights for completed goals that have none, several LLM calls "
+        "at a time. Each batch is saved as it finishes, so re-running resumes. "
+        "Point GROQ_BASE_URL at a local fake server to run it offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Goals selected and saved per batch (default: 50).")
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help="LLM calls in flight at once (default: 4).")
+        parser.add_argument('--rate', type=float, default=2.0,
+                            help="Max LLM calls per second, 0 = unlimited (default: 2).")
+        parser.add_argument('--limit', type=int, default=0,
+                            help="Stop after this many goals, 0 = all (default: 0).")
+
+    def handle(self, *args, **options):
+        batch_size, concurrency, limit = options['batch_size'], options['concurrency'], options['limit']
+        if batch_size < 1 or concurrency < 1 or limit < 0 or options['rate'] < 0:
+            raise CommandError("--batch-size and --concurrency must be positive, --limit and --rate not negative.")
+
+        limiter = RateLimiter(options['rate'])
+        seen = saved = failed = 0
+        last_id = None
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='backfill') as pool:
+            while not limit or seen < limit:
+                size = min(batch_size, limit - seen) if limit else batch_size
+                goals = self.next_batch(last_id, size)
+                if not goals:
+                    break
+                last_id, seen = goals[-1].id, seen + len(goals)
+
+                # 1. Prompts are built here (DB reads); the pool threads only talk to the LLM
+                messages = [goal_insight_messages(goal) for goal in goals]
+                results = list(pool.map(lambda m: self.request(limiter, m), messages))
+
+                # 2. One INSERT per batch. A goal that got its insight meanwhile
+                # (user opened it, insight worker) keeps that one.
+                insights = [
+                    GoalInsight(goal=goal, **result)
+                    for goal, result in zip(goals, results) if not isinstance(result, Exception)
+                ]
+                GoalInsight.objects.bulk_create(insights, ignore_conflicts=True)
+                # Queued jobs for these goals have nothing left to do
+                InsightJob.objects.filter(
+                    goal__in=[insight.goal for insight in insights], status__in=('PENDING', 'FAILED')
+                ).update(status='DONE', last_error='', locked_at=None, updated_at=timezone.now())
+
+                errors = [result for result in results if isinstance(result, Exception)]
+                saved, failed = saved + len(insights), failed + len(errors)
+                self.stdout.write(
+                    f"Batch of {len(goals)}: {len(insights)} saved, {len(errors)} failed"
+                    + (f" (first error: {errors[0]})" if errors else "")
+                )
+
+                if get_breaker().state == 'OPEN':
+                    raise CommandError(f"LLM circuit open after {saved} insights; re-run to resume.")
+
+        self.stdout.write(f"Done: {saved} insights saved, {failed} failed (re-run to retry them).")
+
+    def next_batch(self, last_id, size):
+        """Keyset pagination, so goals that failed in this run aren't picked up again."""
+        goals = Goal.objects.filter(is_completed=True, ai_insight__isnull=True).order_by('id')
+        if last_id is not None:
+            goals = goals.filter(id__gt=last_id)
+        return list(goals[:size])
+
+    def request(self, limiter, messages):
+        limiter.wait()
+        try:
+            return request_goal_insight(messages)
+        except Exception as e:  # Reported per batch; the goal stays eligible for the next run
+            return e
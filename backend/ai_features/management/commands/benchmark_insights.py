@@ -0,0 +1,174 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ai_features.executor import get_insight_executor
+from ai_features.fake_llm import FakeLLMServer
+from ai_features.llm import reset_client
+from tracker.models import Goal, Habit, HabitLog
+from tracker.services import recompute_habit_stats
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives analyze, global_insight and goal retrieve concurrently against a fake LLM "
+        "and reports p50/p95/p99 latency and worker occupancy. Seeds a throwaway user "
+        "(committed, since requests run on their own connections) and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help="Requests per endpoint (default: 30).")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients (default: 8).")
+        parser.add_argument('--habits', type=int, default=5)
+        parser.add_argument('--goals', type=int, default=10, help="Goals completed at start (insight jobs).")
+        parser.add_argument('--latency', type=float, default=0.3, help="Fake LLM latency, seconds.")
+        parser.add_argument('--jitter', type=float, default=0.2)
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--stream', action='store_true', help="Use ?stream=1 for analyze/global_insight.")
+        parser.add_argument('--cached', action='store_true', help="Allow insight cache hits (no ?refresh=1).")
+        parser.add_argument('--llm-url', help="Use a running fake (or real) LLM instead of starting one.")
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency'], options['habits']) < 1 or options['goals'] < 0:
+            raise CommandError("--requests, --concurrency and --habits must be positive.")
+
+        server = None
+        if not options['llm_url']:
+            server = FakeLLMServer(
+                latency=options['latency'], jitter=options['jitter'], error_rate=options['error_rate']
+            ).start()
+        llm_settings = override_settings(
+            GROQ_BASE_URL=options['llm_url'] or server.url,
+            GROQ_API_KEY=settings.GROQ_API_KEY or 'fake',
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        )
+        llm_settings.enable()
+        reset_client()
+        user = None
+        try:
+            user, habits, goals = self.seed(options)
+            self.run(options, user, habits, goals, server)
+        finally:
+            if user:
+                self.drain_executor()
+                user.delete()
+            llm_settings.disable()
+            reset_client()
+            if server:
+                server.stop()
+
+    def seed(self, options):
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        habits = [Habit.objects.create(user=user, name=f'Habit {i}') for i in range(options['habits'])]
+        today = timezone.now().date()
+        statuses = ('DONE', 'DONE', 'MISSED', 'DONE', 'PARTIAL')
+        HabitLog.objects.bulk_create([
+            HabitLog(habit=habit, date=today - timedelta(days=d), status=statuses[(d + i) % len(statuses)])
+            for i, habit in enumerate(habits)
+            for d in range(60)
+        ])
+        recompute_habit_stats(habits)
+        goals = [Goal.objects.create(user=user, name=f'Goal {i}') for i in range(options['goals'])]
+        return user, habits, goals
+
+    def run(self, options, user, habits, goals, server):
+        params = {} if options['cached'] else {'refresh': 1}
+        if options['stream']:
+            params['stream'] = 1
+        plan = []
+        for i in range(options['requests']):
+            plan.append(('analyze', f'/api/v1/habits/{habits[i % len(habits)].id}/analyze/', params))
+            plan.append(('global_insight', '/api/v1/habits/global_insight/', params))
+            if goals:
+                plan.append(('goal retrieve', f'/api/v1/goals/{goals[i % len(goals)].id}/', {}))
+
+        local = threading.local()
+        samples = []  # (executor running, LLM requests in flight)
+        sampling = threading.Event()
+        executor = get_insight_executor()
+
+        def call(item):
+            label, url, query = item
+            if not hasattr(local, 'client'):
+                local.client = APIClient()
+                local.client.force_authenticate(user)
+            began = time.perf_counter()
+            response = local.client.get(url, query)
+            failed = response.status_code >= 400
+            if getattr(response, 'streaming', False):
+                # Time the whole stream; failures arrive as an `error` event on a 200
+                failed = failed or b'event: error' in b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - began
+            connection.close()
+            return label, elapsed, failed
+
+        def sample():
+            while not sampling.wait(0.02):
+                samples.append((executor.metrics()['running'], server.stats()['in_flight'] if server else 0))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        began = time.perf_counter()
+        # Completing goals queues their insights on the in-process executor (post_save signal)
+        for goal in goals:
+            goal.is_completed = True
+            goal.save()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(call, plan))
+        wall = time.perf_counter() - began
+        sampling.set()
+        sampler.join()
+
+        self.report(options, results, wall, samples, executor, server)
+
+    def report(self, options, results, wall, samples, executor, server):
+        self.stdout.write(f"{'endpoint':>15} {'n':>4} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+        for label in dict.fromkeys(label for label, _, _ in results):
+            rows = [(elapsed, failed) for name, elapsed, failed in results if name == label]
+            ordered = sorted(elapsed * 1000 for elapsed, _ in rows)
+            errors = sum(failed for _, failed in rows)
+            self.stdout.write(
+                f"{label:>15} {len(rows):4} {errors:6} {percentile(ordered, 50):8.1f} "
+                f"{percentile(ordered, 95):8.1f} {percentile(ordered, 99):8.1f} {ordered[-1]:8.1f}"
+            )
+
+        busy = sum(elapsed for _, elapsed, _ in results)
+        self.stdout.write(
+            f"{len(results)} requests in {wall:.2f}s ({len(results) / wall:.1f}/s); "
+            f"client occupancy {busy / (wall * options['concurrency']):.0%} of {options['concurrency']}"
+        )
+        if samples:
+            workers = settings.INSIGHT_EXECUTOR_WORKERS
+            running = [r for r, _ in samples]
+            self.stdout.write(
+                f"Insight executor: {sum(running) / len(running) / workers:.0%} mean occupancy "
+                f"of {workers} workers, {executor.metrics()}"
+            )
+            if server:
+                in_flight = [f for _, f in samples]
+                self.stdout.write(
+                    f"Fake LLM: mean {sum(in_flight) / len(in_flight):.1f} in flight, {server.stats()}"
+                )
+
+    def drain_executor(self, timeout=30):
+        """Lets queued goal insights finish before their goals are deleted."""
+        executor = get_insight_executor()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            metrics = executor.metrics()
+            if not metrics['queued'] and not metrics['running']:
+                return
+            time.sleep(0.05)
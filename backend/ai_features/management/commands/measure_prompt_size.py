@@ -0,0 +1,113 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from ai_features.context import encode_correlations, encode_goal_context, encode_habit_logs, estimate_tokens
+from ai_features.services import build_context_data, build_habit_context
+from tracker.correlations import build_correlations
+from tracker.models import DailyLog, Goal, GoalProgress, Habit, HabitLog
+from tracker.services import build_status_matrix, recompute_habit_stats
+
+NOTES = ("Tired after work", "Travelling", "Felt great, extra set", "Skipped, headache", "Late meeting")
+
+
+# The previous encodings (pretty-printed JSON, one object per record), kept as the baseline
+
+def legacy_habit_data(context):
+    return json.dumps([
+        {"date": log["date"].strftime('%Y-%m-%d (%a)'), "status": log["status"],
+         "value": log["value"], "note": log["note"]}
+        for log in context["logs"]
+    ], indent=2)
+
+def legacy_global_data(names, matrix):
+    rows = []
+    for day, statuses in matrix:
+        row = {"date": day.strftime('%Y-%m-%d (%a)')}
+        row.update({name: status or "NO_LOG" for name, status in zip(names, statuses)})
+        rows.append(row)
+    return json.dumps(rows, indent=2)
+
+def legacy_goal_data(context):
+    return json.dumps(context, indent=2, default=str)
+
+
+class Command(BaseCommand):
+    help = "Reports insight prompt data size, legacy JSON vs compact tables, on synthetic history (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habits', type=int, default=6)
+        parser.add_argument('--days', type=int, default=90, help="Days of logs per habit.")
+        parser.add_argument('--miss-rate', type=float, default=0.2, help="Share of missed days (0-1).")
+        parser.add_argument('--note-rate', type=float, default=0.1, help="Share of logs with a note (0-1).")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if min(options['habits'], options['days']) < 1:
+            raise CommandError("--habits and --days must be positive.")
+        if not (0 <= options['miss_rate'] <= 1 and 0 <= options['note_rate'] <= 1):
+            raise CommandError("Rates must be between 0 and 1.")
+
+        with transaction.atomic():
+            goal, habits = self.seed(options)
+
+            context = build_habit_context(habits[0])
+            end = timezone.now().date()
+            days, rows = build_status_matrix(habits, end - timedelta(days=30), end)
+            names = [habit.name for habit in habits]
+            matrix = [(day, statuses) for day, statuses in zip(days, rows) if any(statuses)]
+            goal_context = build_context_data(goal)
+
+            self.stdout.write(f"{'prompt data':>12} {'before':>16} {'after':>16} {'saved':>7}")
+            for label, before, after in (
+                ("habit", legacy_habit_data(context), encode_habit_logs(context["logs"])),
+                ("global", legacy_global_data(names, matrix),
+                 encode_correlations(build_correlations(goal.user, habits, days, rows))),
+                ("goal", legacy_goal_data(goal_context), encode_goal_context(goal_context)),
+            ):
+                saved = 1 - estimate_tokens(after) / estimate_tokens(before)
+                self.stdout.write(
+                    f"{label:>12} {estimate_tokens(before):6} tok/{len(before):6}c "
+                    f"{estimate_tokens(after):6} tok/{len(after):6}c {saved:6.0%}"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        user = User.objects.create_user(username=f'prompt-size-{time.time_ns()}')
+        goal = Goal.objects.create(user=user, name='Run a marathon', category='Health')
+        habits = [
+            Habit.objects.create(user=user, name=f'Habit {i}', linked_goal=goal)
+            for i in range(options['habits'])
+        ]
+        today = timezone.now().date()
+
+        def note():
+            return rng.choice(NOTES) if rng.random() < options['note_rate'] else None
+
+        HabitLog.objects.bulk_create([
+            HabitLog(
+                habit=habit, date=today - timedelta(days=d), note=note(),
+                status='MISSED' if rng.random() < options['miss_rate'] else 'DONE'
+            )
+            for habit in habits
+            for d in range(options['days'])
+        ], batch_size=2000)
+        GoalProgress.objects.bulk_create([
+            GoalProgress(goal=goal, date=today - timedelta(days=d), note=note(),
+                         moved_forward=rng.random() >= options['miss_rate'])
+            for d in range(options['days'])
+        ])
+        DailyLog.objects.bulk_create([
+            DailyLog(user=user, date=today - timedelta(days=d),
+                     mood_score=rng.randint(1, 5), energy_level=rng.randint(1, 5))
+            for d in range(options['days'])
+        ])
+        recompute_habit_stats(habits)  # bulk_create skips the signals
+        self.stdout.write(f"Seeded {len(habits)} habits x {options['days']} days of logs.")
+        return goal, habits
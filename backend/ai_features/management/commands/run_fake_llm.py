@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from ai_features.fake_llm import FakeLLMServer
+
+
+class Command(BaseCommand):
+    help = "Serves a fake chat-completions API; run the app with GROQ_BASE_URL set to its URL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.5, help="Seconds before answering (default: 0.5).")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Extra random seconds, 0 to this.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests that fail (0-1).")
+        parser.add_argument('--error-status', type=int, default=503, help="Status of failed requests (default: 503).")
+        parser.add_argument('--chunk-delay', type=float, default=0.02, help="Seconds between streamed chunks.")
+        parser.add_argument('--response', help="JSON file with the completion content to return.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError("--error-rate must be between 0 and 1.")
+        content = None
+        if options['response']:
+            try:
+                with open(options['response']) as f:
+                    content = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Can't read --response: {e}")
+
+        server = FakeLLMServer(
+            host=options['host'], port=options['port'], latency=options['latency'],
+            jitter=options['jitter'], error_rate=options['error_rate'],
+            error_status=options['error_status'], chunk_delay=options['chunk_delay'], content=content
+        )
+        self.stdout.write(f"Fake LLM on {server.url} (GROQ_BASE_URL={server.url} GROQ_API_KEY=fake)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stdout.write(f"Stopped: {server.stats()}")
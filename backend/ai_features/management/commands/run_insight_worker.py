@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from ai_features.services import run_insight_jobs, requeue_failed_insight_jobs
+
+
+class Command(BaseCommand):
+    help = "Generates queued goal insights (retries failures with exponential backoff)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5,
+                            help="Jobs claimed per poll (default: 5).")
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty (default: 5).")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once no job is due instead of polling (cron mode).")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Re-queue FAILED jobs before starting.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        if options['retry_failed']:
+            self.stdout.write(f"Re-queued {requeue_failed_insight_jobs()} failed jobs.")
+
+        processed = 0
+        try:
+            while True:
+                ran = run_insight_jobs(batch_size)
+                processed += ran
+                if not ran:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            # Claimed-but-unfinished jobs are picked up again after their lease
+            self.stdout.write("Interrupted.")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} insight jobs."))
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_features', '0001_initial'),
+        ('tracker', '0011_habitstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('goal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='insight_job', to='tracker.goal')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='ai_features_status_b7868e_idx')],
+            },
+        ),
+    ]
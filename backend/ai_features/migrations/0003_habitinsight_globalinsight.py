@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_features', '0002_insightjob'),
+        ('tracker', '0011_habitstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlobalInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('context_hash', models.CharField(max_length=64)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='global_insights', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'context_hash')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HabitInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('context_hash', models.CharField(max_length=64)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_insights', to='tracker.habit')),
+            ],
+            options={
+                'unique_together': {('habit', 'context_hash')},
+            },
+        ),
+    ]
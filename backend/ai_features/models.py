@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.db import models
-from tracker.models import Goal
+from django.utils import timezone
+from tracker.models import Goal, Habit
 import uuid
 
 class GoalInsight(models.Model):
@@ -13,4 +15,57 @@ class GoalInsight(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Insight for {self.goal.name}"
\ No newline at end of file
+        return f"Insight for {self.goal.name}"
+
+class InsightJob(models.Model):
+    """
+    Durable queue entry for a goal insight (one per goal), consumed by
+    `manage.py run_insight_worker` so no web request waits on the LLM.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed')
+    ]
+
+    goal = models.OneToOneField(Goal, on_delete=models.CASCADE, related_name="insight_job")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)  # Backoff: not claimable before this
+    locked_at = models.DateTimeField(null=True, blank=True)  # Claim time, to reclaim dead workers
+    last_error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.status} insight job for {self.goal.name}"
+
+
+class HabitInsight(models.Model):
+    """
+    Cached habit analysis, keyed by a hash of the exact context sent to
+    the LLM: unchanged logs are answered from here (see INSIGHT_CACHE_TTL).
+    """
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name="ai_insights")
+    context_hash = models.CharField(max_length=64)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('habit', 'context_hash')
+
+
+class GlobalInsight(models.Model):
+    """Same as HabitInsight, for the cross-habit system analysis."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="global_insights")
+    context_hash = models.CharField(max_length=64)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'context_hash')
@@ -1,13 +1,51 @@
+import hashlib
 import json
 import os
-from groq import Groq
+import queue
+import random
+import threading
+import time
+from functools import partial
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from tracker.correlations import build_correlations
 from tracker.models import Goal, Habit
-from .models import GoalInsight
+from tracker.services import build_status_matrix, recompute_habit_stats
+from .context import encode_correlations, encode_goal_context, encode_habit_logs
+from .fallback import local_global_insight, local_habit_insight
+from .llm import create_completion
+from .models import GoalInsight, GlobalInsight, HabitInsight, InsightJob
 from datetime import timedelta # <--- Make sure this is imported
 from django.utils import timezone
 
 
+# ==========================================
+# INSIGHT CACHE (Habit + Global)
+# ==========================================
+
+# Part of every cache key: bump when a prompt changes so old answers aren't reused
+INSIGHT_PROMPT_VERSION = 3
+
+def context_hash(kind, context):
+    """Stable hash of the exact data an insight was generated from."""
+    raw = json.dumps([kind, INSIGHT_PROMPT_VERSION, context], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def get_cached_insight(queryset):
+    cutoff = timezone.now() - timedelta(seconds=settings.INSIGHT_CACHE_TTL)
+    row = queryset.filter(created_at__gte=cutoff).first()
+    return {**row.payload, "is_cached": True} if row else None
+
+def store_insight(model, owner_field, owner, cache_key, payload):
+    """One row per owner: a changed context evicts the previous insight."""
+    with transaction.atomic():
+        model.objects.filter(**{owner_field: owner}).exclude(context_hash=cache_key).delete()
+        model.objects.update_or_create(
+            **{owner_field: owner, 'context_hash': cache_key},
+            defaults={'payload': payload, 'created_at': timezone.now()}
+        )
+
 # ==========================================
 # 1. HABIT INSIGHTS (The "Observational" Engine)
 # ==========================================
@@ -17,19 +55,16 @@ def build_habit_context(habit: Habit):
     Prepares raw habit data for the AI, specifically looking for
     patterns between dates, statuses, and USER NOTES.
     """
-    # 1. Get last 45 days (slightly longer window for better pattern matching)
-    recent_logs = habit.logs.all().order_by('date') # Oldest to newest for trajectory
-    
-    # 2. Slice for context window if needed, but keep chronological order
-    if recent_logs.count() > 45:
-        recent_logs = recent_logs[recent_logs.count()-45:]
+    # 1. Get last 45 logs (slightly longer window for better pattern matching)
+    # One query: newest first with a LIMIT, then back to oldest -> newest for trajectory
+    recent_logs = list(habit.logs.order_by('-date')[:45])[::-1]
 
     return {
         "habit_name": habit.name,
         "frequency": habit.frequency,
         "logs": [
             {
-                "date": log.date.strftime('%Y-%m-%d (%a)'), # Include Day of Week for AI
+                "date": log.date, # Encoded with its day of week (see context.py)
                 "status": log.status,
                 "value": log.entry_value,
                 "note": log.note or "" # Crucial: AI needs to see "Why"
@@ -38,21 +73,24 @@ def build_habit_context(habit: Habit):
         ]
     }
 
-def generate_habit_insight(habit_id, user):
+def prepare_habit_insight(habit_id, user, refresh=False):
     """
-    Generates an analytical summary of habit performance, mirroring
-    the style of Goal Insights.
+    Everything before the LLM call, shared by the plain and streaming paths.
+    Returns (result, None) when there is nothing to generate (error or
+    cached insight), else (None, request) for complete/stream_insight().
     """
     try:
         habit = Habit.objects.get(id=habit_id, user=user)
     except Habit.DoesNotExist:
-        return {"error": "Habit not found"}
+        return {"error": "Habit not found"}, None
 
-    # 1. Build Context
+    # 1. Build Context (+ Cache Check)
     context_data = build_habit_context(habit)
-    
-    # 2. Configure AI
-    client = Groq(api_key=settings.GROQ_API_KEY)
+    cache_key = context_hash('habit', context_data)
+    if not refresh:
+        cached = get_cached_insight(HabitInsight.objects.filter(habit=habit, context_hash=cache_key))
+        if cached:
+            return cached, None
     
     # 👇 MATCHING THE GOAL INSIGHT STYLE
     system_prompt = """You generate analytical insights for daily habits based on historical logs. 
@@ -67,13 +105,13 @@ Return strictly JSON."""
 
     user_prompt = f"""<context>
 The user is tracking a habit: "{context_data['habit_name']}" ({context_data['frequency']}).
-Below are the recent logs. 
+Below are the recent logs, one row per day; a date range is consecutive days with the same row.
 'DONE'/'RESISTED' = Success. 
 'MISSED'/'FAILED' = Failure.
 </context>
 
 <data>
-{json.dumps(context_data['logs'], indent=2)}
+{encode_habit_logs(context_data['logs'])}
 </data>
 
 Generate a JSON object with this EXACT structure:
@@ -87,24 +125,34 @@ Generate a JSON object with this EXACT structure:
   "recommendation": "A single, high-level strategic adjustment based on the data."
 }}"""
 
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5, # Lower temperature for more analytical output
-            max_tokens=1024,
-            response_format={"type": "json_object"}
-        )
+    return None, {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "options": {
+            "temperature": 0.5, # Lower temperature for more analytical output
+            "max_tokens": 1024
+        },
+        "cache": (HabitInsight, 'habit', habit, cache_key),
+        "fallback": partial(local_habit_insight, context_data),
+        "label": "Groq AI Error",
+        "error": "Analysis failed."
+    }
 
-        response_content = completion.choices[0].message.content
-        return json.loads(response_content)
+def generate_habit_insight(habit_id, user, client=None, refresh=False):
+    """
+    Generates an analytical summary of habit performance, mirroring
+    the style of Goal Insights. Served from HabitInsight while the
+    context is unchanged, unless `refresh`.
+    """
+    result, request = prepare_habit_insight(habit_id, user, refresh)
+    return result if request is None else complete_insight(request, client)
 
-    except Exception as e:
-        print(f"Groq AI Error: {e}")
-        return {"error": "Analysis failed."}
+def stream_habit_insight(habit_id, user, client=None, refresh=False):
+    """generate_habit_insight() as Server-Sent Events (see stream_insight)."""
+    result, request = prepare_habit_insight(habit_id, user, refresh)
+    return stream_insight(result, request, client)
 
 def build_context_data(goal: Goal):
     """
@@ -122,48 +170,48 @@ def build_context_data(goal: Goal):
 
     # Summarize Linked Habits
     # 🔧 FIX: generic related_name is 'linked_habits' in your models.py
-    for habit in goal.linked_habits.all(): 
-        total_logs = habit.logs.count()
-        successes = habit.logs.filter(status__in=['DONE', 'RESISTED']).count()
-        
-        # Calculate consistency rate
-        rate = round((successes / max(1, total_logs)) * 100) if total_logs > 0 else 0
-        
+    # Totals/streaks are maintained on HabitStats, so no per-habit log counts here
+    habits = list(goal.linked_habits.select_related('stats'))
+    missing = [habit for habit in habits if not hasattr(habit, 'stats')]
+    if missing:
+        recompute_habit_stats(missing)
+        habits = list(goal.linked_habits.select_related('stats'))
+
+    today = timezone.localdate()
+    for habit in habits:
+        stats = habit.stats
         data["habits_summary"].append({
             "name": habit.name,
             "frequency": habit.frequency,
-            "consistency_rate": f"{rate}%",
-            "total_logs": total_logs,
-            "successes": successes
+            "consistency_rate": f"{stats.consistency_rate}%",
+            "total_logs": stats.total_logs,
+            "successes": stats.successes,
+            "current_streak": stats.current_streak_on(today),
+            "longest_streak": stats.longest_streak
         })
 
     # Detailed Momentum Logs
     # We take the first 5 to see how they started, and the last 25 to see how they finished.
-    all_logs = goal.progress_logs.all().order_by('date')
-    
-    if all_logs.count() > 30:
-        # 🔧 FIX: .reverse() is list method, QuerySet uses .order_by('-date')
-        last_25 = list(goal.progress_logs.all().order_by('-date')[:25])
-        # Re-reverse specifically the last chunk to put them in chrono order
-        selected_logs = list(all_logs[:5]) + last_25[::-1]
-    else:
-        selected_logs = list(all_logs)
-    
+    # Two LIMITed queries, no count(): with 30 logs or fewer they simply overlap
+    first_5 = list(goal.progress_logs.order_by('date')[:5])
+    last_25 = list(goal.progress_logs.order_by('-date')[:25])[::-1]
+
     # Remove duplicates (in case total count is small and lists overlap)
-    unique_logs = {log.id: log for log in selected_logs}.values()
+    unique_logs = {log.id: log for log in first_5 + last_25}.values()
 
     for log in unique_logs:
         data["momentum_logs"].append({
-            "date": str(log.date),
+            "date": log.date,
             "moved_forward": log.moved_forward,
             "note": log.note or ""
         })
 
     return data
 
-def generate_goal_insight(goal_id, user):
+def generate_goal_insight(goal_id, user, client=None):
     """
     Orchestrator: Fetches goal, calls Groq AI, saves result.
+    `client` replaces the shared Groq client (e.g. a fake one in tests).
     """
     try:
         goal = Goal.objects.get(id=goal_id, user=user)
@@ -182,23 +230,39 @@ def generate_goal_insight(goal_id, user):
             "is_cached": True
         }
 
-    # 2. Build Context Data
+    # 2. Build Context Data, 3. Call Groq AI (shared client, see ai_features/llm.py)
+    messages = goal_insight_messages(goal)
+    try:
+        fields = request_goal_insight(messages, client)
+
+        # 4. Save to DB
+        insight = GoalInsight.objects.create(goal=goal, **fields)
+        
+        return {
+            "overview": insight.overview,
+            "patterns": insight.patterns,
+            "reflection": insight.reflection
+        }
+
+    except Exception as e:
+        print(f"Groq AI Error: {e}")
+        return {"error": "Failed to generate insight. Please try again."}
+
+def goal_insight_messages(goal):
+    """The chat messages for a goal's insight (reads the DB; the LLM call doesn't)."""
     context_data = build_context_data(goal)
 
-    # 3. Call Groq AI
-    client = Groq(api_key=settings.GROQ_API_KEY)
-    
     system_prompt = """You generate goal insight summaries based on historical data. Your tone should be reflective, analytical, and human-readable. Focus on patterns, consistency, gaps, and how progress unfolded over time. Do not invent reasons not present in the data. Return strictly JSON."""
 
     user_prompt = f"""<context>
 This system tracks long-term goals and daily habits.
 **Habits** are repeatable actions (DAILY, WEEKLY).
-**Momentum logs** record progress notes.
+**Momentum logs** record progress notes; a date range is consecutive days with the same row.
 **Habit statuses**: DONE/RESISTED (Success), MISSED/FAILED (Failure).
 </context>
 
 <data>
-{json.dumps(context_data, indent=2)}
+{encode_goal_context(context_data)}
 </data>
 
 Generate a JSON object with this EXACT structure:
@@ -208,102 +272,81 @@ Generate a JSON object with this EXACT structure:
   "optional_reflection": "A single high-level takeaway (or null)"
 }}"""
 
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.6,
-            max_tokens=1024,
-            top_p=1,
-            stream=False,
-            response_format={"type": "json_object"}
-        )
-
-        # Parse Response
-        response_content = completion.choices[0].message.content
-        result = json.loads(response_content)
-
-        # 4. Save to DB
-        insight = GoalInsight.objects.create(
-            goal=goal,
-            overview=result.get('overview', 'Analysis generated.'),
-            patterns=result.get('patterns', []),
-            reflection=result.get('optional_reflection')
-        )
-        
-        return {
-            "overview": insight.overview,
-            "patterns": insight.patterns,
-            "reflection": insight.reflection
-        }
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
 
-    except Exception as e:
-        print(f"Groq AI Error: {e}")
-        return {"error": "Failed to generate insight. Please try again."}
+def request_goal_insight(messages, client=None):
+    """
+    One LLM call -> GoalInsight fields (unsaved). Raises on failure.
+    Touches no DB, so it is safe to run from a thread pool (backfill_insights).
+    """
+    completion = create_completion(
+        client,
+        model=INSIGHT_MODEL,
+        messages=messages,
+        temperature=0.6,
+        max_tokens=1024,
+        top_p=1,
+        stream=False,
+        response_format={"type": "json_object"}
+    )
+
+    # Parse Response
+    result = json.loads(completion.choices[0].message.content)
+    return {
+        "overview": result.get('overview', 'Analysis generated.'),
+        "patterns": result.get('patterns', []),
+        "reflection": result.get('optional_reflection')
+    }
     
 
 
-def generate_global_habit_insight(user):
-    """
-    Analyzes the INTERACTION between all active habits to find correlations.
-    """
+def prepare_global_habit_insight(user, refresh=False):
+    """Same contract as prepare_habit_insight(), for the system analysis."""
     # 1. Fetch Active Habits
-    habits = Habit.objects.filter(user=user, is_active=True)
-    if not habits.exists():
-        return {"error": "No active habits to analyze."}
+    habits = list(Habit.objects.filter(user=user, is_active=True))
+    if not habits:
+        return {"error": "No active habits to analyze."}, None
 
     # 2. Build the "Habit Matrix" (Last 30 Days)
-    # Goal: [ {"date": "Mon", "Gym": "DONE", "Read": "MISSED"}, ... ]
+    # Goal: precomputed correlations for the prompt (tracker/correlations.py),
+    # the raw matrix only for the local fallback
     
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=30)
     
-    # Prefetch logs to avoid N+1 queries
-    habits = habits.prefetch_related('logs')
-    
-    matrix = []
+    # One query over the 31-day slice, not the habits' full histories
+    days, rows = build_status_matrix(habits, start_date, end_date)
     
-    # Iterate through days
-    for i in range(31):
-        current_date = start_date + timedelta(days=i)
-        day_str = current_date.strftime('%Y-%m-%d (%a)')
-        
-        day_data = {"date": day_str}
-        has_data = False
-        
-        for habit in habits:
-            # Find log for this day (in memory)
-            log = next((l for l in habit.logs.all() if l.date == current_date), None)
-            
-            if log:
-                day_data[habit.name] = log.status
-                has_data = True
-            else:
-                # If it's a daily habit and no log, imply 'MISSED' (or 'N/A' for others)
-                day_data[habit.name] = "NO_LOG"
-        
-        if has_data:
-            matrix.append(day_data)
+    # Days where nothing at all was logged carry no signal
+    names = [habit.name for habit in habits]
+    matrix = [(day, statuses) for day, statuses in zip(days, rows) if any(statuses)]
+    summary = build_correlations(user, habits, days, rows)
+
+    cache_key = context_hash('global', summary)
+    if not refresh:
+        cached = get_cached_insight(GlobalInsight.objects.filter(user=user, context_hash=cache_key))
+        if cached:
+            return cached, None
 
     # 3. AI Analysis
-    client = Groq(api_key=settings.GROQ_API_KEY)
-    
     system_prompt = """You are a Systems Analyst for human behavior. 
-    Analyze the daily log matrix of multiple habits to find CORRELATIONS and SYSTEM FAILURES.
+    Analyze precomputed statistics of multiple habits (last 30 days) to find CORRELATIONS and SYSTEM FAILURES.
     
     Look for:
     1. The "Keystone Habit": Does one habit's success/failure predict the others? (e.g. "When Gym is DONE, Reading is always DONE").
     2. The "Domino Effect": Does missing one habit trigger a chain reaction?
     3. The "Weak Link": Is there a specific day of the week where the whole system collapses?
+    4. The "Fuel": Do mood or energy move with any habit?
     
     Return strictly JSON."""
 
     user_prompt = f"""
     <data>
-    {json.dumps(matrix, indent=2)}
+    Rates are %, over days where both sides were logged; pairs with fewer than {summary['min_support']} days are left out.
+{encode_correlations(summary)}
     </data>
 
     Generate JSON:
@@ -314,18 +357,233 @@ def generate_global_habit_insight(user):
     }}
     """
 
+    return None, {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "options": {"temperature": 0.5},
+        "cache": (GlobalInsight, 'user', user, cache_key),
+        "fallback": partial(local_global_insight, names, matrix),
+        "label": "Global AI Error",
+        "error": "System analysis failed."
+    }
+
+def generate_global_habit_insight(user, client=None, refresh=False):
+    """
+    Analyzes the INTERACTION between all active habits to find correlations.
+    Served from GlobalInsight while the matrix is unchanged, unless `refresh`.
+    """
+    result, request = prepare_global_habit_insight(user, refresh)
+    return result if request is None else complete_insight(request, client)
+
+def stream_global_habit_insight(user, client=None, refresh=False):
+    result, request = prepare_global_habit_insight(user, refresh)
+    return stream_insight(result, request, client)
+
+
+# ==========================================
+# COMPLETION (Plain JSON or Server-Sent Events)
+# ==========================================
+
+INSIGHT_MODEL = "llama-3.3-70b-versatile"
+
+def insight_deadline():
+    """Interactive insights wait at most LLM_INSIGHT_BUDGET seconds for the upstream (0 = no limit)."""
+    budget = settings.LLM_INSIGHT_BUDGET
+    return time.monotonic() + budget if budget > 0 else None
+
+def local_insight(request):
+    """The rule-based stand-in (see fallback.py) for a slow or failed call; never cached."""
+    try:
+        return {**request["fallback"](), "source": "local"}
+    except Exception as e:
+        print(f"{request['label']} (local fallback): {e}")
+        return {"error": request["error"]}
+
+def complete_insight(request, client=None):
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5,
-            response_format={"type": "json_object"}
+        completion = create_completion(
+            client,
+            deadline=insight_deadline(),
+            model=INSIGHT_MODEL,
+            messages=request["messages"],
+            response_format={"type": "json_object"},
+            **request["options"]
         )
-        return json.loads(completion.choices[0].message.content)
+        result = json.loads(completion.choices[0].message.content)
+        store_insight(*request["cache"], result)
+        return result
 
     except Exception as e:
-        print(f"Global AI Error: {e}")
-        return {"error": "System analysis failed."}
\ No newline at end of file
+        print(f"{request['label']}: {e}")
+        return local_insight(request)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def parse_streamed_json(text):
+    """JSON mode isn't available with streaming, so tolerate text around the object."""
+    return json.loads(text[text.index('{'):text.rindex('}') + 1])
+
+STREAM_END = object()
+
+def read_until(stream, deadline):
+    """
+    Yields the chunks of `stream` until `deadline` (time.monotonic()), then
+    raises TimeoutError. The client timeout bounds each read and restarts
+    with every chunk, so the reads run on a helper thread and the wait for
+    the next chunk is what's bounded here. An abandoned reader ends at its
+    own read timeout, at most the budget left when the stream opened.
+    """
+    chunks = queue.Queue()
+
+    def pump():
+        try:
+            for chunk in stream:
+                chunks.put(chunk)
+            chunks.put(STREAM_END)
+        except Exception as e:
+            chunks.put(e)
+
+    threading.Thread(target=pump, name='insight-stream', daemon=True).start()
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise TimeoutError("Insight budget exceeded mid-stream")
+            if item is STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        getattr(stream, 'close', lambda: None)()
+
+def stream_insight(result, request, client=None):
+    """
+    Yields SSE events: `token` (raw completion text, as it arrives), then a
+    closing `result` (the parsed JSON, as the plain endpoint returns it) or
+    `error`. Cached insights and early errors are a single closing event.
+    If the upstream fails or runs past the budget, the closing `result` is
+    the local fallback (source: "local"), replacing any partial tokens.
+    """
+    if request is None:
+        yield sse_event('error' if "error" in result else 'result', result)
+        return
+
+    parts = []
+    deadline = insight_deadline()
+    try:
+        stream = create_completion(
+            client,
+            deadline=deadline,
+            model=INSIGHT_MODEL,
+            messages=request["messages"],
+            stream=True,
+            **request["options"]
+        )
+        for chunk in stream if deadline is None else read_until(stream, deadline):
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                parts.append(token)
+                yield sse_event('token', token)
+
+        result = parse_streamed_json(''.join(parts))
+        store_insight(*request["cache"], result)
+    except Exception as e:
+        print(f"{request['label']}: {e}")
+        result = local_insight(request)
+    yield sse_event('error' if "error" in result else 'result', result)
+
+
+# ==========================================
+# 4. INSIGHT JOBS (Goal insights off the request path)
+# ==========================================
+
+INSIGHT_JOB_MAX_ATTEMPTS = 5
+INSIGHT_JOB_RETRY_DELAY = timedelta(seconds=30)  # Doubles per attempt...
+INSIGHT_JOB_MAX_RETRY_DELAY = timedelta(hours=1)  # ...up to this
+INSIGHT_JOB_LEASE = timedelta(minutes=10)  # RUNNING longer than this = dead worker
+
+def enqueue_goal_insight(goal):
+    """
+    Queues insight generation for a completed goal (idempotent: one job
+    per goal). A DONE job whose insight has since been deleted is re-queued.
+    """
+    job, created = InsightJob.objects.get_or_create(goal=goal)
+    if not created and job.status == 'DONE' and not GoalInsight.objects.filter(goal=goal).exists():
+        job.status, job.attempts, job.run_after = 'PENDING', 0, timezone.now()
+        job.save(update_fields=['status', 'attempts', 'run_after', 'updated_at'])
+    return job
+
+def claim_insight_jobs(limit, now=None):
+    """
+    Atomically moves up to `limit` due jobs to RUNNING. SKIP LOCKED lets
+    several workers poll the same table without handing out a job twice.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            InsightJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status='PENDING', run_after__lte=now) |
+                Q(status='RUNNING', locked_at__lt=now - INSIGHT_JOB_LEASE)
+            ).order_by('run_after')[:limit]
+        )
+        InsightJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            status='RUNNING', locked_at=now, attempts=F('attempts') + 1, updated_at=now
+        )
+    for job in jobs:
+        job.status, job.locked_at, job.attempts = 'RUNNING', now, job.attempts + 1
+    return jobs
+
+def claim_goal_insight_job(goal_id, now=None):
+    """Claims one goal's job if it's due; the conditional UPDATE makes it single-flight across processes."""
+    now = now or timezone.now()
+    claimed = InsightJob.objects.filter(
+        goal_id=goal_id, status='PENDING', run_after__lte=now
+    ).update(status='RUNNING', locked_at=now, attempts=F('attempts') + 1, updated_at=now)
+    return InsightJob.objects.get(goal_id=goal_id) if claimed else None
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, so failed jobs don't retry in lockstep."""
+    delay = min(INSIGHT_JOB_MAX_RETRY_DELAY, INSIGHT_JOB_RETRY_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1)
+
+def run_insight_job(job, client=None):
+    goal = Goal.objects.select_related('user').get(id=job.goal_id)
+    try:
+        result = generate_goal_insight(goal.id, goal.user, client=client)
+    except Exception as e:  # Don't leave the job RUNNING until its lease expires
+        result = {"error": str(e)}
+
+    job.locked_at = None
+    if "error" not in result:
+        job.status, job.last_error = 'DONE', ''
+    elif not goal.is_completed or job.attempts >= INSIGHT_JOB_MAX_ATTEMPTS:
+        job.status, job.last_error = 'FAILED', result["error"]
+    else:
+        job.status, job.last_error = 'PENDING', result["error"]
+        job.run_after = timezone.now() + retry_delay(job.attempts)
+    job.save(update_fields=['status', 'last_error', 'locked_at', 'run_after', 'updated_at'])
+    return job
+
+def run_insight_jobs(limit=5, client=None):
+    """Claims and processes one batch of due jobs; returns how many ran."""
+    jobs = claim_insight_jobs(limit)
+    for job in jobs:
+        run_insight_job(job, client=client)
+    return len(jobs)
+
+def process_goal_insight(goal_id, client=None):
+    """Runs one goal's job now (in-process path); no-op if another worker has it."""
+    job = claim_goal_insight_job(goal_id)
+    if job is not None:
+        run_insight_job(job, client=client)
+    return job
+
+def requeue_failed_insight_jobs():
+    return InsightJob.objects.filter(status='FAILED').update(
+        status='PENDING', attempts=0, run_after=timezone.now(), last_error=''
+    )
@@ -1,20 +1,25 @@
+from django.conf import settings
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from tracker.models import Goal
-from .services import generate_goal_insight
-import threading
+from .executor import get_insight_executor
+from .services import enqueue_goal_insight, process_goal_insight
 
 @receiver(post_save, sender=Goal)
 def trigger_goal_insight(sender, instance, created, **kwargs):
     """
     Trigger AI analysis when a goal is marked as completed.
-    Runs in a separate thread to avoid blocking the HTTP response.
+    The job row makes it durable; the bounded pool starts it right away
+    (one task per goal, so repeated saves don't fan out duplicate calls).
     """
     if instance.is_completed and not created:
         # Check if insight already exists to avoid redundant calls
         if not hasattr(instance, 'ai_insight'):
-            thread = threading.Thread(
-                target=generate_goal_insight, 
-                args=(instance.id, instance.user)
-            )
-            thread.start()
\ No newline at end of file
+            enqueue_goal_insight(instance)
+            if settings.INSIGHT_EXECUTOR_ENABLED:
+                goal_id = instance.id
+                # After commit, so the pool thread sees the completed goal
+                transaction.on_commit(lambda: get_insight_executor().submit(
+                    goal_id, process_goal_insight, goal_id
+                ))
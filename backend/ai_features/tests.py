@@ -1,3 +1,663 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import httpx
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from tracker.models import DailyLog, Goal, GoalProgress, Habit, HabitLog
+from .context import collapse_runs, encode_habit_logs
+from .executor import BoundedExecutor
+from .fake_llm import FakeLLMServer
+from .fallback import local_global_insight, local_habit_insight, longest_gap
+from .llm import CircuitBreaker, RateLimiter, get_client, reset_client, set_transport
+from .management.commands.benchmark_insights import percentile
+from .models import GlobalInsight, GoalInsight, HabitInsight, InsightJob
+from .services import (
+    INSIGHT_JOB_LEASE,
+    INSIGHT_JOB_MAX_ATTEMPTS,
+    build_context_data,
+    build_habit_context,
+    claim_goal_insight_job,
+    generate_global_habit_insight,
+    generate_habit_insight,
+    process_goal_insight,
+    run_insight_jobs,
+    stream_habit_insight
+)
+
+GOAL_INSIGHT = {
+    "overview": "Steady progress.",
+    "patterns": ["Mornings worked best"],
+    "optional_reflection": None
+}
+
+
+class FakeLLM:
+    """Stands in for the Groq client: records calls, returns canned JSON or raises."""
+
+    def __init__(self, content=GOAL_INSIGHT, error=None):
+        self.content, self.error, self.calls = content, error, []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+        text = json.dumps(self.content)
+        if kwargs.get('stream'):
+            # A few characters per chunk, like a token stream
+            return iter(
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 8]))])
+                for i in range(0, len(text), 8)
+            )
+        message = SimpleNamespace(content=text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def parse_sse(response):
+    """[(event, data)] from a streamed text/event-stream response."""
+    body = b''.join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class InsightJobTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='goals', password='pw')
+        self.client.force_authenticate(self.user)
+        # Created completed: the post_save "completion" trigger doesn't fire
+        self.goal = Goal.objects.create(user=self.user, name='Marathon', is_completed=True)
+
+    def test_retrieve_queues_instead_of_calling_llm(self):
+        with mock.patch('ai_features.services.create_completion') as create:
+            response = self.client.get(f'/api/v1/goals/{self.goal.id}/')
+            self.client.get(f'/api/v1/goals/{self.goal.id}/')
+        create.assert_not_called()
+        self.assertEqual(response.data['ai_insight'], {"status": "pending"})
+        self.assertEqual(InsightJob.objects.filter(goal=self.goal).count(), 1)
+
+    def test_worker_generates_and_retrieve_returns_insight(self):
+        self.client.get(f'/api/v1/goals/{self.goal.id}/')
+        llm = FakeLLM()
+        self.assertEqual(run_insight_jobs(client=llm), 1)
+        self.assertEqual(len(llm.calls), 1)
+        self.assertEqual(InsightJob.objects.get(goal=self.goal).status, 'DONE')
+
+        response = self.client.get(f'/api/v1/goals/{self.goal.id}/')
+        self.assertEqual(response.data['ai_insight']['overview'], "Steady progress.")
+        self.assertEqual(run_insight_jobs(client=llm), 0)
+
+    def test_failures_back_off_then_fail(self):
+        InsightJob.objects.create(goal=self.goal)
+        llm = FakeLLM(error=TimeoutError("upstream timeout"))
+
+        run_insight_jobs(client=llm)
+        job = InsightJob.objects.get(goal=self.goal)
+        self.assertEqual((job.status, job.attempts), ('PENDING', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(run_insight_jobs(client=llm), 0)  # Not due yet
+
+        for _ in range(INSIGHT_JOB_MAX_ATTEMPTS - 1):
+            InsightJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            run_insight_jobs(client=llm)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', INSIGHT_JOB_MAX_ATTEMPTS))
+        self.assertFalse(GoalInsight.objects.exists())
+
+        response = self.client.get(f'/api/v1/goals/{self.goal.id}/')
+        self.assertEqual(response.data['ai_insight'], {"status": "failed"})
+
+    def test_stale_running_job_is_reclaimed(self):
+        InsightJob.objects.create(
+            goal=self.goal, status='RUNNING', attempts=1,
+            locked_at=timezone.now() - INSIGHT_JOB_LEASE - timedelta(minutes=1)
+        )
+        self.assertEqual(run_insight_jobs(client=FakeLLM()), 1)
+        self.assertTrue(GoalInsight.objects.filter(goal=self.goal).exists())
+
+    def test_worker_command(self):
+        InsightJob.objects.create(goal=self.goal, status='FAILED', attempts=INSIGHT_JOB_MAX_ATTEMPTS)
+        out = StringIO()
+        with mock.patch('ai_features.llm.get_client', return_value=FakeLLM()):
+            call_command('run_insight_worker', '--once', '--retry-failed', stdout=out)
+        self.assertIn("Processed 1 insight jobs.", out.getvalue())
+        self.assertEqual(InsightJob.objects.get(goal=self.goal).status, 'DONE')
+
+
+class BoundedExecutorTests(APITestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def blocker(self):
+        self.started.set()
+        self.release.wait(5)
+
+    def test_single_flight_per_key(self):
+        executor = BoundedExecutor(max_workers=2, max_queue=10)
+        self.assertTrue(executor.submit('goal-1', self.blocker))
+        self.assertFalse(executor.submit('goal-1', self.blocker))
+        self.assertTrue(executor.submit('goal-2', lambda: None))
+        self.release.set()
+        executor.shutdown()
+
+        metrics = executor.metrics()
+        self.assertEqual((metrics['completed'], metrics['deduplicated']), (2, 1))
+        # Key is free again once its task finished
+        self.assertEqual(metrics['running'] + metrics['queued'], 0)
+
+    def test_queue_depth_limit_and_failures(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        executor.submit('a', self.blocker)
+        self.started.wait(5)
+        self.assertTrue(executor.submit('b', lambda: 1 / 0))  # Waits for the only worker
+        self.assertFalse(executor.submit('c', lambda: None))  # Backlog full
+        self.assertEqual(executor.metrics()['queued'], 1)
+
+        self.release.set()
+        executor.shutdown(cancel_pending=False)
+        metrics = executor.metrics()
+        self.assertEqual((metrics['completed'], metrics['failed'], metrics['dropped']), (1, 1, 1))
+
+    def test_shutdown_cancels_backlog_and_rejects_work(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=5)
+        executor.submit('a', self.blocker)
+        self.started.wait(5)
+        executor.submit('b', lambda: None)
+
+        threading.Timer(0.05, self.release.set).start()
+        executor.shutdown()  # Waits for 'a', cancels 'b'
+        self.assertFalse(executor.submit('c', lambda: None))
+        metrics = executor.metrics()
+        self.assertEqual((metrics['completed'], metrics['dropped']), (1, 2))
+
+
+class GoalCompletionTriggerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='finisher', password='pw')
+        self.goal = Goal.objects.create(user=self.user, name='Book')
+
+    def test_completion_queues_job_and_submits_once_per_goal(self):
+        with mock.patch('ai_features.signals.get_insight_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.goal.is_completed = True
+                self.goal.save()
+                self.goal.save()
+
+        self.assertEqual(InsightJob.objects.filter(goal=self.goal).count(), 1)
+        submit = get_executor.return_value.submit
+        self.assertEqual(submit.call_count, 2)  # The executor collapses these by goal id
+        self.assertEqual({call.args[0] for call in submit.call_args_list}, {self.goal.id})
+
+    def test_in_process_run_is_single_flight_with_worker(self):
+        self.goal.is_completed = True
+        with self.settings(INSIGHT_EXECUTOR_ENABLED=False):
+            self.goal.save()
+
+        self.assertIsNotNone(claim_goal_insight_job(self.goal.id))  # e.g. a worker got it first
+        self.assertIsNone(process_goal_insight(self.goal.id, client=FakeLLM()))
+        self.assertFalse(GoalInsight.objects.exists())
+
+
+def completion_body(content):
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test",
+        "choices": [{
+            "index": 0, "finish_reason": "stop",
+            "message": {"role": "assistant", "content": json.dumps(content)}
+        }]
+    }
+
+
+@override_settings(GROQ_API_KEY='test-key', LLM_RETRY_BACKOFF=0, LLM_MAX_RETRIES=2, LLM_BREAKER_THRESHOLD=2)
+class SharedClientTests(APITestCase):
+    """The real Groq SDK, routed through an in-memory httpx transport."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='llm', password='pw')
+        self.habit = Habit.objects.create(user=self.user, name='Stretch')
+        self.requests = []
+        self.responses = []
+        set_transport(httpx.MockTransport(self.handle))
+
+    def tearDown(self):
+        set_transport(None)
+
+    def handle(self, request):
+        self.requests.append(request)
+        status = self.responses.pop(0) if self.responses else 200
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": "unavailable"}})
+        return httpx.Response(200, json=completion_body({"overview": "ok", "patterns": []}))
+
+    def test_client_is_shared(self):
+        self.assertIs(get_client(), get_client())
+        self.assertEqual(get_client().max_retries, 0)  # Retries are ours, with jitter
+
+    def test_retries_transient_errors(self):
+        self.responses = [503, 503]
+        result = generate_habit_insight(self.habit.id, self.user)
+        self.assertEqual(result["overview"], "ok")
+        self.assertEqual(len(self.requests), 3)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        self.responses = [503] * 6
+        for _ in range(2):
+            self.assertEqual(generate_habit_insight(self.habit.id, self.user)["source"], "local")
+        sent = len(self.requests)
+
+        # Open: fails fast without touching the upstream
+        self.assertEqual(generate_habit_insight(self.habit.id, self.user)["source"], "local")
+        self.assertEqual(len(self.requests), sent)
+
+    def test_streams_through_the_sdk(self):
+        text = json.dumps({"overview": "ok", "patterns": []})
+        chunks = [
+            {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "test",
+             "choices": [{"index": 0, "delta": {"content": text[i:i + 5]}, "finish_reason": None}]}
+            for i in range(0, len(text), 5)
+        ]
+        body = ''.join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+        set_transport(httpx.MockTransport(
+            lambda request: httpx.Response(200, text=body, headers={'Content-Type': 'text/event-stream'})
+        ))
+        events = list(stream_habit_insight(self.habit.id, self.user))
+        self.assertEqual(len(events), len(chunks) + 1)
+        self.assertIn('"overview": "ok"', events[-1])
+
+    def test_client_errors_are_not_retried(self):
+        self.responses = [400]
+        self.assertEqual(generate_habit_insight(self.habit.id, self.user)["source"], "local")
+        self.assertEqual(len(self.requests), 1)
+
+
+class CircuitBreakerTests(APITestCase):
+    def test_half_open_allows_one_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'OPEN')
+        self.assertFalse(breaker.allow())
+
+        now[0] = 10
+        self.assertTrue(breaker.allow())   # Trial call
+        self.assertFalse(breaker.allow())  # Others keep failing fast meanwhile
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'OPEN')
+
+        now[0] = 20
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'CLOSED')
+
+
+class InsightCacheTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cache', password='pw')
+        self.client.force_authenticate(self.user)
+        self.habit = Habit.objects.create(user=self.user, name='Journal')
+        HabitLog.objects.create(habit=self.habit, date=timezone.now().date(), status='DONE')
+        self.llm = FakeLLM(content={"overview": "Solid.", "patterns": []})
+        patcher = mock.patch('ai_features.llm.get_client', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def analyze(self, **params):
+        response = self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_unchanged_context_is_served_from_table(self):
+        self.assertNotIn("is_cached", self.analyze())
+        self.assertTrue(self.analyze()["is_cached"])
+        self.assertEqual(len(self.llm.calls), 1)
+
+        # refresh=1 bypasses it
+        self.assertNotIn("is_cached", self.analyze(refresh=1))
+        self.assertEqual(len(self.llm.calls), 2)
+
+    def test_new_log_changes_the_key_and_evicts(self):
+        self.analyze()
+        HabitLog.objects.create(habit=self.habit, date=timezone.now().date() - timedelta(days=1), status='MISSED')
+        self.assertNotIn("is_cached", self.analyze())
+        self.assertEqual(len(self.llm.calls), 2)
+        self.assertEqual(HabitInsight.objects.filter(habit=self.habit).count(), 1)
+
+    def test_expired_entries_are_regenerated(self):
+        self.analyze()
+        HabitInsight.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.analyze()
+        self.assertEqual(len(self.llm.calls), 2)
+
+    def test_failures_are_not_cached(self):
+        self.llm.error = ValueError("bad upstream payload")
+        response = self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["source"], "local")
+        self.assertFalse(HabitInsight.objects.exists())
+
+    def test_global_insight_cache(self):
+        url = '/api/v1/habits/global_insight/'
+        self.client.get(url)
+        self.assertTrue(self.client.get(url).data["is_cached"])
+        self.assertEqual(len(self.llm.calls), 1)
+        self.assertEqual(GlobalInsight.objects.filter(user=self.user).count(), 1)
+
+
+class StreamingInsightTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stream', password='pw')
+        self.client.force_authenticate(self.user)
+        self.habit = Habit.objects.create(user=self.user, name='Meditate')
+        HabitLog.objects.create(habit=self.habit, date=timezone.now().date(), status='DONE')
+        self.llm = FakeLLM(content={"overview": "Calm and steady.", "patterns": ["Mornings"]})
+        patcher = mock.patch('ai_features.llm.get_client', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tokens_then_parsed_result(self):
+        response = self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/', {'stream': 1})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = parse_sse(response)
+
+        tokens = [data for event, data in events if event == 'token']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(events[-1], ('result', {"overview": "Calm and steady.", "patterns": ["Mornings"]}))
+        self.assertEqual(json.loads(''.join(tokens))["overview"], "Calm and steady.")
+        self.assertTrue(self.llm.calls[0]['stream'])
+
+        # Stored like a plain call: the next request is a single cached event
+        events = parse_sse(self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/', {'stream': 1}))
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0][1]["is_cached"])
+
+    def test_global_insight_stream(self):
+        events = parse_sse(self.client.get('/api/v1/habits/global_insight/', {'stream': 1}))
+        self.assertEqual(events[-1][0], 'result')
+
+    def test_upstream_failure_is_an_error_event(self):
+        self.llm.error = ConnectionResetError("reset")
+        events = parse_sse(self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/', {'stream': 1}))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][0], 'result')
+        self.assertEqual(events[0][1]["source"], "local")
+
+
+class PromptContextTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='prompt', password='pw')
+        self.habit = Habit.objects.create(user=self.user, name='Read')
+        self.start = timezone.now().date() - timedelta(days=59)
+
+    def log(self, offset, status='DONE', note=None):
+        return {"date": self.start + timedelta(days=offset), "status": status, "value": None, "note": note}
+
+    def test_runs_collapse_only_across_consecutive_identical_days(self):
+        rows = [(self.start + timedelta(days=d), 'DONE') for d in (0, 1, 2, 4)]
+        runs = collapse_runs(rows + [(self.start + timedelta(days=5), 'MISSED')])
+        self.assertEqual([(first, last) for first, last, _ in runs], [
+            (self.start, self.start + timedelta(days=2)),
+            (self.start + timedelta(days=4),) * 2,
+            (self.start + timedelta(days=5),) * 2,
+        ])
+
+    def test_habit_table(self):
+        table = encode_habit_logs([self.log(0), self.log(1), self.log(2, 'MISSED', 'Sick | tired')], budget=1000)
+        lines = table.splitlines()
+        self.assertEqual(lines[0], 'date|status|value|note')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith('|DONE||'))
+        self.assertIn('..', lines[1])
+        self.assertTrue(lines[2].endswith('|MISSED||Sick / tired'))  # Separator can't leak into cells
+
+    def test_budget_drops_oldest_rows(self):
+        logs = [self.log(d, 'DONE' if d % 2 else 'MISSED') for d in range(40)]
+        full = encode_habit_logs(logs, budget=10_000).splitlines()
+        cut = encode_habit_logs(logs, budget=100).splitlines()
+        self.assertLessEqual(len('\n'.join(cut)), 100 * 4 + 30)  # + the marker line
+        self.assertRegex(cut[1], r'^\(\d+ older rows omitted\)$')
+        self.assertEqual(cut[-1], full[-1])
+
+    def test_habit_context_is_one_query_for_the_last_45_logs(self):
+        HabitLog.objects.bulk_create([
+            HabitLog(habit=self.habit, date=self.start + timedelta(days=d), status='DONE') for d in range(60)
+        ])
+        with CaptureQueriesContext(connection) as ctx:
+            logs = build_habit_context(self.habit)["logs"]
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(len(logs), 45)
+        self.assertEqual(logs[0]["date"], self.start + timedelta(days=15))
+        self.assertEqual(logs[-1]["date"], self.start + timedelta(days=59))
+
+    def test_goal_context_keeps_first_5_and_last_25(self):
+        goal = Goal.objects.create(user=self.user, name='Novel')
+        GoalProgress.objects.bulk_create([
+            GoalProgress(goal=goal, date=self.start + timedelta(days=d)) for d in range(40)
+        ])
+        dates = [log["date"] for log in build_context_data(goal)["momentum_logs"]]
+        self.assertEqual(len(dates), 30)
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(dates[5], self.start + timedelta(days=15))
+
+    def test_prompt_carries_the_table_not_json(self):
+        HabitLog.objects.create(habit=self.habit, date=self.start, status='DONE')
+        llm = FakeLLM(content={"overview": "Ok.", "patterns": []})
+        generate_habit_insight(self.habit.id, self.user, client=llm)
+        prompt = llm.calls[0]['messages'][1]['content']
+        self.assertIn('date|status|value|note', prompt)
+        self.assertNotIn('"status":', prompt)
+
+    def test_global_prompt_carries_precomputed_correlations(self):
+        other = Habit.objects.create(user=self.user, name='Write')
+        today = timezone.now().date()
+        for d in range(10):
+            day = today - timedelta(days=d)
+            HabitLog.objects.create(habit=self.habit, date=day, status='DONE' if d % 2 else 'MISSED')
+            HabitLog.objects.create(habit=other, date=day, status='DONE' if d % 2 else 'MISSED')
+            DailyLog.objects.create(user=self.user, date=day, mood_score=4 if d % 2 else 2)
+        llm = FakeLLM(content={"system_health": "Ok.", "correlations": [], "strategy": "Keep going."})
+        generate_global_habit_insight(self.user, client=llm)
+        prompt = llm.calls[0]['messages'][1]['content']
+        self.assertIn('Read|Write|', prompt)
+        self.assertIn('Read|mood_score|1.0|10', prompt)
+        self.assertNotIn(f"{today:%Y-%m-%d}", prompt)  # No raw daily matrix
+
+    def test_measure_command(self):
+        out = StringIO()
+        call_command('measure_prompt_size', '--days', '30', stdout=out)
+        self.assertIn('global', out.getvalue())
+        self.assertFalse(Habit.objects.exclude(user=self.user).exists())  # Rolled back
+
+
+class BackfillInsightsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='backfill', password='pw')
+        self.goals = [
+            Goal.objects.create(user=self.user, name=f'Goal {i}', is_completed=True) for i in range(5)
+        ]
+        Goal.objects.create(user=self.user, name='Ongoing')
+        GoalInsight.objects.create(goal=self.goals[0], overview='Already there.')
+        self.llm = FakeLLM()
+        patcher = mock.patch('ai_features.llm.get_client', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command('backfill_insights', '--rate', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_fills_only_completed_goals_without_insights(self):
+        InsightJob.objects.create(goal=self.goals[1])
+        output = self.backfill('--batch-size', '3', '--concurrency', '2')
+
+        self.assertIn('Done: 4 insights saved, 0 failed', output)
+        self.assertEqual(len(self.llm.calls), 4)
+        self.assertEqual(GoalInsight.objects.count(), 5)
+        self.assertEqual(GoalInsight.objects.get(goal=self.goals[1]).overview, "Steady progress.")
+        self.assertEqual(InsightJob.objects.get(goal=self.goals[1]).status, 'DONE')
+
+    def test_resumes_where_it_stopped(self):
+        self.backfill('--limit', '2')
+        self.assertEqual(GoalInsight.objects.count(), 3)
+
+        self.llm.error = ConnectionResetError("reset")
+        self.assertIn('0 saved, 2 failed', self.backfill())
+        self.llm.error = None
+        self.assertIn('Done: 2 insights saved', self.backfill())
+        self.assertEqual(GoalInsight.objects.count(), 5)
+        self.assertIn('Done: 0 insights saved', self.backfill())
+
+    def test_rate_limiter_spaces_calls(self):
+        now, sleeps = [0.0], []
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleeps.append)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual(sleeps, [0.25, 0.5])
+
+
+@override_settings(GROQ_API_KEY='test-key', LLM_RETRY_BACKOFF=0, LLM_MAX_RETRIES=1, LLM_BREAKER_THRESHOLD=10)
+class FakeLLMServerTests(APITestCase):
+    """The real SDK over HTTP against the local fake server."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fake-llm', password='pw')
+        self.habit = Habit.objects.create(user=self.user, name='Meditate')
+        HabitLog.objects.create(habit=self.habit, date=timezone.now().date(), status='DONE')
+
+    def serve(self, **options):
+        server = FakeLLMServer(**options).start()
+        self.addCleanup(server.stop)
+        settings_override = override_settings(GROQ_BASE_URL=server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_client()
+        self.addCleanup(reset_client)
+        return server
+
+    def test_canned_completion(self):
+        server = self.serve(content={"overview": "Canned.", "patterns": ["One"]}, latency=0.01)
+        result = generate_habit_insight(self.habit.id, self.user)
+        self.assertEqual(result, {"overview": "Canned.", "patterns": ["One"]})
+        self.assertEqual(server.stats()['requests'], 1)
+
+    def test_streaming(self):
+        server = self.serve(content={"overview": "Streamed.", "patterns": []}, chunk_size=4)
+        events = list(stream_habit_insight(self.habit.id, self.user))
+        self.assertGreater(len(events), 2)
+        self.assertIn('"overview": "Streamed."', events[-1])
+        self.assertEqual(server.stats()['streams'], 1)
+
+    def test_injected_errors_are_retried_then_reported(self):
+        server = self.serve(error_rate=1, error_status=503)
+        self.assertEqual(generate_habit_insight(self.habit.id, self.user)["source"], "local")
+        self.assertEqual(server.stats()['requests'], 2)  # First try + LLM_MAX_RETRIES
+        self.assertEqual(server.stats()['errors'], 2)
+
+    def test_percentile(self):
+        ordered = list(range(1, 101))
+        self.assertEqual([percentile(ordered, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(percentile([7], 99), 7)
+
+
+class LocalFallbackTests(APITestCase):
+    def setUp(self):
+        self.monday = timezone.now().date() - timedelta(days=timezone.now().date().weekday() + 28)
+
+    def day(self, offset):
+        return self.monday + timedelta(days=offset)
+
+    def test_longest_gap(self):
+        gap = longest_gap([self.day(2), self.day(3), self.day(9)], self.day(0), self.day(10))
+        self.assertEqual(gap, (5, self.day(4), self.day(8)))
+        self.assertEqual(longest_gap([], self.day(0), self.day(2))[0], 3)
+
+    def test_habit_insight_from_weekday_rates_and_gaps(self):
+        # 4 weeks: weekdays DONE, weekends MISSED
+        logs = [
+            {"date": self.day(d), "status": 'DONE' if d % 7 < 5 else 'MISSED', "value": None, "note": ""}
+            for d in range(28)
+        ]
+        insight = local_habit_insight({"habit_name": "Read", "frequency": "DAILY", "logs": logs})
+        self.assertIn("71% of 28 logs", insight["overview"])
+        self.assertIn("Strongest day: Mon (100%), weakest: Sat (0%).", insight["patterns"])
+        self.assertIn("Longest stretch without a success: 2 days", insight["patterns"][1])
+        self.assertTrue(insight["recommendation"].startswith("Plan Sats"))
+
+    def test_declining_trend(self):
+        logs = [
+            {"date": self.day(d), "status": 'DONE' if d < 14 else 'MISSED', "value": None, "note": ""}
+            for d in range(28)
+        ]
+        insight = local_habit_insight({"habit_name": "Run", "frequency": "DAILY", "logs": logs})
+        self.assertIn("declining", insight["overview"])
+
+    def test_global_insight_finds_the_keystone(self):
+        matrix = [
+            (self.day(d), ['DONE', 'DONE'] if d % 3 else ['MISSED', 'MISSED'])
+            for d in range(21)
+        ]
+        insight = local_global_insight(['Gym', 'Read'], matrix)
+        self.assertIn("When Gym succeeds, Read succeeds 100% of the time (vs 0% otherwise).", insight["correlations"])
+        self.assertIn("keystone", insight["strategy"])
+
+
+@override_settings(GROQ_API_KEY='test-key', LLM_RETRY_BACKOFF=0, LLM_INSIGHT_BUDGET=0.3)
+class LatencyBudgetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='budget', password='pw')
+        self.client.force_authenticate(self.user)
+        self.habit = Habit.objects.create(user=self.user, name='Walk')
+        HabitLog.objects.create(habit=self.habit, date=timezone.now().date(), status='DONE')
+        self.server = FakeLLMServer(latency=2).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(GROQ_BASE_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_client()
+        self.addCleanup(reset_client)
+
+    def test_slow_upstream_gets_local_insight_within_budget(self):
+        for url in (f'/api/v1/habits/{self.habit.id}/analyze/', '/api/v1/habits/global_insight/'):
+            began = time.monotonic()
+            response = self.client.get(url)
+            self.assertLess(time.monotonic() - began, 1.5)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["source"], "local")
+        self.assertFalse(HabitInsight.objects.exists())
+        self.assertFalse(GlobalInsight.objects.exists())
+
+    def test_streaming_falls_back_too(self):
+        events = parse_sse(self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/', {'stream': 1}))
+        self.assertEqual(events[-1][0], 'result')
+        self.assertEqual(events[-1][1]["source"], "local")
+
+    @override_settings(LLM_INSIGHT_BUDGET=1.0)
+    def test_stalled_stream_is_cut_at_the_budget(self):
+        # A chunk lands just before the deadline, then the next one takes a
+        # whole per-read timeout: the budget must hold over the whole stream
+        server = FakeLLMServer(chunk_delay=0.6).start()
+        self.addCleanup(server.stop)
+        with override_settings(GROQ_BASE_URL=server.url):
+            reset_client()
+            began = time.monotonic()
+            events = parse_sse(self.client.get(f'/api/v1/habits/{self.habit.id}/analyze/', {'stream': 1}))
+            elapsed = time.monotonic() - began
+        self.assertEqual(events[-1][1]["source"], "local")
+        self.assertLess(elapsed, 1.3)
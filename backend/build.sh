@@ -9,4 +9,10 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # 3. Apply database migrations (Updates your Neon DB)
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# 4. Backfill derived counters for habits created before they existed
+python manage.py rebuild_habit_stats --missing
+
+# 5. Drop sync tombstones past SYNC_TOMBSTONE_RETENTION_DAYS (also safe from cron)
+python manage.py prune_tombstones
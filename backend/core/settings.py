@@ -137,6 +137,7 @@ REST_FRAMEWORK = {
 
 # ... CORS CONFIG (For Dev) ...
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
+CORS_EXPOSE_HEADERS = ['ETag']
 
 # backend/core/settings.py
 
@@ -174,4 +175,46 @@ SIMPLE_JWT = {
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
\ No newline at end of file
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL")  # None = api.groq.com; set to a local fake for tests/benchmarks
+
+# Shared LLM client (ai_features/llm.py): timeouts in seconds, retries on
+# transient errors, and a breaker that fails fast after repeated failures.
+LLM_CONNECT_TIMEOUT = float(os.environ.get('LLM_CONNECT_TIMEOUT', 5))
+LLM_READ_TIMEOUT = float(os.environ.get('LLM_READ_TIMEOUT', 30))
+LLM_MAX_CONNECTIONS = int(os.environ.get('LLM_MAX_CONNECTIONS', 20))
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+LLM_RETRY_BACKOFF = float(os.environ.get('LLM_RETRY_BACKOFF', 0.5))
+LLM_BREAKER_THRESHOLD = int(os.environ.get('LLM_BREAKER_THRESHOLD', 5))
+LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30))
+# Upper bound (rough tokens) for each variable-length table in an insight
+# prompt; the oldest rows are dropped first (ai_features/context.py).
+LLM_CONTEXT_TOKEN_BUDGET = int(os.environ.get('LLM_CONTEXT_TOKEN_BUDGET', 1500))
+# Seconds the analyze/global_insight endpoints wait for the LLM before
+# answering with a local rule-based insight (source: "local"); 0 = no limit.
+LLM_INSIGHT_BUDGET = float(os.environ.get('LLM_INSIGHT_BUDGET', 8))
+
+# Set to False once `manage.py sweep_windows` runs from cron, so the
+# dashboard stops evaluating expired WINDOWED windows inline.
+TRACKER_INLINE_WINDOW_EVALUATION = os.environ.get('TRACKER_INLINE_WINDOW_EVALUATION', 'True') == 'True'
+
+# Dashboard snapshots live in the default cache (local memory unless
+# CACHES is configured), keyed by user, date and data version.
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 60 * 10))
+# Packed per-(habit, year) heatmaps, same versioned keys as the dashboard:
+# a log write orphans them, so the timeout only bounds memory.
+HEATMAP_CACHE_TIMEOUT = int(os.environ.get('HEATMAP_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# sync/ keeps deletion tombstones this long; a client whose cursor is older
+# gets a full data set flagged `full_resync` (`manage.py prune_tombstones`).
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+# Goal insights are queued as InsightJob rows (see `run_insight_worker`);
+# a small per-process pool also starts them right after goal completion.
+INSIGHT_EXECUTOR_ENABLED = os.environ.get('INSIGHT_EXECUTOR_ENABLED', 'True') == 'True'
+INSIGHT_EXECUTOR_WORKERS = int(os.environ.get('INSIGHT_EXECUTOR_WORKERS', 2))
+INSIGHT_EXECUTOR_MAX_QUEUE = int(os.environ.get('INSIGHT_EXECUTOR_MAX_QUEUE', 50))
+
+# Habit/global AI insights are reused while their input context is unchanged,
+# for at most this many seconds (?refresh=1 bypasses the cache).
+INSIGHT_CACHE_TTL = int(os.environ.get('INSIGHT_CACHE_TTL', 60 * 60 * 24 * 7))
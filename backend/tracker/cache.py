@@ -0,0 +1,112 @@
+# backend/tracker/cache.py
+
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from .models import UserDataVersion
+
+# Every write to a user's data bumps their version (a DB counter, so bumps
+# from other workers and cron commands count), which orphans all snapshots
+# cached under the old one (no key scanning needed).
+# `today` too: embedded current streaks lapse at midnight without any write
+DASHBOARD_KEY = 'tracker:dashboard:{user_id}:{date}:{today}:{version}'
+STATS_KEY = 'tracker:dashboard-cache:{event}'
+HEATMAP_KEY = 'tracker:heatmap:{habit_id}:{year}:{version}'
+
+def get_user_version(user_id):
+    """
+    Current data version of a user. Read it BEFORE loading data, so a
+    write racing the request can never be cached under the new version.
+    """
+    version = UserDataVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+    return version or 0
+
+def request_user_version(request):
+    """get_user_version read once per request, so the ETag and snapshot keys agree."""
+    if not hasattr(request, '_user_version'):
+        request._user_version = get_user_version(request.user.id)
+    return request._user_version
+
+def bump_user_version(user_id):
+    bump_user_versions([user_id])
+
+def bump_user_versions(user_ids):
+    """One UPDATE for all users; rows are only created on a user's first write."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    versions = UserDataVersion.objects.filter(user_id__in=user_ids)
+    if versions.update(version=F('version') + 1) == len(user_ids):
+        return
+    # A concurrent first write may create the row too: ignore the conflict,
+    # its bump (or ours below) still lands after our data
+    missing = user_ids - set(versions.values_list('user_id', flat=True))
+    UserDataVersion.objects.bulk_create(
+        [UserDataVersion(user_id=user_id) for user_id in missing],
+        ignore_conflicts=True
+    )
+    UserDataVersion.objects.filter(user_id__in=missing).update(version=F('version') + 1)
+
+def _count(event):
+    key = STATS_KEY.format(event=event)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+def get_dashboard_snapshot(user_id, date, today, version):
+    data = cache.get(DASHBOARD_KEY.format(user_id=user_id, date=date, today=today, version=version))
+    _count('hits' if data is not None else 'misses')
+    return data
+
+def set_dashboard_snapshot(user_id, date, today, version, data):
+    cache.set(
+        DASHBOARD_KEY.format(user_id=user_id, date=date, today=today, version=version),
+        data,
+        timeout=settings.DASHBOARD_CACHE_TIMEOUT
+    )
+
+def dashboard_cache_stats():
+    return {
+        event: cache.get(STATS_KEY.format(event=event), 0)
+        for event in ('hits', 'misses')
+    }
+
+def get_heatmaps(habit_ids, year, version):
+    """Cached packed heatmaps as {habit_id: encoded}, misses left out."""
+    keys = {HEATMAP_KEY.format(habit_id=hid, year=year, version=version): hid for hid in habit_ids}
+    return {keys[key]: data for key, data in cache.get_many(list(keys)).items()}
+
+def set_heatmaps(year, version, heatmaps):
+    cache.set_many(
+        {
+            HEATMAP_KEY.format(habit_id=hid, year=year, version=version): data
+            for hid, data in heatmaps.items()
+        },
+        timeout=settings.HEATMAP_CACHE_TIMEOUT
+    )
+
+# --- HTTP CONDITIONAL REQUESTS ---
+
+def user_etag(request, *parts):
+    """
+    Strong ETag derived from the user's persisted data version: one
+    primary-key lookup, no serialization, tells whether the payload changed,
+    whichever process made the write.
+    """
+    version = request_user_version(request)
+    media_type = getattr(request, 'accepted_media_type', '')
+    raw = ':'.join(str(p) for p in (request.user.id, version, media_type, *parts))
+    return '"%s"' % hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+def not_modified(request, etag):
+    """Returns a 304 Response if the client already holds `etag`, else None."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    return None
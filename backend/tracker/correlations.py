@@ -0,0 +1,149 @@
+# backend/tracker/correlations.py
+
+import numpy as np
+
+from .models import DailyLog, HabitLog
+from .streaks import WEEKDAY_CODES
+
+# Cross-habit statistics over a (days x habits) status grid, vectorised
+# with NumPy: pairwise co-success, next-day miss effects, weekday collapse
+# and habit <-> mood/energy correlation. Feeds /habits/correlations/ and
+# the global insight prompt (instead of the raw matrix).
+
+MIN_SUPPORT = 5  # Days; a rate or correlation over fewer days is noise
+WELLBEING_METRICS = ('mood_score', 'energy_level')
+
+
+def percent(numerator, denominator):
+    """Elementwise %, NaN where the denominator is below MIN_SUPPORT."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator >= MIN_SUPPORT, numerator / denominator * 100, np.nan)
+
+def status_arrays(rows, habit_count):
+    """build_status_matrix() rows -> (success, logged) float arrays of shape (days, habits)."""
+    statuses = np.array(rows, dtype=object).reshape(len(rows), habit_count)
+    logged = np.not_equal(statuses, None)
+    success = np.isin(statuses, HabitLog.SUCCESS_STATUSES)
+    return success.astype(float), logged.astype(float)
+
+def co_success(success, logged):
+    """
+    rate[i, j]: % of days habit i succeeded on which j also succeeded (j logged);
+    lift[i, j]: that rate minus j's rate on days i was logged but failed.
+    """
+    failed = logged - success
+    rate = percent(success.T @ success, success.T @ logged)
+    otherwise = percent(failed.T @ success, failed.T @ logged)
+    return rate, rate - otherwise, success.T @ logged
+
+def lagged_misses(success, logged):
+    """
+    rate[i, j]: % of misses of i on day N followed by a miss of j on N+1;
+    base[j]: j's overall miss rate, to compare against.
+    """
+    missed = logged - success
+    support = missed[:-1].T @ logged[1:]
+    rate = percent(missed[:-1].T @ missed[1:], support)
+    base = percent(missed.sum(axis=0), logged.sum(axis=0))
+    return rate, base, support
+
+def weekday_collapse(days, success, logged):
+    """
+    Success % per ISO weekday (whole system) and the collapse score: how
+    many points below the overall rate that weekday falls.
+    """
+    weekday = np.array([day.weekday() for day in days], dtype=int)
+    successes = np.bincount(weekday, weights=success.sum(axis=1), minlength=7)
+    totals = np.bincount(weekday, weights=logged.sum(axis=1), minlength=7)
+    rates = percent(successes, totals)
+    overall = percent(successes.sum(), totals.sum())
+    return rates, overall - rates
+
+def wellbeing_correlations(success, logged, values):
+    """
+    Pearson r between each habit's daily success (0/1) and a metric
+    (NaN where not logged), over days that have both.
+    """
+    r = np.full(success.shape[1], np.nan)
+    support = np.zeros(success.shape[1], dtype=int)
+    for j in range(success.shape[1]):
+        mask = (logged[:, j] > 0) & ~np.isnan(values)
+        support[j] = mask.sum()
+        x, y = success[mask, j], values[mask]
+        if support[j] >= MIN_SUPPORT and x.std() and y.std():
+            r[j] = np.corrcoef(x, y)[0, 1]
+    return r, support
+
+def rounded(value, digits=1):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def build_correlations(user, habits, days, rows):
+    """
+    The JSON summary for `habits` over the status grid from
+    build_status_matrix(); one extra query for the DailyLogs in range.
+    Pairs and correlations without MIN_SUPPORT days are left out.
+    """
+    habits = list(habits)
+    names = [habit.name for habit in habits]
+    success, logged = status_arrays(rows, len(habits))
+
+    metrics = {metric: np.full(len(days), np.nan) for metric in WELLBEING_METRICS}
+    index = {day: i for i, day in enumerate(days)}
+    if days:
+        for date, *values in DailyLog.objects.filter(
+            user=user, date__range=[days[0], days[-1]]
+        ).values_list('date', *WELLBEING_METRICS):
+            for metric, value in zip(WELLBEING_METRICS, values):
+                if value is not None:
+                    metrics[metric][index[date]] = value
+
+    pair_rate, pair_lift, pair_support = co_success(success, logged)
+    lag_rate, lag_base, lag_support = lagged_misses(success, logged)
+    weekday_rates, collapse = weekday_collapse(days, success, logged)
+
+    pairs, lags = [], []
+    for i in range(len(habits)):
+        for j in range(len(habits)):
+            if i != j and not np.isnan(pair_rate[i, j]) and not np.isnan(pair_lift[i, j]):
+                pairs.append({
+                    "habit": names[i], "with": names[j], "days": int(pair_support[i, j]),
+                    "co_success_rate": rounded(pair_rate[i, j]), "lift": rounded(pair_lift[i, j])
+                })
+            if not np.isnan(lag_rate[i, j]):
+                lags.append({
+                    "missed": names[i], "next_day": names[j], "days": int(lag_support[i, j]),
+                    "miss_rate": rounded(lag_rate[i, j]), "base_miss_rate": rounded(lag_base[j])
+                })
+    pairs.sort(key=lambda pair: -pair["lift"])
+    lags.sort(key=lambda lag: -(lag["miss_rate"] - (lag["base_miss_rate"] or 0)))
+
+    wellbeing = []
+    for metric, values in metrics.items():
+        r, support = wellbeing_correlations(success, logged, values)
+        wellbeing += [
+            {"habit": names[j], "metric": metric, "r": rounded(r[j], 2), "days": int(support[j])}
+            for j in range(len(habits)) if not np.isnan(r[j])
+        ]
+    wellbeing.sort(key=lambda row: -abs(row["r"]))
+
+    logged_days = logged.sum(axis=0)
+    return {
+        "start": days[0] if days else None,
+        "end": days[-1] if days else None,
+        "min_support": MIN_SUPPORT,
+        "habits": [
+            {
+                "id": habit.id, "name": habit.name, "logged_days": int(logged_days[j]),
+                "success_rate": rounded(percent(success[:, j].sum(), logged_days[j]))
+            }
+            for j, habit in enumerate(habits)
+        ],
+        "co_success": pairs,
+        "lagged_misses": lags,
+        "weekdays": [
+            {"day": code, "success_rate": rounded(weekday_rates[k]), "collapse": rounded(collapse[k])}
+            for k, code in enumerate(WEEKDAY_CODES)
+        ],
+        "wellbeing": wellbeing
+    }
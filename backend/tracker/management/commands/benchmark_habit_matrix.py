@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from tracker.models import Habit, HabitLog
+from tracker.services import build_status_matrix
+
+
+def nested_loop_matrix(habits, start, days):
+    """The previous global-insight builder: full prefetch + linear scans (baseline)."""
+    habits = list(Habit.objects.filter(id__in=[h.id for h in habits]).prefetch_related('logs'))
+    rows = []
+    for i in range(days):
+        current_date = start + timedelta(days=i)
+        rows.append([
+            next((l.status for l in habit.logs.all() if l.date == current_date), None)
+            for habit in habits
+        ])
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Times build_status_matrix against the nested-loop baseline on synthetic history (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habits', type=int, default=10)
+        parser.add_argument('--years', type=int, default=5, help="Daily logs per habit, in years.")
+        parser.add_argument('--days', type=int, default=31, help="Matrix width (default: 31).")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if min(options['habits'], options['years'], options['days'], options['repeat']) < 1:
+            raise CommandError("All options must be positive.")
+
+        with transaction.atomic():
+            habits = self.seed(options['habits'], options['years'])
+            end = timezone.now().date()
+            start = end - timedelta(days=options['days'] - 1)
+
+            for label, build in (
+                ("nested loop", lambda: nested_loop_matrix(habits, start, options['days'])),
+                ("build_status_matrix", lambda: build_status_matrix(habits, start, end)),
+            ):
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as ctx:
+                        began = time.perf_counter()
+                        build()
+                        timings.append((time.perf_counter() - began) * 1000)
+                self.stdout.write(
+                    f"{label:>20}: best {min(timings):8.2f} ms, "
+                    f"median {sorted(timings)[len(timings) // 2]:8.2f} ms, "
+                    f"{len(ctx.captured_queries)} queries"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, habit_count, years):
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        habits = [Habit.objects.create(user=user, name=f'Habit {i}') for i in range(habit_count)]
+        today = timezone.now().date()
+        statuses = ('DONE', 'MISSED', 'DONE', 'PARTIAL')
+        HabitLog.objects.bulk_create(
+            [
+                HabitLog(habit=habit, date=today - timedelta(days=d), status=statuses[d % len(statuses)])
+                for habit in habits
+                for d in range(years * 365)
+            ],
+            batch_size=2000
+        )
+        self.stdout.write(f"Seeded {habit_count} habits x {years * 365} days of logs.")
+        return habits
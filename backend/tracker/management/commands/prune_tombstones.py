@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from tracker.models import Tombstone
+from tracker.services import tombstone_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS "
+        "(clients with older cursors get a full resync). Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Tombstones deleted per statement (default: 5000).")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        # Bounded deletes by id, so no single statement holds locks for long
+        expired = Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff()).order_by('id')
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += Tombstone.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Pruned {total} tombstones."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from tracker.models import Habit
+from tracker.services import recompute_habit_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes HabitStats (totals + streaks) from HabitLogs (backfill / repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Habits recomputed per chunk (default: 200).")
+        parser.add_argument('--missing', action='store_true',
+                            help="Only habits without a HabitStats row yet.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        habits = Habit.objects.only(
+            'id', 'created_at', 'habit_type', 'frequency', 'frequency_config'
+        ).order_by('id')
+        if options['missing']:
+            habits = habits.filter(stats__isnull=True)
+
+        last_id = None
+        total = 0
+        while True:
+            chunk = habits.filter(id__gt=last_id) if last_id else habits
+            chunk = list(chunk[:batch_size])
+            if not chunk:
+                break
+
+            recompute_habit_stats(chunk)
+            total += len(chunk)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {total} habits."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from tracker.models import Habit
+from tracker.services import rebuild_window_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes HabitWindowStat counters from HabitLogs (backfill / repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Habits rebuilt per chunk (default: 200).")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        habits = Habit.objects.filter(frequency='WINDOWED').only(
+            'id', 'created_at', 'frequency', 'frequency_config', 'windows_evaluated'
+        ).order_by('id')
+
+        last_id = None
+        total_habits = 0
+        total_rows = 0
+        while True:
+            chunk = habits.filter(id__gt=last_id) if last_id else habits
+            chunk = list(chunk[:batch_size])
+            if not chunk:
+                break
+
+            total_rows += rebuild_window_stats(chunk)
+            total_habits += len(chunk)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {total_rows} window counters for {total_habits} windowed habits."
+        ))
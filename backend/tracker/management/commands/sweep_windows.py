@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from django.utils import timezone
+from tracker.models import Habit
+from tracker.services import evaluate_habit_windows
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes FAILED logs for expired WINDOWED windows across all users. "
+        "Idempotent, safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Habits evaluated per chunk (default: 500).")
+        parser.add_argument('--date', help="Evaluate as of this date (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        today = timezone.now().date()
+        if options['date']:
+            today = parse_date(options['date'])
+            if not today:
+                raise CommandError("Invalid date format")
+            # Windows ending by then would be marked FAILED before they close
+            if today > timezone.localdate():
+                raise CommandError("--date cannot be in the future.")
+
+        habits = Habit.objects.filter(
+            is_active=True,
+            frequency='WINDOWED'
+        ).only(
+            'id', 'user', 'created_at', 'frequency', 'frequency_config', 'windows_evaluated'
+        ).order_by('id')
+
+        # Keyset pagination: each chunk is one habit query, one log query,
+        # one bulk insert and one bulk update, whatever the table size
+        last_id = None
+        total_habits = 0
+        total_failed = 0
+        while True:
+            chunk = habits.filter(id__gt=last_id) if last_id else habits
+            chunk = list(chunk[:batch_size])
+            if not chunk:
+                break
+
+            total_failed += evaluate_habit_windows(chunk, today)
+            total_habits += len(chunk)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Swept {total_habits} windowed habits, {total_failed} windows marked FAILED."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_goalprogress_source_habit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='windows_evaluated',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_window_stats(apps, schema_editor):
+    # Same result as `manage.py rebuild_window_stats`, on historical models
+    Habit = apps.get_model('tracker', 'Habit')
+    HabitLog = apps.get_model('tracker', 'HabitLog')
+    HabitWindowStat = apps.get_model('tracker', 'HabitWindowStat')
+
+    for habit in Habit.objects.filter(frequency='WINDOWED').iterator():
+        period = int(habit.frequency_config.get('period', 7))
+        start_date = habit.created_at.date()
+        counts = {}
+        dates = HabitLog.objects.filter(
+            habit=habit, status__in=['DONE', 'RESISTED'], date__gte=start_date
+        ).values_list('date', flat=True)
+        for date in dates:
+            idx = (date - start_date).days // period
+            counts[idx] = counts.get(idx, 0) + 1
+
+        indexes = set(counts) | set(range(habit.windows_evaluated))
+        HabitWindowStat.objects.bulk_create([
+            HabitWindowStat(
+                habit=habit,
+                window_index=idx,
+                success_count=counts.get(idx, 0),
+                closed=idx < habit.windows_evaluated
+            )
+            for idx in sorted(indexes)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_sync_indexes_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitWindowStat',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('window_index', models.PositiveIntegerField()),
+                ('success_count', models.PositiveIntegerField(default=0)),
+                ('closed', models.BooleanField(default=False)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='window_stats', to='tracker.habit')),
+            ],
+            options={
+                'unique_together': {('habit', 'window_index')},
+            },
+        ),
+        migrations.RunPython(backfill_window_stats, migrations.RunPython.noop),
+    ]
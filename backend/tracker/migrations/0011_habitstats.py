@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_habitwindowstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitStats',
+            fields=[
+                ('habit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='tracker.habit')),
+                ('total_logs', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('last_log_date', models.DateField(blank=True, null=True)),
+                ('last_success_date', models.DateField(blank=True, null=True)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('streak_last_slot', models.DateField(blank=True, null=True)),
+            ],
+        ),
+    ]
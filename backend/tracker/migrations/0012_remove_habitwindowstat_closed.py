@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 05:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_habitstats'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='habitwindowstat',
+            name='closed',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_remove_habitwindowstat_closed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitstats',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
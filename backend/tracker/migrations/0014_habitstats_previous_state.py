@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_habitstats_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitstats',
+            name='last_log_success',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='previous_longest_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='previous_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='previous_streak_last_slot',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='previous_success_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
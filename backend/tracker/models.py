@@ -3,11 +3,12 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 import uuid
+from .streaks import is_streak_alive
 
 class BaseModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Range scans for sync/
 
     class Meta:
         abstract = True
@@ -78,6 +79,9 @@ class Habit(BaseModel):
     linked_goal = models.ForeignKey(Goal, on_delete=models.SET_NULL, null=True, blank=True, related_name="linked_habits")
     is_active = models.BooleanField(default=True)
 
+    # WINDOWED watermark: how many leading windows have already been evaluated
+    windows_evaluated = models.PositiveIntegerField(default=0, editable=False)
+
     def clean(self):
         if self.frequency == 'WINDOWED':
             target = self.frequency_config.get('target')
@@ -111,6 +115,7 @@ class HabitLog(BaseModel):
         ('RESISTED', 'Resisted'),
         ('FAILED', 'Failed')
     ]
+    SUCCESS_STATUSES = ('DONE', 'RESISTED')
 
     habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name="logs")
     date = models.DateField(db_index=True)
@@ -123,7 +128,7 @@ class HabitLog(BaseModel):
 
     @property
     def is_success(self):
-        return self.status in ['DONE', 'RESISTED']
+        return self.status in self.SUCCESS_STATUSES
 
     def clean(self):
         try:
@@ -140,6 +145,62 @@ class HabitLog(BaseModel):
         self.full_clean()
         super().save(*args, **kwargs)
 
+class HabitWindowStat(models.Model):
+    """
+    Success counter per WINDOWED window (no row = 0 successes). Whether a
+    window was evaluated is Habit.windows_evaluated, not a flag here.
+
+    Kept in sync by HabitLog save()/delete() signals (tracker/signals.py)
+    and by the bulk paths in tracker/services.py. A raw
+    `HabitLog.objects...update(status=...)` or bulk_create bypasses both and
+    leaves these counters (and HabitStats) stale: write through save() or
+    upsert_habit_logs(), or run rebuild_window_stats / rebuild_habit_stats.
+    """
+    id = models.BigAutoField(primary_key=True)
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name="window_stats")
+    window_index = models.PositiveIntegerField()
+    success_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('habit', 'window_index')
+
+class HabitStats(models.Model):
+    """
+    Running totals + streaks of a habit, updated on every HabitLog write
+    (see tracker/signals.py and tracker/streaks.py for the rules).
+    """
+    habit = models.OneToOneField(Habit, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    total_logs = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    last_log_date = models.DateField(null=True, blank=True)
+    last_success_date = models.DateField(null=True, blank=True)
+
+    current_streak = models.PositiveIntegerField(default=0)  # As of streak_last_slot
+    longest_streak = models.PositiveIntegerField(default=0)
+    # Last slot of the current run: a day, or a window's first day (WINDOWED)
+    streak_last_slot = models.DateField(null=True, blank=True)
+
+    # DAILY/WEEKLY: the latest log's outcome and the state before it, so an
+    # edit of the latest log is undone and reapplied without a replay
+    # (None = unknown, e.g. WINDOWED or not rebuilt yet: recompute instead)
+    last_log_success = models.BooleanField(null=True, blank=True)
+    previous_streak = models.PositiveIntegerField(default=0)
+    previous_longest_streak = models.PositiveIntegerField(default=0)
+    previous_streak_last_slot = models.DateField(null=True, blank=True)
+    previous_success_date = models.DateField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Log writes reach sync/ through this
+
+    @property
+    def consistency_rate(self):
+        return round((self.successes / self.total_logs) * 100) if self.total_logs else 0
+
+    def current_streak_on(self, today):
+        """current_streak, or 0 if the run was broken since it was stored."""
+        if is_streak_alive(self.habit, self.streak_last_slot, today):
+            return self.current_streak
+        return 0
+
 class DailyLog(BaseModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="daily_logs")
     date = models.DateField(db_index=True)
@@ -166,4 +227,29 @@ class GoalProgress(BaseModel):
     )
 
     class Meta:
-        ordering = ['-date', '-created_at']
\ No newline at end of file
+        ordering = ['-date', '-created_at']
+
+# --- SYNC ---
+
+class Tombstone(models.Model):
+    """
+    Records deletions for sync/. Only the deleted root is recorded:
+    children removed by CASCADE (e.g. a habit's logs) are implied by it.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tombstones")
+    model_name = models.CharField(max_length=50)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'deleted_at'])]
+
+class UserDataVersion(models.Model):
+    """
+    Per-user data version behind ETags and cached snapshots (see cache.py).
+    Kept in the database so bumps from any process (other workers, cron
+    commands) reach every web process.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="data_version")
+    version = models.PositiveBigIntegerField(default=0)
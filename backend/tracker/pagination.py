@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class HabitLogCursorPagination(CursorPagination):
+    """
+    Stable keyset pages over a user's logs (newest first), so deep pages
+    cost the same as the first one.
+    """
+    ordering = ('-date', '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Habit, HabitLog, Goal, GoalProgress, Task, DailyLog
+from .models import Habit, HabitLog, HabitStats, Goal, GoalProgress, Task, DailyLog, Tombstone
 from django.utils import timezone
 from ai_features.models import GoalInsight 
 
@@ -20,6 +20,19 @@ class HabitLogSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("You cannot log habits for the future.")
         return value
 
+class HabitLogBatchEntrySerializer(serializers.Serializer):
+    """One entry of POST /log/habit/batch/ (same fields as LogHabitView)."""
+    habit_id = serializers.UUIDField()
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=HabitLog.STATUS_CHOICES)
+    entry_value = serializers.JSONField(required=False, allow_null=True)
+    note = serializers.CharField(required=False, allow_null=True, allow_blank=True, max_length=255)
+
+    def validate_date(self, value):
+        if value > timezone.now().date():
+            raise serializers.ValidationError("You cannot log habits for the future.")
+        return value
+
 class GoalProgressSerializer(serializers.ModelSerializer):
     # 👇 THIS LINE FIXES YOUR ERROR
     source_habit_name = serializers.ReadOnlyField(source='source_habit.name')
@@ -31,8 +44,24 @@ class GoalProgressSerializer(serializers.ModelSerializer):
             'source_habit', 'source_habit_name'
         ]
 
+class HabitStatsSerializer(serializers.ModelSerializer):
+    current_streak = serializers.SerializerMethodField()
+    consistency_rate = serializers.ReadOnlyField()
+
+    class Meta:
+        model = HabitStats
+        fields = [
+            'current_streak', 'longest_streak', 'total_logs', 'successes',
+            'consistency_rate', 'last_success_date'
+        ]
+
+    def get_current_streak(self, obj):
+        # The stored streak only ends when a slot is missed, so check it's still running
+        return obj.current_streak_on(timezone.localdate())
+
 class HabitSerializer(serializers.ModelSerializer):
     today_log = serializers.SerializerMethodField()
+    stats = HabitStatsSerializer(read_only=True)
     linked_goal_name = serializers.ReadOnlyField(source='linked_goal.name')
     linked_goal_is_completed = serializers.ReadOnlyField(source='linked_goal.is_completed')
 
@@ -52,6 +81,7 @@ class HabitSerializer(serializers.ModelSerializer):
             'linked_goal_name', 
             'linked_goal_is_completed', 
             'today_log',
+            'stats',
             'created_at' # Good to have for charts
         ]
 
@@ -88,6 +118,18 @@ class DailyLogSerializer(serializers.ModelSerializer):
         model = DailyLog
         fields = ['id', 'date', 'mood_score', 'energy_level', 'note']
 
+class DailyLogBatchEntrySerializer(serializers.Serializer):
+    """One entry of POST /daily-logs/bulk/; replaces that day's log."""
+    date = serializers.DateField()
+    mood_score = serializers.IntegerField(required=False, allow_null=True)
+    energy_level = serializers.IntegerField(required=False, allow_null=True)
+    note = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    def validate_date(self, value):
+        if value > timezone.now().date():
+            raise serializers.ValidationError("You cannot log days in the future.")
+        return value
+
 class DashboardSerializer(serializers.Serializer):
     date = serializers.DateField()
     daily_log = DailyLogSerializer(allow_null=True)
@@ -95,7 +137,89 @@ class DashboardSerializer(serializers.Serializer):
     goals = GoalSerializer(many=True)
     tasks = TaskSerializer(many=True)
 
+class GoalSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Goal
+        fields = ['id', 'name', 'category', 'is_active', 'is_completed', 'completed_at', 'completion_note']
+
+class DashboardDayHabitSerializer(serializers.Serializer):
+    habit = serializers.UUIDField()
+    today_log = HabitLogSerializer(allow_null=True)
+
+class DashboardDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    daily_log = DailyLogSerializer(allow_null=True)
+    habits = DashboardDayHabitSerializer(many=True)  # Visible habits only
+    goal_progress = GoalProgressSerializer(many=True)
+    tasks = serializers.ListField(child=serializers.UUIDField())  # Ids into the top-level list
+
+class DashboardRangeSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    habits = HabitSerializer(many=True)
+    goals = GoalSummarySerializer(many=True)
+    tasks = TaskSerializer(many=True)
+    days = DashboardDaySerializer(many=True)
+
 class HabitDetailSerializer(HabitSerializer):
     logs = HabitLogSerializer(many=True, read_only=True)
     class Meta(HabitSerializer.Meta):
-        fields = HabitSerializer.Meta.fields + ['logs']
\ No newline at end of file
+        fields = HabitSerializer.Meta.fields + ['logs']
+
+class HabitRecentLogsSerializer(HabitSerializer):
+    """List variant: embeds only the bounded `recent_logs` prefetch."""
+    logs = HabitLogSerializer(source='recent_logs', many=True, read_only=True)
+    class Meta(HabitSerializer.Meta):
+        fields = HabitSerializer.Meta.fields + ['logs']
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    model = serializers.ReadOnlyField(source='model_name')
+    id = serializers.ReadOnlyField(source='object_id')
+
+    class Meta:
+        model = Tombstone
+        fields = ['model', 'id', 'deleted_at']
+
+# sync/ rows carry only their own columns: values joined from another table
+# (a goal's name, a habit's name) change without touching this row's updated_at,
+# so they'd go stale on the client. Clients join by id locally. Habit stats
+# are the exception: they carry their own updated_at, which sync/ checks too.
+
+class SyncHabitStatsSerializer(serializers.ModelSerializer):
+    """
+    Stored values, not as of today: current_streak holds until the slot
+    after streak_last_slot is missed (see tracker/streaks.py), so clients
+    can tell whether it's still running without another sync.
+    """
+    class Meta:
+        model = HabitStats
+        fields = [
+            'current_streak', 'streak_last_slot', 'longest_streak', 'total_logs',
+            'successes', 'last_log_date', 'last_success_date'
+        ]
+
+class SyncHabitSerializer(serializers.ModelSerializer):
+    stats = SyncHabitStatsSerializer(read_only=True)
+
+    class Meta:
+        model = Habit
+        fields = [
+            'id', 'name', 'description', 'habit_type', 'frequency', 'frequency_config',
+            'tracking_mode', 'config', 'is_active', 'linked_goal', 'stats', 'created_at'
+        ]
+
+class SyncGoalProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoalProgress
+        fields = ['id', 'goal', 'date', 'moved_forward', 'note', 'created_at', 'source_habit']
+
+class SyncSerializer(serializers.Serializer):
+    cursor = serializers.DateTimeField()
+    full_resync = serializers.BooleanField()
+    habits = SyncHabitSerializer(many=True)
+    habit_logs = HabitLogSerializer(many=True)
+    goals = GoalSummarySerializer(many=True)
+    goal_progress = SyncGoalProgressSerializer(many=True)
+    tasks = TaskSerializer(many=True)
+    daily_logs = DailyLogSerializer(many=True)
+    deleted = TombstoneSerializer(many=True)
\ No newline at end of file
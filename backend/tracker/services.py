@@ -1,64 +1,839 @@
 # backend/tracker/services.py
 
-from datetime import timedelta
+import base64
+from datetime import date as date_cls, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, FloatField, Func, IntegerField, Max, Min, Q, Sum, Value, When, Window
+)
+from django.db.models.functions import Cast, ExtractIsoWeekDay, Lead, TruncDay, TruncMonth, TruncWeek
+from django.db.models.expressions import ValueRange
 from django.utils import timezone
-from .models import Habit, HabitLog
+from .cache import bump_user_versions, get_user_version, get_heatmaps, set_heatmaps
+from .models import (
+    Habit, HabitLog, HabitWindowStat, HabitStats, Goal, GoalProgress, Task, DailyLog, Tombstone
+)
+from .streaks import WEEKDAY_CODES, extend_streak, extend_window_streak
 
-def evaluate_windowed_habits(user):
+def get_window_bounds(habit, date):
+    """
+    Returns (window_index, window_start, window_end) of the WINDOWED
+    window containing `date`, or None if the habit didn't exist yet.
+    Windows start from created_at and are `period` days long.
+    """
+    period = int(habit.frequency_config.get('period', 7))
+    start_date = habit.created_at.date()
+    days_active = (date - start_date).days
+    if days_active < 0:
+        return None
+
+    window_idx = days_active // period
+    window_start = start_date + timedelta(days=window_idx * period)
+    window_end = window_start + timedelta(days=period - 1)
+    return window_idx, window_start, window_end
+
+def get_window_dates(habit, window_idx):
+    """(window_start, window_end) of a WINDOWED window by index."""
+    period = int(habit.frequency_config.get('period', 7))
+    window_start = habit.created_at.date() + timedelta(days=window_idx * period)
+    return window_start, window_start + timedelta(days=period - 1)
+
+def dashboard_logs_queryset(habits, date):
+    """
+    Only the logs the dashboard needs: every habit's log for `date`.
+    Row count is bounded by the number of habits, not by account age.
+    """
+    return HabitLog.objects.filter(habit__in=habits, date=date)
+
+def window_success_counts(habits, start, end=None):
+    """
+    {(habit_id, window_index): success_count} for the WINDOWED windows
+    overlapping [start, end], read from HabitWindowStat in one query.
+    """
+    end = end or start
+    stat_filter = Q()
+    for habit in habits:
+        if habit.frequency != 'WINDOWED':
+            continue
+        first = get_window_bounds(habit, max(start, habit.created_at.date()))
+        last = get_window_bounds(habit, end)
+        if first and last:
+            stat_filter |= Q(habit=habit, window_index__range=[first[0], last[0]])
+
+    if not stat_filter:
+        return {}
+    stats = HabitWindowStat.objects.filter(stat_filter).values_list(
+        'habit_id', 'window_index', 'success_count'
+    )
+    return {(habit_id, idx): count for habit_id, idx, count in stats}
+
+def is_habit_visible(habit, date, today_log, window_successes):
+    """
+    Dashboard filter rules for one habit on one day. `window_successes`
+    is the success count of the WINDOWED window containing `date`.
+    """
+    if habit.frequency == 'WEEKLY':
+        today_code = date.strftime('%a').upper()[:3] 
+        required_days = habit.frequency_config.get('days', [])
+        if today_code not in required_days:
+            return False
+
+    if habit.frequency == 'WINDOWED':
+        target = int(habit.frequency_config.get('target', 1))
+
+        # A satisfied window hides the habit, unless it was done today
+        if get_window_bounds(habit, date) and window_successes >= target:
+            did_it_today = (today_log and today_log.is_success)
+            if not did_it_today:
+                return False
+
+    return True
+
+def evaluate_windowed_habits(user, today=None):
     """
     Checks all active WINDOWED habits for this user.
     If a window has passed and the target wasn't met, auto-log FAILED.
     """
-    today = timezone.now().date()
     habits = Habit.objects.filter(
         user=user, 
         is_active=True, 
         frequency='WINDOWED'
     )
+    return evaluate_habit_windows(habits, today)
 
+def evaluate_habit_windows(habits, today=None):
+    """
+    Evaluates the windows that closed since each habit's watermark
+    (`windows_evaluated`), reading their HabitWindowStat counters in one
+    query and writing the FAILED logs in one bulk_create.
+    Returns the number of windows that missed their target.
+    """
+    today = today or timezone.now().date()
+
+    # 1. Work out which windows closed since the last evaluation
+    # e.g., if active for 15 days and period is 7:
+    # Window 1 (Day 0-6) and Window 2 (Day 7-13) are closed,
+    # Window 3 (Day 14-20) is still current, so don't fail it yet.
+    pending = {}
     for habit in habits:
-        target = int(habit.frequency_config.get('target', 1))
         period = int(habit.frequency_config.get('period', 7))
-        
-        # Calculate the CURRENT window start based on creation date
-        # (Simplified logic: Windows start from created_at)
         start_date = habit.created_at.date()
-        days_active = (today - start_date).days
-        
-        # We check previous completed windows
-        # e.g., if active for 15 days and period is 7:
-        # Check Window 1 (Day 0-6) and Window 2 (Day 7-13)
-        # Window 3 (Day 14-20) is still current, so don't fail it yet.
-        
-        completed_windows = days_active // period
-        
-        for i in range(completed_windows):
-            window_start = start_date + timedelta(days=i*period)
-            window_end = window_start + timedelta(days=period - 1)
-            
-            # 1. Check if we already marked this window as FAILED
-            # We look for a failure log specifically on the last day of that window
-            already_failed = HabitLog.objects.filter(
-                habit=habit,
-                date=window_end,
-                status='FAILED'
-            ).exists()
-            
-            if already_failed:
-                continue
-
-            # 2. Count successes in this window
-            success_count = HabitLog.objects.filter(
-                habit=habit,
-                date__range=[window_start, window_end],
-                status__in=['DONE', 'RESISTED']
-            ).count()
-
-            # 3. If target unmet, MARK FAILED
+        completed_windows = max(0, (today - start_date).days // period)
+
+        if completed_windows > habit.windows_evaluated:
+            pending[habit] = (habit.windows_evaluated, completed_windows)
+
+    if not pending:
+        return 0
+
+    # 2. Success counts of those windows (one row per window)
+    stat_filter = Q()
+    for habit, (first, last) in pending.items():
+        stat_filter |= Q(habit=habit, window_index__gte=first, window_index__lt=last)
+    success_counts = {
+        (habit_id, idx): count
+        for habit_id, idx, count in HabitWindowStat.objects.filter(stat_filter).values_list(
+            'habit_id', 'window_index', 'success_count'
+        )
+    }
+
+    # 3. If target unmet, MARK FAILED (on the last day of the window)
+    failures = []
+    for habit, (first, last) in pending.items():
+        target = int(habit.frequency_config.get('target', 1))
+
+        for i in range(first, last):
+            success_count = success_counts.get((habit.id, i), 0)
             if success_count < target:
-                HabitLog.objects.create(
+                _, window_end = get_window_dates(habit, i)
+                failures.append(HabitLog(
                     habit=habit,
-                    date=window_end, # 👈 Fail on the last day of window
+                    date=window_end,
                     status='FAILED',
                     note=f"Window expired. Completed {success_count}/{target}."
-                )
\ No newline at end of file
+                ))
+
+        habit.windows_evaluated = last
+
+    # ignore_conflicts: the window may already be marked FAILED (re-evaluation
+    # after a rewind), or a manual log may own its last day
+    HabitLog.objects.bulk_create(failures, ignore_conflicts=True)
+    Habit.objects.bulk_update(list(pending), ['windows_evaluated'])
+    recompute_habit_stats({log.habit for log in failures})
+
+    # bulk_create skips post_save, so invalidate cached snapshots here
+    bump_user_versions(log.habit.user_id for log in failures)
+    return len(failures)
+
+def rewind_window_watermarks(dates_by_habit, today=None):
+    """
+    Logs were written/removed inside already closed windows: move each
+    habit's watermark back to the earliest of them, so they get evaluated
+    again. `dates_by_habit`: {habit: dates}. One UPDATE for any number of habits.
+    """
+    today = today or timezone.now().date()
+    rewind_to = {}
+    for habit, dates in dates_by_habit.items():
+        if habit.frequency != 'WINDOWED':
+            continue
+        closed = [
+            bounds[0] for bounds in (get_window_bounds(habit, date) for date in dates)
+            if bounds and bounds[2] < today  # The current window isn't evaluated yet
+        ]
+        if closed:
+            rewind_to[habit.pk] = min(closed)
+    if not rewind_to:
+        return
+
+    behind = Q()
+    for pk, window_idx in rewind_to.items():
+        behind |= Q(pk=pk, windows_evaluated__gt=window_idx)
+    Habit.objects.filter(behind).update(windows_evaluated=Case(
+        *(When(pk=pk, then=Value(window_idx)) for pk, window_idx in rewind_to.items()),
+        output_field=IntegerField()
+    ))
+
+def refresh_window_stats(dates_by_habit):
+    """
+    Recounts the successes of the windows containing the given dates
+    (bounded by the period, not by history) and stores them in
+    HabitWindowStat: one aggregate query + one upsert for any number of
+    habits. The habit row locks serialize concurrent writers of the same habit.
+    """
+    windows = {}
+    for habit, dates in dates_by_habit.items():
+        if habit.frequency != 'WINDOWED':
+            continue
+        for bounds in (get_window_bounds(habit, date) for date in dates):
+            if bounds:
+                windows[(habit, bounds[0])] = bounds[1:]
+    if not windows:
+        return
+
+    in_windows = Q()
+    for (habit, window_idx), (window_start, window_end) in windows.items():
+        in_windows |= Q(habit_id=habit.pk, date__range=[window_start, window_end])
+    window_of = Case(
+        *(
+            When(habit_id=habit.pk, date__range=[window_start, window_end], then=Value(window_idx))
+            for (habit, window_idx), (window_start, window_end) in windows.items()
+        ),
+        output_field=IntegerField()
+    )
+
+    with transaction.atomic():
+        list(Habit.objects.select_for_update().filter(
+            pk__in={habit.pk for habit, _ in windows}
+        ).order_by('pk').values_list('pk', flat=True))
+        counts = {
+            (row['habit_id'], row['window']): row['successes']
+            for row in HabitLog.objects.filter(
+                in_windows, status__in=HabitLog.SUCCESS_STATUSES
+            ).annotate(window=window_of).values('habit_id', 'window').annotate(
+                successes=Count('id')
+            ).order_by()
+        }
+        HabitWindowStat.objects.bulk_create(
+            [
+                HabitWindowStat(
+                    habit=habit, window_index=window_idx,
+                    success_count=counts.get((habit.pk, window_idx), 0)
+                )
+                for habit, window_idx in windows
+            ],
+            update_conflicts=True,
+            unique_fields=['habit', 'window_index'],
+            update_fields=['success_count']
+        )
+
+def rebuild_window_stats(habits):
+    """
+    Recomputes HabitWindowStat from scratch for the given WINDOWED habits
+    (backfill / repair). One log query + one delete + one insert.
+    """
+    habits = [habit for habit in habits if habit.frequency == 'WINDOWED']
+    if not habits:
+        return 0
+    habits_by_id = {habit.id: habit for habit in habits}
+
+    counts = {}
+    dates = HabitLog.objects.filter(
+        habit__in=habits, status__in=HabitLog.SUCCESS_STATUSES
+    ).values_list('habit_id', 'date')
+    for habit_id, date in dates:
+        bounds = get_window_bounds(habits_by_id[habit_id], date)
+        if bounds:
+            key = (habit_id, bounds[0])
+            counts[key] = counts.get(key, 0) + 1
+
+    stats = [
+        HabitWindowStat(habit_id=habit_id, window_index=idx, success_count=count)
+        for (habit_id, idx), count in sorted(counts.items())
+    ]
+
+    with transaction.atomic():
+        HabitWindowStat.objects.filter(habit__in=habits).delete()
+        HabitWindowStat.objects.bulk_create(stats)
+    return len(stats)
+
+HABIT_STATS_FIELDS = [
+    'total_logs', 'successes', 'last_log_date', 'last_success_date',
+    'current_streak', 'longest_streak', 'streak_last_slot', 'last_log_success',
+    'previous_streak', 'previous_longest_streak', 'previous_streak_last_slot',
+    'previous_success_date', 'updated_at'
+]
+
+def advance_stats(stats, habit, entries):
+    """
+    Applies (date, is_success) entries to `stats` in memory, if they only
+    touch the end of the history: logs after every existing one, or a new
+    outcome for the latest log (undone from the state saved before it).
+    Returns False, leaving `stats` untouched, when a recompute is needed.
+    """
+    entries = sorted(entries)
+    if habit.frequency == 'WINDOWED':
+        return False  # Streak unit is the window: see recompute_habit_stats
+    if stats.last_log_date:
+        if entries[0][0] < stats.last_log_date:
+            return False  # Back-dated
+        if entries[0][0] == stats.last_log_date and stats.last_log_success is None:
+            return False  # No saved state to undo from
+
+    for date, is_success in entries:
+        if date == stats.last_log_date:
+            stats.total_logs -= 1
+            stats.successes -= stats.last_log_success
+            stats.last_success_date = stats.previous_success_date
+            stats.current_streak, stats.longest_streak, stats.streak_last_slot = (
+                stats.previous_streak, stats.previous_longest_streak, stats.previous_streak_last_slot
+            )
+        else:
+            stats.previous_success_date = stats.last_success_date
+            stats.previous_streak, stats.previous_longest_streak, stats.previous_streak_last_slot = (
+                stats.current_streak, stats.longest_streak, stats.streak_last_slot
+            )
+
+        stats.total_logs += 1
+        stats.last_log_date = date
+        stats.last_log_success = is_success
+        if is_success:
+            stats.successes += 1
+            stats.last_success_date = date
+
+        stats.current_streak, stats.longest_streak, stats.streak_last_slot = extend_streak(
+            (stats.current_streak, stats.longest_streak, stats.streak_last_slot),
+            habit, date, is_success
+        )
+    return True
+
+def record_log_in_stats(log, created=True):
+    """
+    Incremental HabitStats update for the common writes: a new log after
+    every existing one (checking off today) or an edit of the latest log
+    (re-toggling today). O(1), no log scan.
+    Returns False when the write needs a recompute instead.
+    """
+    habit = log.habit
+    if habit.frequency == 'WINDOWED':
+        return False
+
+    with transaction.atomic():
+        stats = HabitStats.objects.select_for_update().filter(habit=habit).first()
+        if stats is None or (not created and log.date != stats.last_log_date):
+            return False  # Back-dated edit, or a log moved to another date
+        if not advance_stats(stats, habit, [(log.date, log.is_success)]):
+            return False
+        stats.save()
+    return True
+
+def record_logs_in_stats(logs):
+    """
+    record_log_in_stats for a batch: one locking read and one bulk update
+    for every habit whose entries only touch the end of its history.
+    Returns the habits that need recompute_habit_stats instead.
+    """
+    entries = {}
+    for log in logs:
+        entries.setdefault(log.habit, []).append((log.date, log.is_success))
+    incremental = [habit for habit in entries if habit.frequency != 'WINDOWED']
+
+    advanced, replay = [], [habit for habit in entries if habit.frequency == 'WINDOWED']
+    with transaction.atomic():
+        stats = {
+            record.habit_id: record
+            for record in HabitStats.objects.select_for_update().filter(
+                habit__in=incremental
+            ).order_by('habit_id')
+        } if incremental else {}
+        now = timezone.now()
+        for habit in incremental:
+            record = stats.get(habit.pk)
+            if record and advance_stats(record, habit, entries[habit]):
+                record.updated_at = now  # bulk_update skips auto_now
+                advanced.append(record)
+            else:
+                replay.append(habit)
+        HabitStats.objects.bulk_update(advanced, HABIT_STATS_FIELDS)
+    return replay
+
+def recompute_habit_stats(habits):
+    """
+    Rebuilds HabitStats for several habits with set-based queries: one
+    (date, status) scan for DAILY/WEEKLY habits, one aggregate + one
+    HabitWindowStat read for WINDOWED ones, one upsert for all.
+    """
+    habits = list(habits)
+    if not habits:
+        return []
+    stats = {habit.id: HabitStats(habit=habit) for habit in habits}
+    windowed = [habit for habit in habits if habit.frequency == 'WINDOWED']
+    others = [habit for habit in habits if habit.frequency != 'WINDOWED']
+
+    # 1. DAILY/WEEKLY: replay the history through the incremental rule
+    if others:
+        habits_by_id = {habit.id: habit for habit in others}
+        rows = HabitLog.objects.filter(habit__in=others).order_by('habit_id', 'date').values_list(
+            'habit_id', 'date', 'status'
+        )
+        streaks = {}
+        for habit_id, date, status in rows:
+            is_success = status in HabitLog.SUCCESS_STATUSES
+            record = stats[habit_id]
+            state = streaks.get(habit_id, (0, 0, None))
+            # State before this log, in case it turns out to be the latest
+            record.previous_streak, record.previous_longest_streak, record.previous_streak_last_slot = state
+            record.previous_success_date = record.last_success_date
+            record.total_logs += 1
+            record.last_log_date = date
+            record.last_log_success = is_success
+            if is_success:
+                record.successes += 1
+                record.last_success_date = date
+            streaks[habit_id] = extend_streak(state, habits_by_id[habit_id], date, is_success)
+        for habit_id, (current, longest, last_slot) in streaks.items():
+            record = stats[habit_id]
+            record.current_streak, record.longest_streak, record.streak_last_slot = current, longest, last_slot
+
+    # 2. WINDOWED: totals in SQL, streaks from the per-window counters
+    if windowed:
+        success = Q(status__in=HabitLog.SUCCESS_STATUSES)
+        totals = HabitLog.objects.filter(habit__in=windowed).values('habit_id').annotate(
+            total=Count('id'),
+            successes=Count('id', filter=success),
+            last_log=Max('date'),
+            last_success=Max('date', filter=success)
+        )
+        for row in totals:
+            record = stats[row['habit_id']]
+            record.total_logs = row['total']
+            record.successes = row['successes']
+            record.last_log_date = row['last_log']
+            record.last_success_date = row['last_success']
+
+        habits_by_id = {habit.id: habit for habit in windowed}
+        streaks = {}
+        met = HabitWindowStat.objects.filter(habit__in=windowed, success_count__gt=0).order_by(
+            'habit_id', 'window_index'
+        ).values_list('habit_id', 'window_index', 'success_count')
+        for habit_id, window_idx, success_count in met:
+            habit = habits_by_id[habit_id]
+            if success_count >= int(habit.frequency_config.get('target', 1)):
+                streaks[habit_id] = extend_window_streak(streaks.get(habit_id, (0, 0, None)), window_idx)
+        for habit_id, (current, longest, last_idx) in streaks.items():
+            record = stats[habit_id]
+            record.current_streak, record.longest_streak = current, longest
+            record.streak_last_slot = get_window_dates(habits_by_id[habit_id], last_idx)[0]
+
+    records = list(stats.values())
+    HabitStats.objects.bulk_create(
+        records,
+        update_conflicts=True,
+        unique_fields=['habit'],
+        update_fields=HABIT_STATS_FIELDS
+    )
+    return records
+
+def upsert_habit_logs(logs):
+    """
+    Writes validated HabitLogs with a single INSERT ... ON CONFLICT (habit, date)
+    DO UPDATE, then re-reads them (UUID pks of updated rows aren't returned).
+    bulk_create skips post_save, so the signal side effects are applied here.
+    """
+    if not logs:
+        return []
+
+    HabitLog.objects.bulk_create(
+        logs,
+        update_conflicts=True,
+        unique_fields=['habit', 'date'],
+        update_fields=['status', 'entry_value', 'note', 'updated_at']
+    )
+
+    dates_by_habit = {}
+    for log in logs:
+        dates_by_habit.setdefault(log.habit, set()).add(log.date)
+    rewind_window_watermarks(dates_by_habit)
+    refresh_window_stats(dates_by_habit)
+    # Appends and latest-log edits are applied in place; only the rest replay
+    recompute_habit_stats(record_logs_in_stats(logs))
+    bump_user_versions(log.habit.user_id for log in logs)
+
+    stored = HabitLog.objects.filter(
+        habit__in={log.habit_id for log in logs},
+        date__in={log.date for log in logs}
+    )
+    by_key = {(log.habit_id, log.date): log for log in stored}
+    return [by_key[(log.habit_id, log.date)] for log in logs]
+
+def build_status_matrix(habits, start, end):
+    """
+    Dense (days x habits) grid of statuses for [start, end], None where
+    nothing was logged. One query over the slice only, so the cost doesn't
+    depend on how much history the habits have.
+    Returns (days, rows) with rows[i][j] = status of habits[j] on days[i].
+    """
+    habits = list(habits)
+    cells = {
+        (habit_id, date): status
+        for habit_id, date, status in HabitLog.objects.filter(
+            habit__in=habits, date__range=[start, end]
+        ).values_list('habit_id', 'date', 'status')
+    }
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    rows = [[cells.get((habit.id, day)) for habit in habits] for day in days]
+    return days, rows
+
+def build_dashboard_range(user, start, end):
+    """
+    The dashboard for every day in [start, end] with one fetch per table:
+    habit visibility is computed for all days in a single in-memory pass,
+    so the query count doesn't depend on the range length.
+    """
+    habits = list(
+        Habit.objects.filter(user=user, is_active=True).select_related('linked_goal')
+    )
+
+    # 1. Logs inside the range + counters of every window overlapping it
+    day_logs = {
+        (log.habit_id, log.date): log
+        for log in HabitLog.objects.filter(habit__in=habits, date__range=[start, end])
+    }
+    window_successes = window_success_counts(habits, start, end)
+
+    # 2. Everything else, bucketed by day
+    daily_logs = {
+        log.date: log
+        for log in DailyLog.objects.filter(user=user, date__range=[start, end])
+    }
+
+    goals = list(Goal.objects.filter(user=user, is_active=True, is_completed=False))
+    progress_by_day = {}
+    progress = GoalProgress.objects.filter(
+        goal__in=goals, date__range=[start, end]
+    ).select_related('source_habit')
+    for entry in progress:
+        progress_by_day.setdefault(entry.date, []).append(entry)
+
+    tasks = list(Task.objects.filter(user=user).filter(
+        Q(is_completed=False) | Q(completed_at__date__range=[start, end])
+    ).order_by('created_at'))
+
+    # 3. Single pass over the days
+    days = []
+    for offset in range((end - start).days + 1):
+        date = start + timedelta(days=offset)
+
+        day_habits = []
+        for habit in habits:
+            today_log = day_logs.get((habit.id, date))
+            successes = 0
+            if habit.frequency == 'WINDOWED':
+                bounds = get_window_bounds(habit, date)
+                if bounds:
+                    successes = window_successes.get((habit.id, bounds[0]), 0)
+            if is_habit_visible(habit, date, today_log, successes):
+                day_habits.append({"habit": habit.id, "today_log": today_log})
+
+        days.append({
+            "date": date,
+            "daily_log": daily_logs.get(date),
+            "habits": day_habits,
+            "goal_progress": progress_by_day.get(date, []),
+            "tasks": [
+                task.id for task in tasks
+                if not task.is_completed or timezone.localtime(task.completed_at).date() == date
+            ]
+        })
+
+    return {
+        "start": start,
+        "end": end,
+        "habits": habits,
+        "goals": goals,
+        "tasks": tasks,
+        "days": days
+    }
+
+
+# Rows committed slightly after `now` may carry an earlier updated_at,
+# so the next cursor overlaps a little. Clients upsert by id.
+SYNC_CURSOR_OVERLAP = timedelta(seconds=5)
+
+def tombstone_cutoff():
+    """Tombstones older than this are pruned, so older cursors can't be trusted."""
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+def build_sync_delta(user, since=None):
+    """
+    Everything the user changed after `since` (everything if None), using
+    range scans on the indexed updated_at, plus tombstones for deletions.
+    A `since` older than the tombstone retention may have missed deletions:
+    everything is returned with `full_resync` set, and the client replaces its copy.
+    """
+    cursor = timezone.now() - SYNC_CURSOR_OVERLAP
+    full_resync = since is not None and since < tombstone_cutoff()
+    if full_resync:
+        since = None
+    changed = Q(updated_at__gt=since) if since else Q()
+    # Log writes change a habit's stats, not the habit row
+    habit_changed = (changed | Q(stats__updated_at__gt=since)) if since else Q()
+
+    delta = {
+        "cursor": cursor,
+        "full_resync": full_resync,
+        "habits": Habit.objects.filter(habit_changed, user=user).select_related('stats'),
+        "habit_logs": HabitLog.objects.filter(changed, habit__user=user),
+        "goals": Goal.objects.filter(changed, user=user),
+        "goal_progress": GoalProgress.objects.filter(changed, goal__user=user),
+        "tasks": Task.objects.filter(changed, user=user),
+        "daily_logs": DailyLog.objects.filter(changed, user=user),
+        "deleted": Tombstone.objects.none(),
+    }
+    if since:
+        delta["deleted"] = Tombstone.objects.filter(user=user, deleted_at__gt=since)
+    return delta
+
+def success_rate(successes, total):
+    return round((successes / total) * 100) if total else 0
+
+def build_habit_analytics(habit):
+    """
+    Chart data for the habit detail page, aggregated in the database so
+    the response size doesn't grow with the log history.
+    """
+    logs = HabitLog.objects.filter(habit=habit)
+    success = Q(status__in=HabitLog.SUCCESS_STATUSES)
+
+    # 1. Success rate per weekday (ISO: 1 = Monday)
+    by_weekday = {
+        row['weekday']: row
+        for row in logs.annotate(weekday=ExtractIsoWeekDay('date')).values('weekday').annotate(
+            total=Count('id'), successes=Count('id', filter=success)
+        )
+    }
+    weekdays = []
+    for iso_day, code in enumerate(WEEKDAY_CODES, start=1):
+        row = by_weekday.get(iso_day, {'total': 0, 'successes': 0})
+        weekdays.append({
+            "day": code,
+            "total": row['total'],
+            "successes": row['successes'],
+            "success_rate": success_rate(row['successes'], row['total'])
+        })
+
+    # 2. Completion counts per calendar month
+    months = [
+        {
+            "month": row['month'].strftime('%Y-%m'),
+            "total": row['total'],
+            "successes": row['successes'],
+            "success_rate": success_rate(row['successes'], row['total'])
+        }
+        for row in logs.annotate(month=TruncMonth('date')).values('month').annotate(
+            total=Count('id'), successes=Count('id', filter=success)
+        ).order_by('month')
+    ]
+
+    # 3. Status distribution (every status, zeros included)
+    statuses = dict.fromkeys((code for code, _ in HabitLog.STATUS_CHOICES), 0)
+    statuses.update(logs.values_list('status').annotate(count=Count('id')).order_by())
+
+    # 4. Resilience: share of misses followed by a success on the next log
+    miss = Q(status__in=('MISSED', 'FAILED'))
+    rebounds = logs.annotate(
+        next_status=Window(Lead('status'), order_by='date')
+    ).aggregate(
+        misses=Count('id', filter=miss),
+        recovered=Count('id', filter=miss & Q(next_status__in=HabitLog.SUCCESS_STATUSES))
+    )
+
+    # 5. Numeric entries (only NUMERIC habits store plain numbers, see HabitLog.clean)
+    entry_values = None
+    if habit.tracking_mode == 'NUMERIC':
+        value = Cast('entry_value', FloatField())
+        entry_values = logs.filter(entry_value__isnull=False).aggregate(
+            count=Count('id'), sum=Sum(value), avg=Avg(value), min=Min(value), max=Max(value)
+        )
+
+    total = sum(statuses.values())
+    successes = sum(statuses[code] for code in HabitLog.SUCCESS_STATUSES)
+    return {
+        "total_logs": total,
+        "successes": successes,
+        "success_rate": success_rate(successes, total),
+        "weekdays": weekdays,
+        "months": months,
+        "statuses": statuses,
+        "resilience": (
+            success_rate(rebounds['recovered'], rebounds['misses']) if rebounds['misses'] else None
+        ),
+        "entry_values": entry_values
+    }
+
+# One byte per day of the year; 0 = no log
+HEATMAP_STATUS_CODES = {'DONE': 1, 'MISSED': 2, 'PARTIAL': 3, 'RESISTED': 4, 'FAILED': 5}
+HEATMAP_ENCODING = 'base64-u8'
+
+def pack_heatmaps(habits, year):
+    """
+    Encodes a year of statuses per habit as base64 of one byte per day
+    (Jan 1 = byte 0), from a single query over all the habits.
+    """
+    start = date_cls(year, 1, 1)
+    size = (date_cls(year, 12, 31) - start).days + 1
+    days = {habit.id: bytearray(size) for habit in habits}
+
+    rows = HabitLog.objects.filter(
+        habit__in=habits, date__year=year
+    ).order_by('habit_id', 'date').values_list('habit_id', 'date', 'status')
+    for habit_id, date, status in rows:
+        days[habit_id][(date - start).days] = HEATMAP_STATUS_CODES[status]
+
+    return {habit_id: base64.b64encode(packed).decode('ascii') for habit_id, packed in days.items()}
+
+def build_heatmaps(user, habits, year):
+    """pack_heatmaps() behind the per-(habit, year) cache; only misses hit the DB."""
+    version = get_user_version(user.id)  # Before reading, see get_user_version
+    heatmaps = get_heatmaps([habit.id for habit in habits], year, version)
+    missing = [habit for habit in habits if habit.id not in heatmaps]
+    if missing:
+        packed = pack_heatmaps(missing, year)
+        set_heatmaps(year, version, packed)
+        heatmaps.update(packed)
+    return heatmaps
+
+def heatmap_payload(year):
+    return {
+        "year": year,
+        "start": str(date_cls(year, 1, 1)),
+        "encoding": HEATMAP_ENCODING,
+        "legend": {code: status for status, code in HEATMAP_STATUS_CODES.items()}
+    }
+
+
+# ==========================================
+# DAILY LOG TRENDS (mood / energy)
+# ==========================================
+
+DAILY_METRICS = ('mood_score', 'energy_level')
+TREND_BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+ROLLING_WINDOWS = (7, 30)
+
+class EpochDay(Func):
+    """Days since 1970-01-01 as an integer, so window frames can be ranges of calendar days."""
+    output_field = IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL: date - date is an integer number of days
+        return super().as_sql(compiler, connection, template="(%(expressions)s - DATE '1970-01-01')", **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, template="CAST(julianday(%(expressions)s) - 2440587.5 AS INTEGER)", **extra_context
+        )
+
+def upsert_daily_logs(logs):
+    """
+    Same single-statement upsert as upsert_habit_logs, on (user, date):
+    an entry replaces that day's mood, energy and note.
+    """
+    if not logs:
+        return []
+
+    DailyLog.objects.bulk_create(
+        logs,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=['mood_score', 'energy_level', 'note', 'updated_at']
+    )
+    bump_user_versions(log.user_id for log in logs)  # bulk_create skips post_save
+
+    stored = DailyLog.objects.filter(
+        user__in={log.user_id for log in logs},
+        date__in={log.date for log in logs}
+    )
+    by_key = {(log.user_id, log.date): log for log in stored}
+    return [by_key[(log.user_id, log.date)] for log in logs]
+
+def round_metric(value):
+    return None if value is None else round(value, 2)
+
+def build_daily_log_trends(user, start, end, bucket):
+    """
+    Mood/energy per day, week or month (avg, min, max, count) plus rolling
+    7/30-day means per logged day, all aggregated in the database: one
+    GROUP BY query and one window query over the range (+29 days of lead-in
+    so the first rolling means are complete).
+    """
+    logs = DailyLog.objects.filter(user=user)
+
+    # 1. Buckets
+    aggregates = {'entries': Count('id')}
+    for metric in DAILY_METRICS:
+        aggregates.update({
+            f'{metric}_avg': Avg(metric), f'{metric}_min': Min(metric),
+            f'{metric}_max': Max(metric), f'{metric}_count': Count(metric)
+        })
+    rows = logs.filter(date__range=[start, end]).annotate(
+        bucket=TREND_BUCKETS[bucket]('date')
+    ).values('bucket').annotate(**aggregates).order_by('bucket')
+    buckets = [
+        {
+            "start": str(row['bucket']),
+            "entries": row['entries'],
+            **{
+                metric: {
+                    "avg": round_metric(row[f'{metric}_avg']),
+                    "min": row[f'{metric}_min'],
+                    "max": row[f'{metric}_max'],
+                    "count": row[f'{metric}_count']
+                }
+                for metric in DAILY_METRICS
+            }
+        }
+        for row in rows
+    ]
+
+    # 2. Rolling means over calendar days (RANGE frame on the day number, so gaps don't stretch the window)
+    windows = {
+        f'{metric}_{days}d': Window(
+            Avg(metric), order_by=EpochDay('date').asc(), frame=ValueRange(start=-(days - 1), end=0)
+        )
+        for metric in DAILY_METRICS
+        for days in ROLLING_WINDOWS
+    }
+    lead_in = start - timedelta(days=max(ROLLING_WINDOWS) - 1)
+    rolling = [
+        {"date": str(row['date']), **{key: round_metric(row[key]) for key in windows}}
+        for row in logs.filter(date__range=[lead_in, end]).annotate(**windows).values('date', *windows).order_by('date')
+        if row['date'] >= start
+    ]
+
+    return {
+        "start": str(start),
+        "end": str(end),
+        "bucket": bucket,
+        "buckets": buckets,
+        "rolling": rolling
+    }
@@ -0,0 +1,111 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_user_version
+from .models import Habit, HabitLog, HabitStats, Goal, GoalProgress, Task, DailyLog, Tombstone
+from .services import (
+    rewind_window_watermarks, refresh_window_stats, record_log_in_stats, recompute_habit_stats
+)
+
+def is_cascade(model, kwargs):
+    """True when a delete was started by another model (e.g. Habit -> logs)."""
+    origin = kwargs.get('origin')
+    origin_model = getattr(origin, 'model', type(origin))
+    return origin is not None and origin_model is not model
+
+@receiver(post_save, sender=HabitLog)
+@receiver(post_delete, sender=HabitLog)
+def rewind_evaluated_windows(sender, instance, **kwargs):
+    """
+    Keep the WINDOWED watermark honest: edits to a closed window
+    make it eligible for evaluation again.
+    """
+    if is_cascade(HabitLog, kwargs):
+        return  # Cascade from a Habit/User delete, nothing left to evaluate
+    dates = {instance.date, getattr(instance, 'previous_date', None)} - {None}
+    rewind_window_watermarks({instance.habit: dates})
+
+@receiver(pre_save, sender=HabitLog)
+def remember_previous_date(sender, instance, **kwargs):
+    # A log moved to another date leaves a window that needs recounting too
+    instance.previous_date = None
+    if not instance._state.adding and instance.habit.frequency == 'WINDOWED':
+        instance.previous_date = (
+            HabitLog.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+        )
+
+@receiver(post_save, sender=HabitLog)
+@receiver(post_delete, sender=HabitLog)
+def update_window_stats(sender, instance, **kwargs):
+    if is_cascade(HabitLog, kwargs):
+        return  # HabitWindowStat rows go with the habit
+    dates = {instance.date, getattr(instance, 'previous_date', None)} - {None}
+    refresh_window_stats({instance.habit: dates})
+
+@receiver(post_save, sender=HabitLog)
+@receiver(post_delete, sender=HabitLog)
+def update_habit_stats(sender, instance, signal, created=False, **kwargs):
+    # Registered after update_window_stats: WINDOWED streaks read its counters
+    if is_cascade(HabitLog, kwargs):
+        return
+    # Writes at the end of the history are O(1); back-dated ones and deletes replay it
+    if signal is post_delete or not record_log_in_stats(instance, created):
+        recompute_habit_stats([instance.habit])
+
+@receiver(post_save, sender=Habit)
+def create_habit_stats(sender, instance, created, **kwargs):
+    if created:
+        HabitStats.objects.get_or_create(habit=instance)
+
+# --- CACHE INVALIDATION ---
+
+@receiver(post_save, sender=Habit)
+@receiver(post_delete, sender=Habit)
+@receiver(post_save, sender=Goal)
+@receiver(post_delete, sender=Goal)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=DailyLog)
+@receiver(post_delete, sender=DailyLog)
+def bump_owner_version(sender, instance, **kwargs):
+    if is_cascade(sender, kwargs):
+        return  # The deleted parent already bumped the version
+    bump_user_version(instance.user_id)
+
+@receiver(post_save, sender=HabitLog)
+@receiver(post_delete, sender=HabitLog)
+def bump_habit_log_version(sender, instance, **kwargs):
+    if is_cascade(sender, kwargs):
+        return
+    bump_user_version(instance.habit.user_id)
+
+@receiver(post_save, sender=GoalProgress)
+@receiver(post_delete, sender=GoalProgress)
+def bump_goal_progress_version(sender, instance, **kwargs):
+    if is_cascade(sender, kwargs):
+        return
+    bump_user_version(instance.goal.user_id)
+
+# --- SYNC TOMBSTONES ---
+
+@receiver(post_delete, sender=Habit)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=DailyLog)
+@receiver(post_delete, sender=HabitLog)
+@receiver(post_delete, sender=GoalProgress)
+def record_tombstone(sender, instance, **kwargs):
+    if is_cascade(sender, kwargs):
+        return  # Implied by the parent's tombstone
+
+    if sender is HabitLog:
+        user_id = instance.habit.user_id
+    elif sender is GoalProgress:
+        user_id = instance.goal.user_id
+    else:
+        user_id = instance.user_id
+
+    Tombstone.objects.create(
+        user_id=user_id,
+        model_name=sender._meta.model_name,
+        object_id=instance.pk
+    )
@@ -0,0 +1,71 @@
+# backend/tracker/streaks.py
+
+from datetime import timedelta
+
+# Streak rules, shared by the incremental path (one log appended) and the
+# full recompute, so both always agree.
+#
+# A streak counts consecutive *scheduled slots* with a success:
+#   DAILY    -> every day
+#   WEEKLY   -> the weekdays in frequency_config['days'] (other days are ignored)
+#   WINDOWED -> windows that reached their target
+# BUILD habits break on a slot without success (logged or not).
+# QUIT habits only break on an explicit non-success log: an unlogged day
+# is not a relapse.
+
+WEEKDAY_CODES = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
+
+def is_scheduled(habit, date):
+    if habit.frequency == 'WEEKLY':
+        return WEEKDAY_CODES[date.weekday()] in habit.frequency_config.get('days', [])
+    return True
+
+def previous_slot(habit, date):
+    """The scheduled day before `date` (None if nothing is scheduled)."""
+    for back in range(1, 8):
+        candidate = date - timedelta(days=back)
+        if is_scheduled(habit, candidate):
+            return candidate
+    return None
+
+def extend_streak(state, habit, date, is_success):
+    """
+    Applies one log (in date order) to (current, longest, last_slot_date)
+    of a DAILY/WEEKLY habit and returns the new state.
+    """
+    current, longest, last_slot = state
+    if not is_scheduled(habit, date):
+        return state
+
+    if is_success:
+        consecutive = habit.habit_type == 'QUIT' or last_slot == previous_slot(habit, date)
+        current = current + 1 if (last_slot is not None and consecutive) else 1
+        last_slot = date
+    else:
+        current, last_slot = 0, None
+    return current, max(longest, current), last_slot
+
+def window_index(habit, date):
+    """Index of the WINDOWED window containing `date` (see services.get_window_bounds)."""
+    period = int(habit.frequency_config.get('period', 7))
+    return (date - habit.created_at.date()).days // period
+
+def extend_window_streak(state, window_idx):
+    """Same as extend_streak, for a WINDOWED window that met its target."""
+    current, longest, last_idx = state
+    current = current + 1 if (last_idx is not None and window_idx == last_idx + 1) else 1
+    return current, max(longest, current), window_idx
+
+def is_streak_alive(habit, last_slot, today):
+    """
+    A stored streak is still running if its last slot is the current or
+    the previous one (today may simply not be logged yet).
+    """
+    if last_slot is None:
+        return False
+    if habit.habit_type == 'QUIT' and habit.frequency != 'WINDOWED':
+        return True
+    if habit.frequency == 'WINDOWED':
+        return window_index(habit, last_slot) >= window_index(habit, today) - 1
+    previous = previous_slot(habit, today)
+    return previous is not None and last_slot >= previous
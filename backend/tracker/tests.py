@@ -1,3 +1,1254 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+import base64
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import Habit, HabitLog, Goal, GoalProgress, Task, DailyLog, Tombstone
+from .cache import bump_user_version, dashboard_cache_stats
+from .correlations import build_correlations
+from .models import HabitWindowStat, HabitStats
+from .services import (
+    build_daily_log_trends,
+    build_status_matrix,
+    dashboard_logs_queryset,
+    evaluate_windowed_habits,
+    rebuild_window_stats,
+    recompute_habit_stats,
+    refresh_window_stats
+)
+
+
+def backdate(habit, days):
+    """created_at is auto_now_add, so push it back with a raw update."""
+    created = timezone.now() - timedelta(days=days)
+    Habit.objects.filter(pk=habit.pk).update(created_at=created)
+    bump_user_version(habit.user_id)
+    habit.refresh_from_db()
+    rebuild_window_stats([habit])  # Window indexes moved
+    recompute_habit_stats([habit])
+    return habit
+
+
+def add_history(habit, start, days, status='DONE'):
+    """Raw bulk insert: applies the post_save side effects by hand."""
+    dates = [start + timedelta(days=i) for i in range(days)]
+    HabitLog.objects.bulk_create([
+        HabitLog(habit=habit, date=date, status=status) for date in dates
+    ])
+    refresh_window_stats({habit: dates})
+    recompute_habit_stats([habit])
+    bump_user_version(habit.user_id)
+
+
+class TrackerTestCase(APITestCase):
+    def setUp(self):
+        # Cache keys embed user ids, which the test DB reuses between tests
+        cache.clear()
+
+
+class DashboardLogPrefetchTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='dash', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        # Older than yesterday, so the lazy window evaluation is skipped
+        self.date = self.today - timedelta(days=2)
+
+        self.daily = backdate(Habit.objects.create(user=self.user, name='Read'), 5)
+        self.windowed = backdate(Habit.objects.create(
+            user=self.user, name='Gym', frequency='WINDOWED',
+            frequency_config={'target': 3, 'period': 7}
+        ), 5)
+
+    def _dashboard(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/v1/dashboard/{self.date}/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_and_row_count_flat_as_history_grows(self):
+        HabitLog.objects.create(habit=self.daily, date=self.date, status='DONE')
+        _, baseline_queries = self._dashboard()
+        habits = [self.daily, self.windowed]
+        baseline_rows = dashboard_logs_queryset(habits, self.date).count()
+
+        # Three years of history before the current window
+        for habit in habits:
+            backdate(habit, 3 * 365 + 5)
+        add_history(self.daily, self.date - timedelta(days=3 * 365), 3 * 365 - 1)
+        add_history(self.windowed, self.date - timedelta(days=3 * 365), 3 * 365 - 30)
+        habits = [self.daily, self.windowed]
+
+        response, queries = self._dashboard()
+        self.assertEqual(queries, baseline_queries)
+        self.assertEqual(dashboard_logs_queryset(habits, self.date).count(), baseline_rows)
+
+        names = {h['name']: h for h in response.data['habits']}
+        self.assertEqual(names['Read']['today_log']['status'], 'DONE')
+
+    def test_satisfied_window_hides_habit(self):
+        window_start = self.windowed.created_at.date()
+        add_history(self.windowed, window_start, 3)
+        response, _ = self._dashboard()
+        names = [h['name'] for h in response.data['habits']]
+        self.assertNotIn('Gym', names)
+        self.assertIn('Read', names)
+
+    def test_unsatisfied_window_keeps_habit(self):
+        add_history(self.windowed, self.windowed.created_at.date(), 2)
+        response, _ = self._dashboard()
+        names = [h['name'] for h in response.data['habits']]
+        self.assertIn('Gym', names)
+
+
+class WindowWatermarkTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='win', password='pw')
+        self.today = timezone.now().date()
+        # 30 days old, 7-day windows: windows 0-3 are closed, window 4 is current
+        self.habit = backdate(Habit.objects.create(
+            user=self.user, name='Gym', frequency='WINDOWED',
+            frequency_config={'target': 2, 'period': 7}
+        ), 30)
+        self.start = self.habit.created_at.date()
+
+    def window_end(self, i):
+        return self.start + timedelta(days=(i + 1) * 7 - 1)
+
+    def failed_dates(self):
+        return set(self.habit.logs.filter(status='FAILED').values_list('date', flat=True))
+
+    def test_matches_per_window_evaluation(self):
+        # Window 0 met, window 1 short by one, window 2 met on its last day
+        add_history(self.habit, self.start, 2)
+        add_history(self.habit, self.start + timedelta(days=7), 1)
+        add_history(self.habit, self.window_end(2) - timedelta(days=1), 2)
+
+        evaluate_windowed_habits(self.user)
+
+        self.assertEqual(self.failed_dates(), {self.window_end(1), self.window_end(3)})
+        note = self.habit.logs.get(date=self.window_end(1)).note
+        self.assertEqual(note, "Window expired. Completed 1/2.")
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.windows_evaluated, 4)
+
+    def test_repeat_calls_skip_evaluated_windows(self):
+        evaluate_windowed_habits(self.user)
+        # Only the habit fetch remains; no log queries, no writes
+        with self.assertNumQueries(1):
+            self.assertEqual(evaluate_windowed_habits(self.user), 0)
+        self.assertEqual(len(self.failed_dates()), 4)
+
+    def test_query_count_independent_of_age(self):
+        backdate(self.habit, 365)
+        # habits, counters, FAILED insert, watermark update,
+        # HabitStats totals + met windows + upsert, version bump
+        with self.assertNumQueries(8):
+            evaluate_windowed_habits(self.user)
+        self.assertEqual(len(self.failed_dates()), 365 // 7)
+
+    def test_edit_in_closed_window_rewinds_watermark(self):
+        add_history(self.habit, self.start, 2)
+        evaluate_windowed_habits(self.user)
+        self.assertNotIn(self.window_end(0), self.failed_dates())
+
+        # Removing a success from window 0 makes it fail on re-evaluation
+        self.habit.logs.filter(date=self.start).first().delete()
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.windows_evaluated, 0)
+
+        evaluate_windowed_habits(self.user)
+        self.assertIn(self.window_end(0), self.failed_dates())
+
+    def test_existing_log_on_window_end_is_kept(self):
+        HabitLog.objects.create(habit=self.habit, date=self.window_end(0), status='MISSED')
+        evaluate_windowed_habits(self.user)
+        self.assertEqual(self.habit.logs.get(date=self.window_end(0)).status, 'MISSED')
+
+
+class SweepWindowsCommandTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.habits = []
+        for i in range(5):
+            user = User.objects.create_user(username=f'sweep{i}', password='pw')
+            self.habits.append(backdate(Habit.objects.create(
+                user=user, name='Gym', frequency='WINDOWED',
+                frequency_config={'target': 1, 'period': 7}
+            ), 15))
+
+    def sweep(self):
+        call_command('sweep_windows', '--batch-size', '2', stdout=StringIO())
+
+    def test_sweeps_all_users_in_chunks(self):
+        self.sweep()
+        for habit in self.habits:
+            self.assertEqual(habit.logs.filter(status='FAILED').count(), 2)
+
+    def test_repeat_runs_are_idempotent(self):
+        self.sweep()
+        # 3 chunks of habit ids + the empty tail query, nothing else
+        with self.assertNumQueries(4):
+            self.sweep()
+        self.assertEqual(HabitLog.objects.filter(status='FAILED').count(), 10)
+
+    def test_rejects_future_date(self):
+        future = timezone.localdate() + timedelta(days=30)
+        with self.assertRaisesMessage(CommandError, 'cannot be in the future'):
+            call_command('sweep_windows', '--date', str(future), stdout=StringIO())
+        self.assertFalse(HabitLog.objects.filter(status='FAILED').exists())
+        self.assertFalse(Habit.objects.filter(windows_evaluated__gt=0).exists())
+
+    @override_settings(TRACKER_INLINE_WINDOW_EVALUATION=False)
+    def test_dashboard_skips_inline_evaluation(self):
+        habit = self.habits[0]
+        self.client.force_authenticate(habit.user)
+        response = self.client.get(f'/api/v1/dashboard/{timezone.now().date()}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(habit.logs.exists())
+
+
+class DashboardCacheTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='cache', password='pw')
+        self.client.force_authenticate(self.user)
+        self.date = timezone.now().date()
+        self.habit = Habit.objects.create(user=self.user, name='Read')
+
+    def get(self):
+        response = self.client.get(f'/api/v1/dashboard/{self.date}/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeat_read_is_served_from_cache(self):
+        self.assertEqual(self.get()['X-Dashboard-Cache'], 'MISS')
+        with self.assertNumQueries(2):  # The inline window evaluation and the version
+            response = self.get()
+        self.assertEqual(response['X-Dashboard-Cache'], 'HIT')
+        self.assertEqual(dashboard_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_habit_log_write_invalidates(self):
+        self.get()
+        self.client.post('/api/v1/log/habit/', {
+            'habit_id': self.habit.id, 'date': str(self.date), 'status': 'DONE'
+        })
+        response = self.get()
+        self.assertEqual(response['X-Dashboard-Cache'], 'MISS')
+        self.assertEqual(response.data['habits'][0]['today_log']['status'], 'DONE')
+
+    def test_viewset_and_daily_log_writes_invalidate(self):
+        self.get()
+        self.client.post('/api/v1/tasks/', {'content': 'Call mom'})
+        self.assertEqual(len(self.get().data['tasks']), 1)
+
+        DailyLog.objects.create(user=self.user, date=self.date, mood_score=4)
+        self.assertEqual(self.get().data['daily_log']['mood_score'], 4)
+
+    def test_write_from_another_process_invalidates(self):
+        self.get()
+        # Another worker or a cron command: same database, its own local cache
+        other_process = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'other-process',
+        }}
+        with override_settings(CACHES=other_process):
+            Task.objects.create(user=self.user, content='Stretch')
+        response = self.get()
+        self.assertEqual(response['X-Dashboard-Cache'], 'MISS')
+        self.assertEqual(len(response.data['tasks']), 1)
+
+    def test_other_users_writes_do_not_invalidate(self):
+        self.get()
+        other = User.objects.create_user(username='other', password='pw')
+        Habit.objects.create(user=other, name='Run')
+        self.assertEqual(self.get()['X-Dashboard-Cache'], 'HIT')
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            backend = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            }}
+            with override_settings(CACHES=backend):
+                self.assertEqual(self.get()['X-Dashboard-Cache'], 'MISS')
+                self.assertEqual(self.get()['X-Dashboard-Cache'], 'HIT')
+                Task.objects.create(user=self.user, content='Stretch')
+                self.assertEqual(self.get()['X-Dashboard-Cache'], 'MISS')
+                self.assertEqual(dashboard_cache_stats(), {'hits': 1, 'misses': 2})
+
+
+class ETagTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='etag', password='pw')
+        self.client.force_authenticate(self.user)
+        self.date = timezone.now().date()
+        self.habit = Habit.objects.create(user=self.user, name='Read')
+
+    def test_dashboard_304_before_querying(self):
+        url = f'/api/v1/dashboard/{self.date}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(2):  # The inline window evaluation and the version
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Task.objects.create(user=self.user, content='Stretch')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_habit_detail_304_from_version_only(self):
+        url = f'/api/v1/habits/{self.habit.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_write_from_another_process_changes_etag(self):
+        url = f'/api/v1/habits/{self.habit.id}/'
+        etag = self.client.get(url)['ETag']
+        # Another worker or a cron command: same database, its own local cache
+        other_process = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'other-process',
+        }}
+        with override_settings(CACHES=other_process):
+            self.habit.name = 'Read more'
+            self.habit.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Read more')
+        self.assertNotEqual(response['ETag'], etag)
+
+        HabitLog.objects.create(habit=self.habit, date=self.date, status='DONE')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['logs']), 1)
+
+    def test_streak_payloads_expire_at_midnight(self):
+        for days_ago in (1, 0):
+            HabitLog.objects.create(habit=self.habit, date=self.date - timedelta(days=days_ago), status='DONE')
+        detail = f'/api/v1/habits/{self.habit.id}/'
+        dashboard = f'/api/v1/dashboard/{self.date}/'
+        etag = self.client.get(detail)['ETag']
+        self.assertEqual(self.client.get(dashboard).data['habits'][0]['stats']['current_streak'], 2)
+
+        # Two days later nothing was written, but the streak is broken
+        later = self.date + timedelta(days=2)
+        with mock.patch('django.utils.timezone.localdate', return_value=later):
+            response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['stats']['current_streak'], 0)
+            response = self.client.get(dashboard)
+            self.assertEqual(response['X-Dashboard-Cache'], 'MISS')
+            self.assertEqual(response.data['habits'][0]['stats']['current_streak'], 0)
+
+    def test_etag_is_per_resource(self):
+        other = Habit.objects.create(user=self.user, name='Run')
+        first = self.client.get(f'/api/v1/habits/{self.habit.id}/')['ETag']
+        response = self.client.get(f'/api/v1/habits/{other.id}/', HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(response.status_code, 200)
+
+
+class DashboardRangeTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='range', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.daily = backdate(Habit.objects.create(user=self.user, name='Read'), 60)
+        self.weekly = backdate(Habit.objects.create(
+            user=self.user, name='Swim', frequency='WEEKLY',
+            frequency_config={'days': ['MON']}
+        ), 60)
+        self.windowed = backdate(Habit.objects.create(
+            user=self.user, name='Gym', frequency='WINDOWED',
+            frequency_config={'target': 1, 'period': 7}
+        ), 60)
+        goal = Goal.objects.create(user=self.user, name='Fitness')
+        GoalProgress.objects.create(goal=goal, date=self.today - timedelta(days=3))
+        Task.objects.create(user=self.user, content='Stretch')
+        add_history(self.daily, self.today - timedelta(days=40), 40)
+        add_history(self.windowed, self.today - timedelta(days=40), 40, status='MISSED')
+        evaluate_windowed_habits(self.user)
+
+    def get_range(self, days):
+        start = self.today - timedelta(days=days - 1)
+        return self.client.get('/api/v1/dashboard/range/', {'start': start, 'end': self.today})
+
+    def count_queries(self, days):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get_range(days)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['days']), days)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_range_length(self):
+        self.assertEqual(self.count_queries(7), self.count_queries(30))
+
+    def test_days_match_single_day_dashboard(self):
+        # One success mid-window hides Gym on the other days of that window
+        HabitLog.objects.get(
+            habit=self.windowed, date=self.today - timedelta(days=10)
+        ).delete()
+        HabitLog.objects.create(
+            habit=self.windowed, date=self.today - timedelta(days=10), status='DONE'
+        )
+
+        days = self.get_range(30).data['days']
+        for day in days:
+            single = self.client.get(f"/api/v1/dashboard/{day['date']}/").data
+            self.assertEqual(
+                [h['habit'] for h in day['habits']],
+                [h['id'] for h in single['habits']],
+                day['date']
+            )
+            self.assertEqual(
+                [h['today_log'] for h in day['habits']],
+                [h['today_log'] for h in single['habits']]
+            )
+            self.assertEqual(len(day['tasks']), len(single['tasks']))
+
+        moved = [d for d in days if d['goal_progress']]
+        self.assertEqual(len(moved), 1)
+
+    def test_rejects_bad_ranges(self):
+        url = '/api/v1/dashboard/range/'
+        self.assertEqual(self.client.get(url, {'start': 'x', 'end': self.today}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': self.today, 'end': self.today - timedelta(days=1)}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': self.today - timedelta(days=400), 'end': self.today}).status_code, 400)
+
+
+class LogPaginationTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='pages', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.habit = Habit.objects.create(user=self.user, name='Read')
+        self.other = Habit.objects.create(user=self.user, name='Run')
+        add_history(self.habit, self.today - timedelta(days=249), 250)
+        add_history(self.other, self.today - timedelta(days=9), 10)
+
+    def test_cursor_pages_cover_every_log_once(self):
+        seen = []
+        url = '/api/v1/logs/?page_size=100'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 100)
+            seen += [(log['date'], log['id']) for log in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(seen), 260)
+        self.assertEqual(len(set(seen)), 260)
+        self.assertEqual([d for d, _ in seen], sorted((d for d, _ in seen), reverse=True))
+
+    def test_since_until_and_habit_filters(self):
+        since = self.today - timedelta(days=19)
+        until = self.today - timedelta(days=5)
+        response = self.client.get('/api/v1/logs/', {
+            'habit': self.habit.id, 'since': since, 'until': until
+        })
+        dates = [log['date'] for log in response.data['results']]
+        self.assertEqual(len(dates), 15)
+        self.assertEqual(min(dates), str(since))
+        self.assertEqual(max(dates), str(until))
+
+        self.assertEqual(self.client.get('/api/v1/logs/', {'since': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/logs/', {'habit': 'nope'}).status_code, 400)
+
+    def test_habit_list_embeds_no_history_by_default(self):
+        response = self.client.get('/api/v1/habits/')
+        self.assertNotIn('logs', response.data[0])
+
+    def test_habit_list_recent_logs_window(self):
+        response = self.client.get('/api/v1/habits/', {'recent_logs': 7})
+        by_name = {h['name']: h for h in response.data}
+        self.assertEqual(len(by_name['Read']['logs']), 7)
+        self.assertEqual(by_name['Read']['logs'][-1]['date'], str(self.today))
+        self.assertEqual(self.client.get('/api/v1/habits/', {'recent_logs': 9999}).status_code, 400)
+
+    def test_habit_detail_keeps_full_history(self):
+        response = self.client.get(f'/api/v1/habits/{self.habit.id}/')
+        self.assertEqual(len(response.data['logs']), 250)
+
+
+class BatchLogTests(TrackerTestCase):
+    url = '/api/v1/log/habit/batch/'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='batch', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.habits = [Habit.objects.create(user=self.user, name=f'H{i}') for i in range(10)]
+
+    def entries(self, habits, status='DONE'):
+        return [{'habit_id': str(h.id), 'date': str(self.today), 'status': status} for h in habits]
+
+    def post(self, entries):
+        return self.client.post(self.url, {'entries': entries}, format='json')
+
+    def test_creates_then_updates_in_place(self):
+        response = self.post(self.entries(self.habits))
+        self.assertEqual(response.data['saved'], 10)
+        first_ids = [r['log']['id'] for r in response.data['results']]
+
+        response = self.post(self.entries(self.habits, status='MISSED'))
+        self.assertEqual(response.data['saved'], 10)
+        self.assertEqual([r['log']['id'] for r in response.data['results']], first_ids)
+        self.assertEqual(HabitLog.objects.count(), 10)
+        self.assertFalse(HabitLog.objects.exclude(status='MISSED').exists())
+
+    def test_query_count_independent_of_batch_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.post(self.entries(self.habits[:2]))
+        with CaptureQueriesContext(connection) as large:
+            self.post(self.entries(self.habits[2:]))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_windowed_query_count_independent_of_batch_size(self):
+        habits = [
+            backdate(Habit.objects.create(
+                user=self.user, name=f'W{i}', frequency='WINDOWED',
+                frequency_config={'target': 2, 'period': 5}
+            ), 30)
+            for i in range(8)
+        ]
+        evaluate_windowed_habits(self.user)
+
+        def backfill(habits, days):
+            # Entries across several closed windows: rewinds + window recounts
+            return [
+                {'habit_id': str(h.id), 'date': str(self.today - timedelta(days=d)), 'status': 'DONE'}
+                for h in habits for d in days
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.post(backfill(habits[:2], (12,)))
+        with CaptureQueriesContext(connection) as large:
+            self.post(backfill(habits[2:], (11, 16, 21, 26)))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+        for habit in habits:
+            habit.refresh_from_db()
+        self.assertEqual([h.windows_evaluated for h in habits[:2]], [3, 3])
+        self.assertEqual([h.windows_evaluated for h in habits[2:]], [0] * 6)
+        stats = HabitWindowStat.objects.filter(habit=habits[2], success_count__gt=0)
+        self.assertEqual(stats.count(), 4)
+
+    def test_reports_per_item_errors(self):
+        numeric = Habit.objects.create(user=self.user, name='Pushups', tracking_mode='NUMERIC')
+        stranger = Habit.objects.create(
+            user=User.objects.create_user(username='stranger', password='pw'), name='X'
+        )
+        entries = self.entries(self.habits[:1]) + [
+            {'habit_id': str(stranger.id), 'date': str(self.today), 'status': 'DONE'},
+            {'habit_id': str(self.habits[1].id), 'date': str(self.today), 'status': 'MAYBE'},
+            {'habit_id': str(self.habits[1].id), 'date': str(self.today + timedelta(days=1)), 'status': 'DONE'},
+            {'habit_id': str(numeric.id), 'date': str(self.today), 'status': 'DONE', 'entry_value': 'ten'},
+            self.entries(self.habits[:1])[0],
+        ]
+        response = self.post(entries)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['saved'], response.data['failed']), (1, 5))
+
+        errors = [r.get('errors') for r in response.data['results']]
+        self.assertIsNone(errors[0])
+        self.assertIn('habit_id', errors[1])
+        self.assertIn('status', errors[2])
+        self.assertIn('date', errors[3])
+        self.assertIn('entry_value', errors[4])
+        self.assertIn('date', errors[5])
+        self.assertFalse(stranger.logs.exists())
+
+    def test_rejects_malformed_payload(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'entries': 'x'}, format='json').status_code, 400)
+
+    def test_invalidates_dashboard_cache(self):
+        self.client.get(f'/api/v1/dashboard/{self.today}/')
+        self.post(self.entries(self.habits[:1]))
+        response = self.client.get(f'/api/v1/dashboard/{self.today}/')
+        self.assertEqual(response['X-Dashboard-Cache'], 'MISS')
+
+
+class SyncTests(TrackerTestCase):
+    url = '/api/v1/sync/'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='sync', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.habit = Habit.objects.create(user=self.user, name='Read')
+        self.log = HabitLog.objects.create(habit=self.habit, date=self.today, status='DONE')
+        self.goal = Goal.objects.create(user=self.user, name='Fitness')
+        GoalProgress.objects.create(goal=self.goal, date=self.today)
+        self.task = Task.objects.create(user=self.user, content='Stretch')
+        DailyLog.objects.create(user=self.user, date=self.today, mood_score=3)
+
+        # Pretend all of the above was synced an hour ago
+        hour_ago = timezone.now() - timedelta(hours=1)
+        for model in (Habit, HabitStats, HabitLog, Goal, GoalProgress, Task, DailyLog):
+            model.objects.update(updated_at=hour_ago)
+        self.since = (hour_ago + timedelta(minutes=1)).isoformat()
+
+    def test_initial_sync_returns_everything(self):
+        data = self.client.get(self.url).data
+        for key in ('habits', 'habit_logs', 'goals', 'goal_progress', 'tasks', 'daily_logs'):
+            self.assertEqual(len(data[key]), 1, key)
+        self.assertEqual(data['deleted'], [])
+        self.assertTrue(data['cursor'])
+
+    def test_delta_contains_only_changes(self):
+        data = self.client.get(self.url, {'since': self.since}).data
+        self.assertEqual(sum(len(data[k]) for k in ('habits', 'habit_logs', 'tasks')), 0)
+
+        self.task.is_completed = True
+        self.task.save()
+        data = self.client.get(self.url, {'since': self.since}).data
+        self.assertEqual([t['id'] for t in data['tasks']], [str(self.task.id)])
+        self.assertEqual(data['habits'], [])
+
+    def test_deletions_are_tombstoned(self):
+        log_id = self.log.id
+        self.client.delete(f'/api/v1/logs/{log_id}/')
+        self.client.delete(f'/api/v1/goals/{self.goal.id}/')
+
+        deleted = self.client.get(self.url, {'since': self.since}).data['deleted']
+        self.assertEqual(
+            {(d['model'], d['id']) for d in deleted},
+            {('habitlog', log_id), ('goal', self.goal.id)}
+        )
+        # The goal's progress went with it (CASCADE), implied by the goal tombstone
+        self.assertEqual(len(deleted), 2)
+
+    def test_rows_carry_only_their_own_columns(self):
+        self.habit.linked_goal = self.goal
+        self.habit.save()
+        habit = self.client.get(self.url, {'since': self.since}).data['habits'][0]
+        self.assertEqual(habit['linked_goal'], self.goal.id)
+        # Joined values would go stale: a goal rename doesn't touch the habit row
+        self.assertFalse({'linked_goal_name', 'today_log'} & set(habit))
+
+    def test_log_writes_resync_habit_stats(self):
+        self.assertEqual(self.client.get(self.url, {'since': self.since}).data['habits'], [])
+
+        HabitLog.objects.create(habit=self.habit, date=self.today - timedelta(days=1), status='DONE')
+        habits = self.client.get(self.url, {'since': self.since}).data['habits']
+        self.assertEqual([h['id'] for h in habits], [str(self.habit.id)])
+        stats = habits[0]['stats']
+        self.assertEqual((stats['current_streak'], stats['total_logs']), (2, 2))
+        self.assertEqual(stats['streak_last_slot'], str(self.today))
+
+    def test_expired_cursor_forces_full_resync(self):
+        self.task.delete()
+        self.assertFalse(self.client.get(self.url, {'since': self.since}).data['full_resync'])
+
+        old = (timezone.now() - timedelta(days=91)).isoformat()
+        data = self.client.get(self.url, {'since': old}).data
+        self.assertTrue(data['full_resync'])
+        self.assertEqual((len(data['habits']), data['deleted']), (1, []))
+
+    def test_prune_tombstones(self):
+        self.task.delete()
+        self.log.delete()
+        Tombstone.objects.filter(model_name='task').update(deleted_at=timezone.now() - timedelta(days=91))
+        call_command('prune_tombstones', '--batch-size=1', stdout=StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('model_name', flat=True)), ['habitlog'])
+
+    def test_cursor_round_trip(self):
+        cursor = self.client.get(self.url).data['cursor']
+        self.assertEqual(self.client.get(self.url, {'since': cursor}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+
+class WindowStatTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='stats', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.habit = backdate(Habit.objects.create(
+            user=self.user, name='Gym', frequency='WINDOWED',
+            frequency_config={'target': 3, 'period': 5}
+        ), 40)
+        self.start = self.habit.created_at.date()
+
+    def recount(self):
+        """Full recount from the raw logs, window by window."""
+        counts = {}
+        for log in self.habit.logs.all():
+            if log.is_success:
+                idx = (log.date - self.start).days // 5
+                counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def stored(self):
+        return {
+            stat.window_index: stat.success_count
+            for stat in HabitWindowStat.objects.filter(habit=self.habit)
+            if stat.success_count
+        }
+
+    def test_counters_follow_every_write_path(self):
+        day = lambda n: self.start + timedelta(days=n)
+
+        HabitLog.objects.create(habit=self.habit, date=day(1), status='DONE')
+        HabitLog.objects.create(habit=self.habit, date=day(2), status='MISSED')
+        self.client.post('/api/v1/log/habit/', {
+            'habit_id': self.habit.id, 'date': str(day(2)), 'status': 'RESISTED'
+        })
+        self.client.post('/api/v1/log/habit/batch/', {'entries': [
+            {'habit_id': str(self.habit.id), 'date': str(day(n)), 'status': 'DONE'}
+            for n in (3, 7, 8, 22)
+        ]}, format='json')
+        self.assertEqual(self.stored(), self.recount())
+
+        # Status flip, date move across windows, delete
+        log = HabitLog.objects.get(habit=self.habit, date=day(3))
+        self.client.patch(f'/api/v1/logs/{log.id}/', {'status': 'MISSED'})
+        log = HabitLog.objects.get(habit=self.habit, date=day(7))
+        self.client.patch(f'/api/v1/logs/{log.id}/', {'date': str(day(12))})
+        log = HabitLog.objects.get(habit=self.habit, date=day(22))
+        self.client.delete(f'/api/v1/logs/{log.id}/')
+
+        self.assertEqual(self.stored(), self.recount())
+        self.assertEqual(self.stored(), {0: 2, 1: 1, 2: 1})
+
+    def test_rebuild_command_matches_recount(self):
+        add_history(self.habit, self.start, 30)
+        evaluate_windowed_habits(self.user)
+        HabitWindowStat.objects.all().update(success_count=99)
+
+        call_command('rebuild_window_stats', stdout=StringIO())
+        self.assertEqual(self.stored(), self.recount())
+
+    def test_evaluation_advances_watermark_only(self):
+        add_history(self.habit, self.start, 3)
+        evaluate_windowed_habits(self.user)
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.windows_evaluated, 8)
+        # Only window 0 met its target; FAILED logs leave the counters alone
+        self.assertEqual(self.habit.logs.filter(status='FAILED').count(), 7)
+        self.assertEqual(self.stored(), self.recount())
+
+    def test_schedule_change_rebuilds_counters(self):
+        add_history(self.habit, self.start, 10)
+        self.client.patch(f'/api/v1/habits/{self.habit.id}/', {
+            'frequency_config': {'target': 3, 'period': 10}
+        }, format='json')
+        stats = {s.window_index: s.success_count for s in self.habit.window_stats.all()}
+        self.assertEqual(stats, {0: 10})
+
+
+class HabitStatsTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='streak', password='pw')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def make_habit(self, days_old=30, **kwargs):
+        return backdate(Habit.objects.create(user=self.user, name='Habit', **kwargs), days_old)
+
+    def stats(self, habit):
+        return HabitStats.objects.get(habit=habit)
+
+    def assert_matches_recount(self, habit):
+        stored = self.stats(habit)
+        recomputed = recompute_habit_stats([habit])[0]
+        for field in ('total_logs', 'successes', 'last_log_date', 'last_success_date',
+                      'current_streak', 'longest_streak', 'streak_last_slot', 'last_log_success',
+                      'previous_streak', 'previous_longest_streak', 'previous_streak_last_slot',
+                      'previous_success_date'):
+            self.assertEqual(getattr(stored, field), getattr(recomputed, field), field)
+
+    def test_created_with_habit(self):
+        habit = Habit.objects.create(user=self.user, name='New')
+        self.assertEqual(self.stats(habit).total_logs, 0)
+
+    def test_appending_logs_is_incremental(self):
+        habit = self.make_habit()
+        for back in (3, 2, 1):
+            HabitLog.objects.create(habit=habit, date=self.today - timedelta(days=back), status='DONE')
+
+        # Appending one more log doesn't replay the history
+        with CaptureQueriesContext(connection) as ctx:
+            HabitLog.objects.create(habit=habit, date=self.today, status='DONE')
+        scans = [q for q in ctx.captured_queries if '"tracker_habitlog"."status"' in q['sql']]
+        self.assertEqual(scans, [])
+
+        stats = self.stats(habit)
+        self.assertEqual((stats.current_streak, stats.longest_streak, stats.total_logs), (4, 4, 4))
+        self.assert_matches_recount(habit)
+
+    def replays(self, ctx):
+        # recompute_habit_stats' full (habit, date) scan
+        return [
+            q for q in ctx.captured_queries
+            if '"tracker_habitlog"."status" AS "status"' in q['sql'] and 'ORDER BY' in q['sql']
+        ]
+
+    def test_retoggling_latest_log_is_incremental(self):
+        habit = self.make_habit()
+        add_history(habit, self.today - timedelta(days=3), 4)
+
+        for status in ('MISSED', 'DONE', 'MISSED', 'DONE'):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post('/api/v1/log/habit/', {
+                    'habit_id': habit.id, 'date': str(self.today), 'status': status
+                })
+            self.assertEqual(self.replays(ctx), [])
+            expected = (4, 4, 4) if status == 'DONE' else (0, 3, 3)
+            stats = self.stats(habit)
+            self.assertEqual((stats.current_streak, stats.longest_streak, stats.successes), expected)
+            self.assert_matches_recount(habit)
+
+        # Moving the latest log forward isn't an edit in place
+        log = habit.logs.get(date=self.today - timedelta(days=1))
+        log.date = self.today + timedelta(days=1)
+        log.save()
+        self.assert_matches_recount(habit)
+
+    def test_batch_appends_are_incremental(self):
+        habits = [self.make_habit() for _ in range(3)]
+        for habit in habits:
+            add_history(habit, self.today - timedelta(days=5), 4)
+        entries = [
+            {'habit_id': str(habit.id), 'date': str(self.today - timedelta(days=d)), 'status': 'DONE'}
+            for habit in habits[:2] for d in (2, 1, 0)
+        ]
+        # Re-toggle of the latest log, then an append
+        entries += [
+            {'habit_id': str(habits[2].id), 'date': str(self.today - timedelta(days=2)), 'status': 'MISSED'},
+            {'habit_id': str(habits[2].id), 'date': str(self.today), 'status': 'DONE'},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post('/api/v1/log/habit/batch/', {'entries': entries}, format='json')
+        self.assertEqual(self.replays(ctx), [])
+        self.assertEqual(self.stats(habits[0]).current_streak, 6)  # Edit of day -2, then two appends
+        self.assertEqual(self.stats(habits[2]).current_streak, 1)
+        for habit in habits:
+            self.assert_matches_recount(habit)
+
+        # A back-dated entry replays that habit only
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post('/api/v1/log/habit/batch/', {'entries': [
+                {'habit_id': str(habits[0].id), 'date': str(self.today - timedelta(days=9)), 'status': 'DONE'},
+                {'habit_id': str(habits[1].id), 'date': str(self.today), 'status': 'MISSED'},
+            ]}, format='json')
+        self.assertEqual(len(self.replays(ctx)), 1)
+        for habit in habits:
+            self.assert_matches_recount(habit)
+
+    def test_gap_and_edits_match_recount(self):
+        habit = self.make_habit()
+        add_history(habit, self.today - timedelta(days=10), 4)
+        add_history(habit, self.today - timedelta(days=5), 3)
+        self.assertEqual(self.stats(habit).longest_streak, 4)
+        self.assertEqual(self.stats(habit).current_streak, 3)
+
+        # Backfilling the gap day (out of order) joins both runs
+        log = HabitLog.objects.create(habit=habit, date=self.today - timedelta(days=6), status='DONE')
+        self.assertEqual(self.stats(habit).current_streak, 8)
+        log.status = 'MISSED'
+        log.save()
+        self.assertEqual(self.stats(habit).current_streak, 3)
+        log.delete()
+        self.assert_matches_recount(habit)
+
+    def test_build_streak_decays_but_quit_survives_gaps(self):
+        build = self.make_habit()
+        quit_habit = self.make_habit(habit_type='QUIT')
+        for habit in (build, quit_habit):
+            add_history(habit, self.today - timedelta(days=10), 3, status='DONE' if habit is build else 'RESISTED')
+            add_history(habit, self.today - timedelta(days=4), 2, status='DONE' if habit is build else 'RESISTED')
+
+        today = self.today
+        # BUILD: last success 3 days ago -> run is over
+        self.assertEqual(self.stats(build).current_streak, 2)
+        self.assertEqual(self.stats(build).current_streak_on(today), 0)
+        # QUIT: unlogged days aren't relapses
+        self.assertEqual(self.stats(quit_habit).current_streak_on(today), 5)
+
+        HabitLog.objects.create(habit=quit_habit, date=today, status='FAILED')
+        self.assertEqual(self.stats(quit_habit).current_streak_on(today), 0)
+        self.assertEqual(self.stats(quit_habit).longest_streak, 5)
+
+    def test_weekly_skips_unscheduled_days(self):
+        # Scheduled on exactly the weekdays logged below
+        codes = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
+        days = [self.today - timedelta(days=back) for back in (10, 7, 3, 0)]
+        habit = self.make_habit(
+            frequency='WEEKLY',
+            frequency_config={'days': sorted({codes[d.weekday()] for d in days})}
+        )
+        for date in days:
+            HabitLog.objects.create(habit=habit, date=date, status='DONE')
+        self.assertEqual(self.stats(habit).current_streak_on(self.today), 4)
+        self.assert_matches_recount(habit)
+
+    def test_windowed_streak_counts_met_windows(self):
+        habit = self.make_habit(
+            days_old=28, frequency='WINDOWED', frequency_config={'target': 2, 'period': 7}
+        )
+        start = habit.created_at.date()
+        # Windows 0 and 1 met, window 2 missed, window 3 (current) met
+        for offset in (0, 1, 7, 8, 21, 22):
+            HabitLog.objects.create(habit=habit, date=start + timedelta(days=offset), status='DONE')
+        evaluate_windowed_habits(self.user)
+
+        stats = self.stats(habit)
+        self.assertEqual((stats.current_streak, stats.longest_streak), (1, 2))
+        self.assertEqual(stats.current_streak_on(self.today), 1)
+        self.assert_matches_recount(habit)
+
+    def test_schedule_change_recomputes_stats(self):
+        habit = self.make_habit(days_old=28)
+        add_history(habit, self.today - timedelta(days=10), 10)
+        self.assertEqual(self.stats(habit).longest_streak, 10)
+        url = f'/api/v1/habits/{habit.id}/'
+
+        for change in (
+            {'frequency': 'WINDOWED', 'frequency_config': {'target': 5, 'period': 7}},
+            {'frequency': 'WEEKLY', 'frequency_config': {'days': ['MON']}},
+            {'habit_type': 'QUIT'},
+        ):
+            self.assertEqual(self.client.patch(url, change, format='json').status_code, 200)
+            habit.refresh_from_db()
+            self.assert_matches_recount(habit)
+            stats = self.client.get(url).data['stats']
+            self.assertEqual(stats['longest_streak'], self.stats(habit).longest_streak)
+            self.assertEqual(stats['current_streak'], self.stats(habit).current_streak_on(timezone.localdate()))
+
+        # WEEKLY on Mondays: one success per scheduled week, so the longest run is short
+        self.assertLess(self.stats(habit).longest_streak, 10)
+
+    def test_exposed_on_habit_serializer(self):
+        habit = self.make_habit()
+        add_history(habit, self.today - timedelta(days=1), 2)
+
+        response = self.client.get('/api/v1/habits/')
+        stats = response.data[0]['stats']
+        self.assertEqual(stats['current_streak'], 2)
+        self.assertEqual(stats['consistency_rate'], 100)
+
+    def test_rebuild_command_backfills_missing(self):
+        habit = self.make_habit()
+        add_history(habit, self.today - timedelta(days=2), 3)
+        HabitStats.objects.all().delete()
+
+        call_command('rebuild_habit_stats', '--missing', stdout=StringIO())
+        self.assertEqual(self.stats(habit).current_streak, 3)
+
+
+class HabitAnalyticsTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='charts', password='pw')
+        self.client.force_authenticate(self.user)
+        self.habit = backdate(Habit.objects.create(
+            user=self.user, name='Run', tracking_mode='NUMERIC'
+        ), 400)
+        # A Monday, so weekdays are predictable
+        self.monday = timezone.now().date() - timedelta(days=timezone.now().date().weekday() + 14)
+
+    def log(self, offset, status, value=None):
+        HabitLog.objects.create(
+            habit=self.habit, date=self.monday + timedelta(days=offset), status=status, entry_value=value
+        )
+
+    def test_aggregates(self):
+        self.log(0, 'DONE', 5)
+        self.log(1, 'MISSED')
+        self.log(2, 'DONE', 3)
+        self.log(7, 'FAILED')
+        self.log(8, 'FAILED')
+        self.log(9, 'PARTIAL', 1)
+
+        response = self.client.get(f'/api/v1/habits/{self.habit.id}/stats/')
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+
+        self.assertEqual((data['total_logs'], data['successes'], data['success_rate']), (6, 2, 33))
+        self.assertEqual(data['weekdays'][0], {'day': 'MON', 'total': 2, 'successes': 1, 'success_rate': 50})
+        self.assertEqual(data['weekdays'][6]['total'], 0)
+        self.assertEqual(data['statuses'], {'DONE': 2, 'MISSED': 1, 'PARTIAL': 1, 'RESISTED': 0, 'FAILED': 2})
+        self.assertEqual(sum(month['total'] for month in data['months']), 6)
+        # MISSED -> DONE recovered; FAILED -> FAILED and FAILED -> PARTIAL did not
+        self.assertEqual(data['resilience'], 33)
+        self.assertEqual(data['entry_values']['count'], 3)
+        self.assertEqual(data['entry_values']['sum'], 9)
+        self.assertEqual(data['entry_values']['max'], 5)
+
+    def test_query_count_flat_as_history_grows(self):
+        add_history(self.habit, self.monday - timedelta(days=300), 300)
+        url = f'/api/v1/habits/{self.habit.id}/stats/'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.data['total_logs'], 300)
+        self.assertLess(len(ctx.captured_queries), 10)
+        self.assertLess(len(response.content), 2000)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_users_habit_is_hidden(self):
+        other = User.objects.create_user(username='other', password='pw')
+        habit = Habit.objects.create(user=other, name='Secret')
+        response = self.client.get(f'/api/v1/habits/{habit.id}/stats/')
+        self.assertEqual(response.status_code, 404)
+
+
+class HeatmapTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='heat', password='pw')
+        self.client.force_authenticate(self.user)
+        self.year = timezone.now().year - 1
+        self.habit = backdate(Habit.objects.create(user=self.user, name='Read'), 800)
+        self.jan1 = timezone.now().date().replace(year=self.year, month=1, day=1)
+
+    def days(self, encoded):
+        return base64.b64decode(encoded)
+
+    def test_one_byte_per_day(self):
+        HabitLog.objects.create(habit=self.habit, date=self.jan1, status='DONE')
+        HabitLog.objects.create(habit=self.habit, date=self.jan1 + timedelta(days=40), status='MISSED')
+        HabitLog.objects.create(habit=self.habit, date=self.jan1 - timedelta(days=1), status='DONE')
+
+        response = self.client.get(f'/api/v1/habits/{self.habit.id}/heatmap/', {'year': self.year})
+        self.assertEqual(response.status_code, 200)
+        days = self.days(response.data['days'])
+        self.assertIn(len(days), (365, 366))
+        self.assertEqual(response.data['legend'][days[0]], 'DONE')
+        self.assertEqual(response.data['legend'][days[40]], 'MISSED')
+        self.assertEqual(sum(1 for day in days if day), 2)  # Dec 31 of the year before is out
+
+    def test_cross_habit_single_query_and_cache(self):
+        other = backdate(Habit.objects.create(user=self.user, name='Run'), 800)
+        add_history(self.habit, self.jan1, 200)
+        add_history(other, self.jan1, 10, status='RESISTED')
+        url = '/api/v1/habits/heatmap/'
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'year': self.year})
+        log_queries = [q for q in ctx.captured_queries if 'FROM "tracker_habitlog"' in q['sql']]
+        self.assertEqual(len(log_queries), 1)
+        self.assertEqual(sum(map(bool, self.days(response.data['habits'][str(other.id)]))), 10)
+
+        # Packed arrays are served from cache until a log write
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, {'year': self.year})
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "tracker_habitlog"' in q['sql']])
+
+        HabitLog.objects.create(habit=other, date=self.jan1 + timedelta(days=100), status='DONE')
+        response = self.client.get(url, {'year': self.year})
+        self.assertEqual(sum(map(bool, self.days(response.data['habits'][str(other.id)]))), 11)
+
+    def test_invalid_year(self):
+        response = self.client.get('/api/v1/habits/heatmap/', {'year': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+class StatusMatrixTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='matrix', password='pw')
+        self.today = timezone.now().date()
+        self.start = self.today - timedelta(days=30)
+        self.habits = [
+            backdate(Habit.objects.create(user=self.user, name=f'Habit {i}'), 3 * 365 + 40)
+            for i in range(5)
+        ]
+
+    def test_dense_grid(self):
+        HabitLog.objects.create(habit=self.habits[1], date=self.start, status='DONE')
+        HabitLog.objects.create(habit=self.habits[4], date=self.today, status='MISSED')
+        HabitLog.objects.create(habit=self.habits[0], date=self.start - timedelta(days=1), status='DONE')
+
+        days, rows = build_status_matrix(self.habits, self.start, self.today)
+        self.assertEqual((len(days), len(rows), len(rows[0])), (31, 31, 5))
+        self.assertEqual(rows[0], [None, 'DONE', None, None, None])
+        self.assertEqual(rows[-1][4], 'MISSED')
+        self.assertEqual(sum(1 for row in rows for status in row if status), 2)
+
+    def test_single_query_over_slice_with_years_of_history(self):
+        # Three years of daily logs per habit; only the last 31 days are read
+        for habit in self.habits:
+            add_history(habit, self.today - timedelta(days=3 * 365), 3 * 365 + 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            _, rows = build_status_matrix(self.habits, self.start, self.today)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('BETWEEN', ctx.captured_queries[0]['sql'])
+        self.assertTrue(all(status == 'DONE' for row in rows for status in row))
+
+
+class CorrelationTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='correlations', password='pw')
+        self.client.force_authenticate(self.user)
+        today = timezone.now().date()
+        self.start = today - timedelta(days=today.weekday() + 28)  # A Monday, 4 full weeks back
+        self.end = self.start + timedelta(days=27)
+        self.gym, self.read, self.walk = (
+            Habit.objects.create(user=self.user, name=name) for name in ('Gym', 'Read', 'Walk')
+        )
+        logs = []
+        for d in range(28):
+            date = self.start + timedelta(days=d)
+            weekday = d % 7 < 5
+            # Gym and Read succeed together on weekdays; Walk alternates
+            logs += [
+                HabitLog(habit=self.gym, date=date, status='DONE' if weekday else 'MISSED'),
+                HabitLog(habit=self.read, date=date, status='DONE' if weekday else 'MISSED'),
+                HabitLog(habit=self.walk, date=date, status='DONE' if d % 2 else 'MISSED'),
+            ]
+            DailyLog.objects.create(user=self.user, date=date, mood_score=5 if weekday else 2)
+        HabitLog.objects.bulk_create(logs)
+
+    def summary(self):
+        habits = [self.gym, self.read, self.walk]
+        return build_correlations(self.user, habits, *build_status_matrix(habits, self.start, self.end))
+
+    def test_co_success_and_lagged_misses(self):
+        summary = self.summary()
+        pair = next(p for p in summary["co_success"] if (p["habit"], p["with"]) == ('Gym', 'Read'))
+        self.assertEqual((pair["co_success_rate"], pair["lift"], pair["days"]), (100.0, 100.0, 20))
+        self.assertEqual(summary["co_success"][0]["lift"], 100.0)  # Strongest first
+
+        # Gym misses Sat and Sun: Sunday is missed again, Monday isn't
+        # (the last Sunday has no next day in range: 4 of 7)
+        lag = next(l for l in summary["lagged_misses"] if (l["missed"], l["next_day"]) == ('Gym', 'Gym'))
+        self.assertEqual((lag["miss_rate"], lag["base_miss_rate"], lag["days"]), (57.1, 28.6, 7))
+
+    def test_weekday_collapse_and_wellbeing(self):
+        summary = self.summary()
+        weekdays = {row["day"]: row for row in summary["weekdays"]}
+        self.assertEqual(weekdays['SAT']["success_rate"], 16.7)  # Only Walk, on odd days
+        self.assertGreater(weekdays['SAT']["collapse"], 30)
+        self.assertLess(weekdays['TUE']["collapse"], 0)
+
+        mood = {row["habit"]: row for row in summary["wellbeing"] if row["metric"] == 'mood_score'}
+        self.assertEqual(mood['Gym']["r"], 1.0)
+        self.assertEqual(mood['Gym']["days"], 28)
+        self.assertFalse(any(row["metric"] == 'energy_level' for row in summary["wellbeing"]))  # Never logged
+
+    def test_endpoint(self):
+        url = '/api/v1/habits/correlations/'
+        response = self.client.get(url, {'start': str(self.start), 'end': str(self.end)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([h["name"] for h in response.data["habits"]], ['Gym', 'Read', 'Walk'])
+        self.assertEqual(
+            self.client.get(url, {'start': str(self.start), 'end': str(self.end)},
+                            HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304
+        )
+        self.assertEqual(self.client.get(url).data["start"], timezone.now().date() - timedelta(days=89))
+
+        self.assertEqual(self.client.get(url, {'start': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': str(self.end), 'end': str(self.start)}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2020-01-01', 'end': '2024-01-01'}).status_code, 400)
+
+    def test_no_habits(self):
+        Habit.objects.filter(user=self.user).update(is_active=False)
+        data = self.client.get('/api/v1/habits/correlations/').data
+        self.assertEqual((data["habits"], data["co_success"], data["wellbeing"]), ([], [], []))
+
+
+class DailyLogTrendsTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='journal', password='pw')
+        self.client.force_authenticate(self.user)
+        today = timezone.now().date()
+        self.start = today - timedelta(days=today.weekday() + 28)  # A Monday, 4 full weeks back
+        self.end = self.start + timedelta(days=13)
+        # Days 0-2 and 5 in week one, day 9 in week two; day -10 only feeds the 30-day means
+        for d, mood, energy in ((-10, 5, None), (0, 1, 3), (1, 2, None), (2, 3, 4), (5, 1, None), (9, 5, 2)):
+            DailyLog.objects.create(
+                user=self.user, date=self.start + timedelta(days=d), mood_score=mood, energy_level=energy
+            )
+
+    def test_buckets_and_rolling_means(self):
+        with CaptureQueriesContext(connection) as ctx:
+            trends = build_daily_log_trends(self.user, self.start, self.end, 'week')
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        first, second = trends["buckets"]
+        self.assertEqual(first["start"], str(self.start))
+        self.assertEqual(first["entries"], 4)
+        self.assertEqual(first["mood_score"], {"avg": 1.75, "min": 1, "max": 3, "count": 4})
+        self.assertEqual(first["energy_level"], {"avg": 3.5, "min": 3, "max": 4, "count": 2})
+        self.assertEqual(second["mood_score"]["avg"], 5.0)
+
+        rolling = {row["date"]: row for row in trends["rolling"]}
+        self.assertEqual(len(rolling), 5)  # Logged days in range only
+        day = lambda d: str(self.start + timedelta(days=d))
+        self.assertEqual((rolling[day(0)]["mood_score_7d"], rolling[day(0)]["mood_score_30d"]), (1.0, 3.0))
+        # Calendar windows: day 9 looks back to day 3, not over the last 7 logs
+        self.assertEqual(rolling[day(9)]["mood_score_7d"], 3.0)
+        self.assertEqual(rolling[day(9)]["mood_score_30d"], 2.83)
+        self.assertEqual(rolling[day(9)]["energy_level_7d"], 2.0)
+        self.assertEqual(rolling[day(5)]["energy_level_7d"], 3.5)  # Days without energy are skipped
+
+    def test_endpoint(self):
+        url = '/api/v1/daily-logs/trends/'
+        params = {'start': str(self.start), 'end': str(self.end), 'bucket': 'month'}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(b["entries"] for b in response.data["buckets"]), 5)
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.assertEqual(self.client.get(url).data["start"], str(timezone.now().date() - timedelta(days=29)))
+        self.assertEqual(self.client.get(url, {'bucket': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': str(self.end), 'end': str(self.start)}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2010-01-01', 'end': '2024-01-01'}).status_code, 400)
+
+    def test_bulk_upsert(self):
+        url = '/api/v1/daily-logs/trends/'
+        etag = self.client.get(url)['ETag']
+        existing = self.start + timedelta(days=9)
+        entries = [
+            {'date': str(existing), 'mood_score': 2, 'note': 'Rewritten'},
+            {'date': str(self.start + timedelta(days=3)), 'mood_score': 4, 'energy_level': 4},
+            {'date': str(timezone.now().date() + timedelta(days=1)), 'mood_score': 3},
+            {'date': str(existing), 'mood_score': 1},
+            {'mood_score': 3},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v1/daily-logs/bulk/', {'entries': entries}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["saved"], response.data["failed"]), (2, 3))
+        self.assertEqual(sum('INSERT' in q['sql'] for q in ctx.captured_queries), 1)
+        self.assertEqual([sorted(r) for r in response.data["results"][2:]], [['errors', 'index']] * 3)
+        self.assertIn('Duplicate', response.data["results"][3]["errors"]["date"][0])
+
+        log = DailyLog.objects.get(user=self.user, date=existing)
+        self.assertEqual((log.mood_score, log.energy_level, log.note), (2, None, 'Rewritten'))  # Replaced
+        self.assertEqual(response.data["results"][0]["log"]["id"], str(log.id))
+        self.assertEqual(DailyLog.objects.filter(user=self.user).count(), 7)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.assertEqual(self.client.post('/api/v1/daily-logs/bulk/', {'entries': []}, format='json').status_code, 400)
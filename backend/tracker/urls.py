@@ -2,12 +2,16 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     DashboardView, 
+    DashboardRangeView,
     LogHabitView, 
+    LogHabitBatchView,
     LogGoalProgressView, 
+    SyncView,
     HabitViewSet, 
     GoalViewSet, 
     TaskViewSet,
-    HabitLogViewSet # <--- Import New ViewSet
+    HabitLogViewSet, # <--- Import New ViewSet
+    DailyLogViewSet
 )
 
 router = DefaultRouter()
@@ -15,10 +19,14 @@ router.register(r'habits', HabitViewSet, basename='habit')
 router.register(r'goals', GoalViewSet, basename='goal')
 router.register(r'tasks', TaskViewSet, basename='task')
 router.register(r'logs', HabitLogViewSet, basename='habitlog') # <--- Register Route
+router.register(r'daily-logs', DailyLogViewSet, basename='dailylog')
 
 urlpatterns = [
+    path('dashboard/range/', DashboardRangeView.as_view(), name='dashboard-range'),
     path('dashboard/<str:date_str>/', DashboardView.as_view(), name='dashboard'),
     path('log/habit/', LogHabitView.as_view(), name='log-habit'),
+    path('log/habit/batch/', LogHabitBatchView.as_view(), name='log-habit-batch'),
     path('log/goal/', LogGoalProgressView.as_view(), name='log-goal'),
+    path('sync/', SyncView.as_view(), name='sync'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
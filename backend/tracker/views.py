@@ -1,36 +1,80 @@
 #backend/tracker/views.pys
+import uuid
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
-from datetime import timedelta
+from datetime import timedelta, timezone as dt_timezone
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action # 👈 Needed for custom actions
+from rest_framework.exceptions import ValidationError
 
-from .models import Habit, HabitLog, Goal, GoalProgress, Task, DailyLog
+from .models import Habit, HabitLog, HabitWindowStat, Goal, GoalProgress, Task, DailyLog
 from .serializers import (
     DashboardSerializer, 
+    DashboardRangeSerializer,
     HabitSerializer, 
     HabitDetailSerializer, # 👈 Imported Correctly
+    HabitRecentLogsSerializer,
     GoalSerializer, 
     TaskSerializer, 
     DailyLogSerializer,
+    DailyLogBatchEntrySerializer,
     HabitLogSerializer,
-    GoalProgressSerializer
+    HabitLogBatchEntrySerializer,
+    GoalProgressSerializer,
+    SyncSerializer
 )
-from .services import evaluate_windowed_habits
-from ai_features.models import GoalInsight
-
+from .pagination import HabitLogCursorPagination
+from .cache import (
+    bump_user_version,
+    request_user_version,
+    get_dashboard_snapshot,
+    set_dashboard_snapshot,
+    user_etag,
+    not_modified
+)
+from .services import (
+    evaluate_windowed_habits,
+    is_habit_visible,
+    build_dashboard_range,
+    upsert_habit_logs,
+    build_sync_delta,
+    get_window_bounds,
+    dashboard_logs_queryset,
+    window_success_counts,
+    rebuild_window_stats,
+    recompute_habit_stats,
+    build_habit_analytics,
+    build_heatmaps,
+    build_status_matrix,
+    build_daily_log_trends,
+    heatmap_payload,
+    upsert_daily_logs,
+    TREND_BUCKETS
+)
+from .correlations import build_correlations
 # 👇 CORRECTED IMPORT LOCATION (This fixes your error)
 from ai_features.services import (
-    generate_goal_insight, 
+    enqueue_goal_insight,
     generate_habit_insight, 
-    generate_global_habit_insight
+    generate_global_habit_insight,
+    stream_habit_insight,
+    stream_global_habit_insight
 )
 
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let a proxy hold tokens back
+    return response
+
 # ==========================================
 # 1. THE DASHBOARD (READ CORE + LOGIC ENGINE)
 # ==========================================
@@ -45,13 +89,32 @@ class DashboardView(APIView):
 
         user = request.user
 
-        # A. Lazy Eval
-        if date >= (timezone.now().date() - timedelta(days=1)):
+        # A. Lazy Eval (skipped when the sweep_windows cron owns it)
+        if settings.TRACKER_INLINE_WINDOW_EVALUATION and date >= (timezone.now().date() - timedelta(days=1)):
              evaluate_windowed_habits(user)
 
-        # B. Fetch Data
+        # B. Conditional GET + Snapshot Cache (any write bumps the version;
+        # today's date is part of the key because habit streaks lapse at midnight)
+        today = timezone.localdate()
+        etag = user_etag(request, 'dashboard', date, today)
+        unchanged = not_modified(request, etag)
+        if unchanged:
+            return unchanged
+
+        version = request_user_version(request)
+        snapshot = get_dashboard_snapshot(user.id, date, today, version)
+        if snapshot is not None:
+            return Response(snapshot, headers={'X-Dashboard-Cache': 'HIT', 'ETag': etag})
+
+        # C. Fetch Data
         daily_log = DailyLog.objects.filter(user=user, date=date).first()
-        habits_qs = Habit.objects.filter(user=user, is_active=True).prefetch_related('logs')
+        habits_qs = list(
+            Habit.objects.filter(user=user, is_active=True).select_related('linked_goal', 'stats')
+        )
+
+        # Only today's logs + one counter row per WINDOWED habit
+        today_logs = {log.habit_id: log for log in dashboard_logs_queryset(habits_qs, date)}
+        window_successes = window_success_counts(habits_qs, date)
         
         goal_progress_prefetch = Prefetch(
             'progress_logs',
@@ -69,36 +132,20 @@ class DashboardView(APIView):
             Q(is_completed=False) | Q(completed_at__date=date)
         ).order_by('created_at')
 
-        # C. Filter Logic
+        # D. Filter Logic
         visible_habits = []
         for habit in habits_qs:
-            today_log = next((l for l in habit.logs.all() if l.date == date), None)
+            today_log = today_logs.get(habit.id)
             habit.today_log_instance = today_log
 
-            if habit.frequency == 'WEEKLY':
-                today_code = date.strftime('%a').upper()[:3] 
-                required_days = habit.frequency_config.get('days', [])
-                if today_code not in required_days:
-                    continue 
-
+            successes = 0
             if habit.frequency == 'WINDOWED':
-                target = int(habit.frequency_config.get('target', 1))
-                period = int(habit.frequency_config.get('period', 7))
-                start_date = habit.created_at.date()
-                days_active = (date - start_date).days
-                
-                if days_active >= 0:
-                    current_window_idx = days_active // period
-                    window_start = start_date + timedelta(days=current_window_idx * period)
-                    window_end = window_start + timedelta(days=period - 1)
-                    success_count = sum(1 for l in habit.logs.all() if window_start <= l.date <= window_end and l.is_success)
-
-                    if success_count >= target:
-                        did_it_today = (today_log and today_log.is_success)
-                        if not did_it_today:
-                            continue
-
-            visible_habits.append(habit)
+                bounds = get_window_bounds(habit, date)
+                if bounds:
+                    successes = window_successes.get((habit.id, bounds[0]), 0)
+
+            if is_habit_visible(habit, date, today_log, successes):
+                visible_habits.append(habit)
 
         serializer = DashboardSerializer({
             "date": date,
@@ -107,7 +154,42 @@ class DashboardView(APIView):
             "goals": goals,
             "tasks": tasks
         })
-        return Response(serializer.data)
+        set_dashboard_snapshot(user.id, date, today, version, serializer.data)
+        return Response(serializer.data, headers={'X-Dashboard-Cache': 'MISS', 'ETag': etag})
+
+
+class DashboardRangeView(APIView):
+    """
+    GET /api/v1/dashboard/range/?start=YYYY-MM-DD&end=YYYY-MM-DD
+    Week/month views in one request instead of one dashboard call per day.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        start = parse_date(request.query_params.get('start', ''))
+        end = parse_date(request.query_params.get('end', ''))
+        if not start or not end:
+            return Response({"error": "Invalid date format"}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"error": "start must be before end"}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.MAX_DAYS:
+            return Response(
+                {"error": f"Range cannot exceed {self.MAX_DAYS} days"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request.user
+        if settings.TRACKER_INLINE_WINDOW_EVALUATION and end >= (timezone.now().date() - timedelta(days=1)):
+             evaluate_windowed_habits(user)
+
+        etag = user_etag(request, 'dashboard-range', start, end, timezone.localdate())  # Streaks lapse daily
+        unchanged = not_modified(request, etag)
+        if unchanged:
+            return unchanged
+
+        serializer = DashboardRangeSerializer(build_dashboard_range(user, start, end))
+        return Response(serializer.data, headers={'ETag': etag})
 
 
 # ==========================================
@@ -141,6 +223,76 @@ class LogHabitView(APIView):
         return Response(HabitLogSerializer(log).data, status=status.HTTP_200_OK)
 
 
+class LogHabitBatchView(APIView):
+    """
+    POST /api/v1/log/habit/batch/
+    {"entries": [{"habit_id", "date", "status", "entry_value"?, "note"?}, ...]}
+    Validates every entry against one fetch of the user's habits and upserts
+    the valid ones in a single statement. Invalid entries are reported per index.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_ENTRIES = 100
+
+    def post(self, request):
+        entries = request.data.get('entries')
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "'entries' must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > self.MAX_ENTRIES:
+            return Response(
+                {"error": f"At most {self.MAX_ENTRIES} entries per batch"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        habits = {
+            habit.id: habit
+            for habit in Habit.objects.filter(user=request.user)
+        }
+
+        results = [None] * len(entries)
+        valid = []  # (index, unsaved HabitLog)
+        seen = set()
+        for index, entry in enumerate(entries):
+            serializer = HabitLogBatchEntrySerializer(data=entry)
+            if not serializer.is_valid():
+                results[index] = {"index": index, "errors": serializer.errors}
+                continue
+
+            data = serializer.validated_data
+            habit = habits.get(data['habit_id'])
+            if habit is None:
+                results[index] = {"index": index, "errors": {"habit_id": ["Habit not found."]}}
+                continue
+            if (habit.id, data['date']) in seen:
+                results[index] = {"index": index, "errors": {"date": ["Duplicate habit/date in this batch."]}}
+                continue
+
+            log = HabitLog(
+                habit=habit,
+                date=data['date'],
+                status=data['status'],
+                entry_value=data.get('entry_value'),
+                note=data.get('note')
+            )
+            try:
+                log.clean()  # Same entry_value rules as HabitLog.save()
+            except DjangoValidationError as e:
+                results[index] = {"index": index, "errors": e.message_dict}
+                continue
+
+            seen.add((habit.id, data['date']))
+            valid.append((index, log))
+
+        stored = upsert_habit_logs([log for _, log in valid])
+        for (index, _), log in zip(valid, stored):
+            results[index] = {"index": index, "log": HabitLogSerializer(log).data}
+
+        return Response({
+            "saved": len(stored),
+            "failed": len(entries) - len(stored),
+            "results": results
+        }, status=status.HTTP_200_OK)
+
+
 class LogGoalProgressView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -175,6 +327,34 @@ class LogGoalProgressView(APIView):
         return Response(GoalProgressSerializer(log).data, status=status.HTTP_200_OK)
 
 
+# ==========================================
+# 2b. OFFLINE SYNC
+# ==========================================
+
+class SyncView(APIView):
+    """
+    GET /api/v1/sync/?since=<cursor>
+    Changed rows + deletions since the cursor of the previous call.
+    Without `since` the full data set is returned (initial sync), as it is
+    when `since` predates the tombstone retention (`full_resync`: true).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = None
+        raw = request.query_params.get('since')
+        if raw:
+            # An unencoded '+' in the offset arrives as a space
+            since = parse_datetime(raw.replace(' ', '+'))
+            if since is None:
+                return Response({"error": "Invalid timestamp"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt_timezone.utc)
+
+        serializer = SyncSerializer(build_sync_delta(request.user, since))
+        return Response(serializer.data)
+
+
 # ==========================================
 # 3. ENTITY MANAGEMENT (CRUD)
 # ==========================================
@@ -183,28 +363,181 @@ class HabitViewSet(viewsets.ModelViewSet):
     serializer_class = HabitSerializer
     permission_classes = [IsAuthenticated]
 
+    MAX_RECENT_LOGS_DAYS = 365
+
     def get_queryset(self):
-        # Prefetch logs to prevent N+1 queries
-        return Habit.objects.filter(user=self.request.user).prefetch_related('logs')
+        queryset = Habit.objects.filter(user=self.request.user).select_related('linked_goal', 'stats')
+        if self.action == 'retrieve':
+            # Prefetch logs to prevent N+1 queries
+            return queryset.prefetch_related('logs')
+        if self.action == 'list' and self.recent_logs_days():
+            since = timezone.now().date() - timedelta(days=self.recent_logs_days() - 1)
+            return queryset.prefetch_related(Prefetch(
+                'logs',
+                queryset=HabitLog.objects.filter(date__gte=since).order_by('date'),
+                to_attr='recent_logs'
+            ))
+        return queryset
+
+    def recent_logs_days(self):
+        """
+        ?recent_logs=N opts the list into embedding the last N days of logs
+        (bounded); full histories live behind /logs/ and /habits/{id}/.
+        """
+        raw = self.request.query_params.get('recent_logs')
+        if not raw:
+            return None
+        try:
+            days = int(raw)
+        except ValueError:
+            raise ValidationError({"recent_logs": "Must be a number of days."})
+        if not 1 <= days <= self.MAX_RECENT_LOGS_DAYS:
+            raise ValidationError({"recent_logs": f"Must be between 1 and {self.MAX_RECENT_LOGS_DAYS}."})
+        return days
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-    # Use DetailSerializer (with logs) for 'retrieve' and 'list'
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        schedule = (instance.frequency, instance.frequency_config)
+        habit_type = instance.habit_type
+        habit = serializer.save()
+        # New window boundaries: the watermark and counters no longer apply
+        if (habit.frequency, habit.frequency_config) != schedule:
+            Habit.objects.filter(pk=habit.pk).update(windows_evaluated=0)
+            habit.windows_evaluated = 0
+            HabitWindowStat.objects.filter(habit=habit).delete()
+            rebuild_window_stats([habit])
+        # Streaks (and the state saved for incremental edits) follow the old rules
+        if (habit.frequency, habit.frequency_config) != schedule or habit.habit_type != habit_type:
+            recompute_habit_stats([habit])
+            bump_user_version(habit.user_id)  # The habit's post_save bump came before this
+
+    # Use DetailSerializer (with logs) for 'retrieve'; 'list' only embeds recent logs on request
     def get_serializer_class(self):
-        if self.action in ['retrieve', 'list']: 
+        if self.action == 'retrieve': 
             return HabitDetailSerializer
+        if self.action == 'list' and self.recent_logs_days():
+            return HabitRecentLogsSerializer
         return super().get_serializer_class()
 
+    def retrieve(self, request, *args, **kwargs):
+        # Answer 304 from the user's data version, before loading any logs
+        # (and the date: the embedded current streak lapses at midnight)
+        etag = user_etag(request, 'habit', kwargs['pk'], timezone.localdate())
+        response = not_modified(request, etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+            response['ETag'] = etag
+        return response
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        GET /api/v1/habits/{id}/stats/
+        Aggregated chart data (weekday, monthly, status, numeric) instead of the full history.
+        """
+        etag = user_etag(request, 'habit-stats', pk)
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(build_habit_analytics(self.get_object()))
+            response['ETag'] = etag
+        return response
+
+    def heatmap_year(self):
+        raw = self.request.query_params.get('year')
+        if raw is None:
+            return timezone.now().year
+        try:
+            year = int(raw)
+        except ValueError:
+            raise ValidationError({"year": "Must be a year, e.g. 2025."})
+        if not 1970 <= year <= 9999:
+            raise ValidationError({"year": "Out of range."})
+        return year
+
+    @action(detail=True, methods=['get'])
+    def heatmap(self, request, pk=None):
+        """
+        GET /api/v1/habits/{id}/heatmap/?year=YYYY
+        One status byte per day of the year, base64-encoded (see `legend`).
+        """
+        year = self.heatmap_year()
+        etag = user_etag(request, 'heatmap', pk, year)
+        response = not_modified(request, etag)
+        if response is None:
+            habit = self.get_object()
+            data = heatmap_payload(year)
+            data["days"] = build_heatmaps(request.user, [habit], year)[habit.id]
+            response = Response(data)
+            response['ETag'] = etag
+        return response
+
+    @action(detail=False, methods=['get'], url_path='heatmap')
+    def heatmaps(self, request):
+        """
+        GET /api/v1/habits/heatmap/?year=YYYY
+        Same encoding for every active habit: {"habits": {id: days}}.
+        """
+        year = self.heatmap_year()
+        etag = user_etag(request, 'heatmaps', year)
+        response = not_modified(request, etag)
+        if response is None:
+            habits = list(Habit.objects.filter(user=request.user, is_active=True).only('id'))
+            data = heatmap_payload(year)
+            data["habits"] = {
+                str(habit_id): days
+                for habit_id, days in build_heatmaps(request.user, habits, year).items()
+            }
+            response = Response(data)
+            response['ETag'] = etag
+        return response
+
+    CORRELATION_DEFAULT_DAYS = 90
+    MAX_CORRELATION_DAYS = 366
+
+    @action(detail=False, methods=['get'])
+    def correlations(self, request):
+        """
+        GET /api/v1/habits/correlations/?start=YYYY-MM-DD&end=YYYY-MM-DD (default: last 90 days)
+        Co-success, next-day miss effects, weekday collapse and mood/energy correlation of active habits.
+        """
+        params = request.query_params
+        end = parse_date(params['end']) if params.get('end') else timezone.now().date()
+        start = parse_date(params['start']) if params.get('start') else (
+            end and end - timedelta(days=self.CORRELATION_DEFAULT_DAYS - 1)
+        )
+        if not start or not end:
+            raise ValidationError({"detail": "Invalid date format"})
+        if start > end:
+            raise ValidationError({"start": "Must be before end."})
+        if (end - start).days >= self.MAX_CORRELATION_DAYS:
+            raise ValidationError({"detail": f"Range cannot exceed {self.MAX_CORRELATION_DAYS} days."})
+
+        etag = user_etag(request, 'correlations', start, end)
+        response = not_modified(request, etag)
+        if response is None:
+            habits = list(Habit.objects.filter(user=request.user, is_active=True).only('id', 'name'))
+            days, rows = build_status_matrix(habits, start, end)
+            response = Response(build_correlations(request.user, habits, days, rows))
+            response['ETag'] = etag
+        return response
+
     # 👇 SINGLE, CORRECT ANALYZE ACTION
     @action(detail=True, methods=['get'])
     def analyze(self, request, pk=None):
         """
         GET /api/v1/habits/{id}/analyze/
-        Triggers an AI analysis of the habit.
+        Triggers an AI analysis of the habit (cached while its logs don't change; ?refresh=1 forces a new one).
         """
+        refresh = request.query_params.get('refresh') == '1'
+        # ?stream=1: tokens as Server-Sent Events, parsed JSON as the last event
+        if request.query_params.get('stream') == '1':
+            return event_stream_response(stream_habit_insight(pk, request.user, refresh=refresh))
+
         # 1. Call service
-        result = generate_habit_insight(pk, request.user)
+        result = generate_habit_insight(pk, request.user, refresh=refresh)
         
         # 2. Safety check
         if result is None:
@@ -224,9 +557,13 @@ class HabitViewSet(viewsets.ModelViewSet):
     def global_insight(self, request):
         """
         GET /api/v1/habits/global_insight/
-        Analyzes the interaction between ALL active habits.
+        Analyzes the interaction between ALL active habits (cached like analyze, same ?refresh=1 / ?stream=1).
         """
-        result = generate_global_habit_insight(request.user)
+        refresh = request.query_params.get('refresh') == '1'
+        if request.query_params.get('stream') == '1':
+            return event_stream_response(stream_global_habit_insight(request.user, refresh=refresh))
+
+        result = generate_global_habit_insight(request.user, refresh=refresh)
         if "error" in result:
              return Response(result, status=status.HTTP_400_BAD_REQUEST)
         return Response(result)
@@ -243,27 +580,17 @@ class GoalViewSet(viewsets.ModelViewSet):
     # 👇 OVERRIDE THE RETRIEVE METHOD
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        
+        data = self.get_serializer(instance).data
+
         # --- AUTO-GENERATION LOGIC ---
-        if instance.is_completed:
-            # Check if insight exists safely using filter to avoid try/catch overhead
-            insight_exists = GoalInsight.objects.filter(goal=instance).exists()
-            
-            if not insight_exists:
-                print(f"Goal '{instance.name}' is completed but missing insight. Generating now...")
-                try:
-                    # Synchronously generate the insight so it appears in the response
-                    generate_goal_insight(instance.id, request.user)
-                    
-                    # Refresh the instance from DB so it picks up the new relationship
-                    instance.refresh_from_db()
-                except Exception as e:
-                    print(f"Error auto-generating insight: {e}")
-                    # We continue even if AI fails, so the user at least gets the goal details
+        # Queued for `run_insight_worker` instead of calling the LLM here;
+        # the client polls until the real insight replaces the status.
+        if instance.is_completed and data['ai_insight'] is None:
+            job = enqueue_goal_insight(instance)
+            data['ai_insight'] = {"status": job.status.lower()}
         # -----------------------------
 
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return Response(data)
 
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
@@ -272,6 +599,118 @@ class TaskViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer): serializer.save(user=self.request.user)
 
 class HabitLogViewSet(viewsets.ModelViewSet):
+    """
+    GET /api/v1/logs/?habit=<id>&since=YYYY-MM-DD&until=YYYY-MM-DD
+    Cursor-paginated, newest first.
+    """
     serializer_class = HabitLogSerializer
     permission_classes = [IsAuthenticated]
-    def get_queryset(self): return HabitLog.objects.filter(habit__user=self.request.user)
\ No newline at end of file
+    pagination_class = HabitLogCursorPagination
+
+    def get_queryset(self):
+        queryset = HabitLog.objects.filter(habit__user=self.request.user)
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        if params.get('habit'):
+            try:
+                queryset = queryset.filter(habit_id=uuid.UUID(params['habit']))
+            except ValueError:
+                raise ValidationError({"habit": "Invalid habit id"})
+        for param, lookup in (('since', 'date__gte'), ('until', 'date__lte')):
+            if params.get(param):
+                value = parse_date(params[param])
+                if not value:
+                    raise ValidationError({param: "Invalid date format"})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+class DailyLogViewSet(viewsets.GenericViewSet):
+    """Mood/energy journal: trends over a range and bulk backfill."""
+    serializer_class = DailyLogSerializer
+    permission_classes = [IsAuthenticated]
+    TREND_DEFAULT_DAYS = 30
+    MAX_TREND_DAYS = 5 * 366
+    MAX_ENTRIES = 366
+
+    def get_queryset(self):
+        return DailyLog.objects.filter(user=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """
+        GET /api/v1/daily-logs/trends/?start=YYYY-MM-DD&end=YYYY-MM-DD&bucket=day|week|month
+        Avg/min/max/count of mood_score and energy_level per bucket, plus rolling 7/30-day means.
+        """
+        params = request.query_params
+        end = parse_date(params['end']) if params.get('end') else timezone.now().date()
+        start = parse_date(params['start']) if params.get('start') else (
+            end and end - timedelta(days=self.TREND_DEFAULT_DAYS - 1)
+        )
+        bucket = params.get('bucket', 'day')
+        if not start or not end:
+            raise ValidationError({"detail": "Invalid date format"})
+        if start > end:
+            raise ValidationError({"start": "Must be before end."})
+        if (end - start).days >= self.MAX_TREND_DAYS:
+            raise ValidationError({"detail": f"Range cannot exceed {self.MAX_TREND_DAYS} days."})
+        if bucket not in TREND_BUCKETS:
+            raise ValidationError({"bucket": f"Must be one of: {', '.join(TREND_BUCKETS)}."})
+
+        etag = user_etag(request, 'daily-trends', start, end, bucket)
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(build_daily_log_trends(request.user, start, end, bucket))
+            response['ETag'] = etag
+        return response
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        POST /api/v1/daily-logs/bulk/
+        {"entries": [{"date", "mood_score"?, "energy_level"?, "note"?}, ...]}
+        Upserts the valid entries in one statement (an entry replaces its day);
+        invalid ones are reported per index, like /log/habit/batch/.
+        """
+        entries = request.data.get('entries')
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "'entries' must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > self.MAX_ENTRIES:
+            return Response(
+                {"error": f"At most {self.MAX_ENTRIES} entries per batch"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [None] * len(entries)
+        valid = []  # (index, unsaved DailyLog)
+        seen = set()
+        for index, entry in enumerate(entries):
+            serializer = DailyLogBatchEntrySerializer(data=entry)
+            if not serializer.is_valid():
+                results[index] = {"index": index, "errors": serializer.errors}
+                continue
+
+            data = serializer.validated_data
+            if data['date'] in seen:
+                results[index] = {"index": index, "errors": {"date": ["Duplicate date in this batch."]}}
+                continue
+
+            seen.add(data['date'])
+            valid.append((index, DailyLog(
+                user=request.user,
+                date=data['date'],
+                mood_score=data.get('mood_score'),
+                energy_level=data.get('energy_level'),
+                note=data.get('note')
+            )))
+
+        stored = upsert_daily_logs([log for _, log in valid])
+        for (index, _), log in zip(valid, stored):
+            results[index] = {"index": index, "log": DailyLogSerializer(log).data}
+
+        return Response({
+            "saved": len(stored),
+            "failed": len(entries) - len(stored),
+            "results": results
+        }, status=status.HTTP_200_OK)
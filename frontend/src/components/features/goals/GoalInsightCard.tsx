@@ -2,19 +2,20 @@ import {
   Sparkles, BrainCircuit, Lightbulb, Loader2, BarChart3 
 } from 'lucide-react';
 
-interface GoalInsight {
-  overview: string;
-  patterns: string[];
-  reflection: string | null;
-}
+import { GoalInsight, GoalInsightJob } from '@/types';
 
 interface GoalInsightCardProps {
-  insight?: GoalInsight | null;
+  insight?: GoalInsight | GoalInsightJob | null;
   isAnalyzing: boolean;
   onRetry: () => void;
 }
 
-export default function GoalInsightCard({ insight, isAnalyzing, onRetry }: GoalInsightCardProps) {
+export default function GoalInsightCard({ insight: raw, isAnalyzing, onRetry }: GoalInsightCardProps) {
+  // A `{status}` placeholder means the insight is still queued (or failed)
+  const job = raw && 'status' in raw ? raw : null;
+  const insight = raw && !('status' in raw) ? raw : null;
+  const isQueued = job?.status === 'pending' || job?.status === 'running';
+
   return (
     <div className="space-y-3">
       <div className="flex items-center gap-2 px-1">
@@ -62,7 +63,7 @@ export default function GoalInsightCard({ insight, isAnalyzing, onRetry }: GoalI
         ) : (
           /* Empty / Loading State */
           <div className="p-8 text-center bg-white flex flex-col items-center justify-center h-full">
-            {isAnalyzing ? (
+            {isAnalyzing || isQueued ? (
               <>
                 <Loader2 className="h-8 w-8 text-purple-500 animate-spin mb-3" />
                 <p className="text-sm font-bold text-purple-700">Generating Insight...</p>
@@ -17,11 +17,12 @@ export default function GlobalHabitInsights({ habits }: { habits: Habit[] }) {
   const [insight, setInsight] = useState<any>(null);
   const [loading, setLoading] = useState(false);
 
-  const handleAnalyze = async () => {
+  // refresh: skip the server's cached insight (the data may be unchanged)
+  const handleAnalyze = async (refresh = false) => {
     setLoading(true);
     try {
       // Calls the new 'detail=False' endpoint we just made
-      const { data } = await api.get('/habits/global_insight/');
+      const { data } = await api.get('/habits/global_insight/', { params: refresh ? { refresh: 1 } : {} });
       setInsight(data);
     } catch (e) {
       console.error(e);
@@ -53,7 +54,7 @@ export default function GlobalHabitInsights({ habits }: { habits: Habit[] }) {
             </div>
 
             <button 
-                onClick={handleAnalyze}
+                onClick={() => handleAnalyze()}
                 className="group bg-white text-indigo-900 px-8 py-4 rounded-full font-bold hover:scale-105 hover:shadow-[0_0_20px_rgba(255,255,255,0.3)] transition-all flex items-center gap-3 mx-auto"
             >
                 Analyze My System
@@ -90,9 +91,15 @@ export default function GlobalHabitInsights({ habits }: { habits: Habit[] }) {
             <h2 className="text-xl font-bold text-gray-900 flex items-center gap-2">
                 <Network className="h-5 w-5 text-indigo-600" />
                 System Report
+                {/* The AI was slow or down: this one is computed from your logs */}
+                {insight.source === 'local' && (
+                    <span className="text-xs font-medium text-gray-400 bg-gray-100 rounded-full px-2 py-0.5">
+                        Quick stats summary
+                    </span>
+                )}
             </h2>
             <button 
-                onClick={handleAnalyze} 
+                onClick={() => handleAnalyze(true)} 
                 className="text-xs font-medium text-gray-400 hover:text-indigo-600 flex items-center gap-1 transition-colors"
             >
                 <RefreshCw className="h-3 w-3" />
@@ -18,10 +18,11 @@ export default function HabitCoach({ habitId }: { habitId: string }) {
   const [insight, setInsight] = useState<any>(null);
   const [loading, setLoading] = useState(false);
 
-  const handleAnalyze = async () => {
+  // refresh: skip the server's cached insight (the data may be unchanged)
+  const handleAnalyze = async (refresh = false) => {
     setLoading(true);
     try {
-      const { data } = await api.get(`/habits/${habitId}/analyze/`);
+      const { data } = await api.get(`/habits/${habitId}/analyze/`, { params: refresh ? { refresh: 1 } : {} });
       setInsight(data);
     } catch (e) {
       console.error(e);
@@ -77,7 +78,7 @@ export default function HabitCoach({ habitId }: { habitId: string }) {
            </div>
 
            <button 
-             onClick={handleAnalyze}
+             onClick={() => handleAnalyze()}
              className="group flex items-center gap-2 bg-white text-indigo-600 px-6 py-3 rounded-full text-sm font-bold hover:bg-indigo-50 hover:scale-105 transition-all shadow-xl mt-2"
            >
              Analyze My Habits
@@ -99,9 +100,15 @@ export default function HabitCoach({ habitId }: { habitId: string }) {
                     <Sparkles className="h-5 w-5 text-indigo-600" />
                 </div>
                 <h2 className="font-bold text-gray-900 text-lg">Coach&apos;s Report</h2>
+                {/* The AI coach was slow or down: this one is computed from your stats */}
+                {insight.source === 'local' && (
+                    <span className="text-xs font-medium text-gray-400 bg-gray-100 rounded-full px-2 py-0.5">
+                        Quick stats summary
+                    </span>
+                )}
             </div>
             <button 
-                onClick={handleAnalyze} 
+                onClick={() => handleAnalyze(true)} 
                 className="text-xs font-medium text-gray-400 hover:text-indigo-600 flex items-center gap-1 transition-colors"
             >
                 <RefreshCw className="h-3 w-3" />
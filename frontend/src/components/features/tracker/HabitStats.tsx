@@ -6,24 +6,20 @@ import {
   LineChart, Line, YAxis, CartesianGrid,
   PieChart, Pie, Legend
 } from 'recharts';
-import { parseISO, getDay, format, startOfMonth, isSameMonth, subMonths } from 'date-fns';
+import { parseISO, format } from 'date-fns';
 import HabitHeatmap from '@/components/features/tracker/HabitHeatmap';
-import { Habit, HabitLog } from '@/types';
+import { Habit, HabitAnalytics, HabitLog } from '@/types';
+import { useHabitStats } from '@/hooks/queries/useTracker';
 
 // --- HELPER FUNCTIONS ---
-
-function getDayOfWeekData(logs: HabitLog[]) {
-  const days = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
-  const counts = Array(7).fill(0);
-  
-  logs.forEach(log => {
-      if (['DONE', 'RESISTED'].includes(log.status)) {
-          const idx = getDay(parseISO(log.date));
-          counts[idx]++;
-      }
-  });
-
-  return days.map((day, i) => ({ name: day, count: counts[i] }));
+// Weekday/status/monthly/resilience numbers are aggregated by GET /habits/{id}/stats/;
+// these only shape them for the charts.
+
+function getDayOfWeekData(stats?: HabitAnalytics) {
+  return (stats?.weekdays || []).map(d => ({
+      name: d.day.charAt(0) + d.day.slice(1).toLowerCase(),
+      count: d.successes
+  }));
 }
 
 function getNumericTrend(logs: HabitLog[]) {
@@ -37,11 +33,9 @@ function getNumericTrend(logs: HabitLog[]) {
         .slice(-30);
 }
 
-function getStatusDistribution(logs: HabitLog[]) {
-    const counts = { DONE: 0, RESISTED: 0, PARTIAL: 0, MISSED: 0, FAILED: 0 };
-    logs.forEach(l => {
-        if (l.status in counts) counts[l.status as keyof typeof counts]++;
-    });
+function getStatusDistribution(stats?: HabitAnalytics) {
+    if (!stats) return [];
+    const counts = stats.statuses;
 
     return [
         { name: 'Done', value: counts.DONE, color: '#22c55e' },
@@ -51,53 +45,14 @@ function getStatusDistribution(logs: HabitLog[]) {
     ].filter(d => d.value > 0);
 }
 
-function getMonthlyPerformance(logs: HabitLog[], createdAt: string) {
-    const today = new Date();
-    const start = createdAt ? parseISO(createdAt) : subMonths(today, 5);
-    let current = startOfMonth(start);
-    
-    const data = [];
-
-    while (current <= today) {
-        const monthLogs = logs.filter(l => isSameMonth(parseISO(l.date), current));
-        const successCount = monthLogs.filter(l => ['DONE', 'RESISTED'].includes(l.status)).length;
-        const totalRecorded = Math.max(monthLogs.length, 1);
-        const rate = Math.round((successCount / totalRecorded) * 100);
-
-        data.push({
-            name: format(current, 'MMM'),
-            rate: rate,
-            total: successCount
-        });
-
-        current = new Date(current.setMonth(current.getMonth() + 1));
-    }
-    
-    return data.slice(-6);
-}
-
-function getResilienceScore(logs: HabitLog[]) {
-    if (logs.length < 2) return 0;
-    
-    const sorted = [...logs].sort((a, b) => a.date.localeCompare(b.date));
-    
-    let fails = 0;
-    let recovered = 0;
-
-    for (let i = 0; i < sorted.length - 1; i++) {
-        const current = sorted[i];
-        const next = sorted[i+1];
-
-        if (['MISSED', 'FAILED'].includes(current.status)) {
-            fails++;
-            if (['DONE', 'RESISTED'].includes(next.status)) {
-                recovered++;
-            }
-        }
-    }
-
-    if (fails === 0) return 100; 
-    return Math.round((recovered / fails) * 100);
+function getMonthlyPerformance(stats?: HabitAnalytics) {
+    return (stats?.months || [])
+        .map(m => ({
+            name: format(parseISO(`${m.month}-01`), 'MMM'),
+            rate: m.success_rate,
+            total: m.successes
+        }))
+        .slice(-6);
 }
 
 // --- SUB-COMPONENT: EMPTY STATE ---
@@ -112,13 +67,14 @@ const EmptyChartState = ({ message }: { message: string }) => (
 
 export default function HabitStats({ habit }: { habit: Habit }) {
   const logs = habit.logs || [];
-  const hasLogs = logs.length > 0;
+  const { data: stats } = useHabitStats(habit.id);
+  const hasLogs = (stats?.total_logs ?? logs.length) > 0;
   
-  const weeklyData = getDayOfWeekData(logs);
+  const weeklyData = getDayOfWeekData(stats);
   const numericData = habit.tracking_mode === 'NUMERIC' ? getNumericTrend(logs) : [];
-  const pieData = getStatusDistribution(logs);
-  const monthlyData = getMonthlyPerformance(logs, habit.created_at);
-  const resilienceScore = getResilienceScore(logs);
+  const pieData = getStatusDistribution(stats);
+  const monthlyData = getMonthlyPerformance(stats);
+  const resilienceScore = stats?.resilience ?? (hasLogs ? 100 : 0);
 
   return (
     <div className="space-y-6">
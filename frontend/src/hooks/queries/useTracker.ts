@@ -1,6 +1,6 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import api from '@/lib/api';
-import { DashboardData, Goal, Habit } from '@/types';
+import { DashboardData, Goal, Habit, HabitAnalytics } from '@/types';
 import { format } from 'date-fns';
 
 // 1. Fetch Dashboard
@@ -137,6 +137,11 @@ export const useGoal = (id: string) => {
       return data;
     },
     enabled: !!id, // Only fetch if ID exists
+    // Poll while the insight worker is still on it
+    refetchInterval: (query) => {
+      const insight = query.state.data?.ai_insight;
+      return insight && 'status' in insight && ['pending', 'running'].includes(insight.status) ? 3000 : false;
+    },
   });
 };
 
@@ -212,12 +217,24 @@ export const useHabit = (id: string) => {
   });
 };
 
+export const useHabitStats = (id: string) => {
+  return useQuery({
+    queryKey: ['habit', id, 'stats'],
+    queryFn: async () => {
+      const { data } = await api.get<HabitAnalytics>(`/habits/${id}/stats/`);
+      return data;
+    },
+    enabled: !!id,
+  });
+};
+
 // Also ensure useHabits (plural) exists for the list page if you haven't already
 export const useHabits = () => {
   return useQuery({
     queryKey: ['habits'],
     queryFn: async () => {
-      const { data } = await api.get<Habit[]>('/habits/');
+      // The list no longer embeds full histories; opt into the last year of logs
+      const { data } = await api.get<Habit[]>('/habits/', { params: { recent_logs: 365 } });
       return data;
     },
   });
@@ -29,6 +29,18 @@ export interface Habit {
   };
 }
 
+// GET /habits/{id}/stats/ (aggregated server-side)
+export interface HabitAnalytics {
+  total_logs: number;
+  successes: number;
+  success_rate: number;
+  weekdays: { day: string; total: number; successes: number; success_rate: number }[];
+  months: { month: string; total: number; successes: number; success_rate: number }[];
+  statuses: Record<HabitLog['status'], number>;
+  resilience: number | null;
+  entry_values: { count: number; sum: number | null; avg: number | null; min: number | null; max: number | null } | null;
+}
+
 export interface HabitLog {
   id: string;
   habit: string;
@@ -44,6 +56,11 @@ export interface GoalInsight {
   reflection: string | null;
 }
 
+// Returned in place of the insight while the background worker generates it
+export interface GoalInsightJob {
+  status: 'pending' | 'running' | 'done' | 'failed';
+}
+
 export interface Goal {
   id: string;
   name: string;
@@ -54,7 +71,7 @@ export interface Goal {
   completed_at?: string;
   completion_note?: string; // 👈 Make sure this is here too
   logs?: GoalProgress[];
-  ai_insight?: GoalInsight;
+  ai_insight?: GoalInsight | GoalInsightJob | null;
   source_habit?: string | null;
   source_habit_name?: string | null; // 👈 The new field
   created_at?: string;